@@ -19,10 +19,11 @@ theme = SimpleNamespace(**__theme__)
 
 
 class DotGraphVisualizer:
-    def __init__(self, graph: 'Graph'):
+    def __init__(self, graph: 'Graph', annotations: dict = None):
         self.graph = graph
+        self.annotations = annotations or {}
         self.dot_graph = Digraph()
-        self.visitor = GraphVisitor()
+        self.visitor = GraphVisitor(self.annotations)
         self.nodes = []
         self.edges = []
         self._subgraphs = {}
@@ -78,7 +79,7 @@ class DotGraphVisualizer:
                 self.edges.append({
                     'from': new_node['name'],
                     'to': connected_node['name'],
-                    'label': ns[1],
+                    'label': ns[1] if ns[1] is None else str(ns[1]),
                     'constraint': edge_constraint,
                     'compass_point': compass_point
                 })
@@ -94,7 +95,7 @@ class DotGraphVisualizer:
 
     def to_dot(self):
         self.dot_graph = Digraph()
-        self.visitor = GraphVisitor()
+        self.visitor = GraphVisitor(self.annotations)
         self.nodes = []
         self.edges = []
         self._subgraphs = {}
@@ -199,11 +200,16 @@ class EngineNotAvailableException(Exception):
 
 
 class GraphVisitor:
+    def __init__(self, annotations: dict = None):
+        # node id => text displayed under the node's id, e.g. the node's execution time or memory
+        self.annotations = annotations or {}
+
     def render_node_label(self, node, extra_label=""):
         # print(node.callable)
         # print(type(node.callable).__name__)
         # return "{}\n {}".format(type(node).__name__, node.id)
-        return node.id
+        annotation = self.annotations.get(node.id)
+        return "{}\n{}".format(node.id, annotation) if annotation else node.id
 
     def render_node_name(self, node):
         return "{}\n {}".format(type(node).__name__, id(node))
@@ -213,6 +219,16 @@ class GraphVisitor:
         node_name = self.render_node_name(node)
         return dict(name=node_name, label=label, shape="diamond", style="filled", rank=node.rank)
 
+    def render_dot_switch_node(self, node):
+        label = self.render_node_label(node)
+        node_name = self.render_node_name(node)
+        return dict(name=node_name, label=label, shape="hexagon", style="filled", rank=node.rank)
+
+    def render_dot_merge_node(self, node):
+        label = self.render_node_label(node)
+        node_name = self.render_node_name(node)
+        return dict(name=node_name, label=label, shape="invtrapezium", style="filled", rank=node.rank)
+
     def render_dot_action_node(self, node):
         label = self.render_node_label(node)
         node_name = self.render_node_name(node)
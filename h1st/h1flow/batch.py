@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_scalar
+
+from h1st.exceptions.exception import GraphException
+from h1st.h1flow.execution_context import ExecutionContext, ExecutionScope
+from h1st.h1flow.h1step import Decision
+
+
+def coalesce(items: List[Dict]) -> Tuple[Dict[Tuple, List[int]], List[int]]:
+    """
+    Groups the items of a list input which can be executed together as one batch: dictionaries having the same
+    keys and only scalar values.
+
+    :param items: the list input of Graph.execute()
+    :return: tuple of (keys => positions of the items having those keys, positions of the items to execute one by one)
+    """
+    groups = {}
+    others = []
+
+    for position, item in enumerate(items):
+        if isinstance(item, dict) and all(is_scalar(value) for value in item.values()):
+            groups.setdefault(tuple(item), []).append(position)
+        else:
+            others.append(position)
+
+    return groups, others
+
+
+def is_row_aligned(value: Any, size: int) -> bool:
+    """Whether a value holds one entry per row of a batch of the given size"""
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return len(value) == size
+
+    return isinstance(value, np.ndarray) and value.ndim == 1 and len(value) == size
+
+
+class BatchExecutionContext(ExecutionContext):
+    """
+    Execution context running a graph once for a batch of items. Every key of the items becomes a pandas Series
+    indexed by the positions of the items, so each node is executed once on the whole batch.
+
+    Each step runs on a subset of the rows: a Decision node routes the rows of its results to its yes/no branches,
+    and the downstream steps only see the inputs of the rows they were routed. Outputs of the nodes being Series,
+    DataFrames or 1-D arrays with one entry per row are per row values, any other output is the same for all rows.
+    """
+
+    __slots__ = ('index', '_rows')
+
+    def __init__(self, plan: 'ExecutionPlan', items: List[Dict], index: List[int], trace: Optional['Trace'] = None):
+        """
+        :param plan: the plan to execute
+        :param items: dictionaries with the same keys and scalar values
+        :param index: the positions of the items, used as the index of the batch
+        :param trace: the trace of the execution if it is sampled by a tracer
+        """
+        index = pd.Index(index)
+        frame = pd.DataFrame.from_records(items, index=index, columns=list(items[0]))
+        super().__init__(plan, {key: frame[key] for key in frame.columns}, trace)
+
+        self.index = index
+        # rows each executed step was run for
+        self._rows: List[Optional[pd.Index]] = [None] * len(plan.steps)
+
+    def inputs(self, step: 'ExecutionStep') -> Optional[ExecutionScope]:
+        if not step.parents:
+            self._rows[step.index] = self.index
+            return super().inputs(step)
+
+        deliveries = self._deliveries[step.index]
+        if not deliveries:
+            return None
+
+        if len(deliveries) > 1:
+            rows = self._rows[deliveries[0][0]]
+            for parent, _, _ in deliveries[1:]:
+                rows = rows.union(self._rows[parent])
+
+            self._rows[step.index] = rows
+            return super().inputs(step)
+
+        parent, edge_data, self._origins[step.index] = deliveries[0]
+        parent_rows = self._rows[parent]
+        rows = self._edge_rows(self.plan.steps[parent].node, edge_data, parent_rows)
+        self._rows[step.index] = rows
+
+        if len(rows) == len(parent_rows):
+            return super().inputs(step)
+
+        # the rows were routed by a decision node, restrict the inputs to them
+        self._deliveries[step.index] = None
+        restricted = {
+            key: value.loc[rows] if is_row_aligned(value, len(parent_rows)) else value
+            for key, value in self._scopes[parent].items()
+        }
+        self._release(parent)
+
+        return ExecutionScope({}, edge_data, restricted)
+
+    def complete(self, step: 'ExecutionStep', inputs: Mapping, output: Optional[Mapping]) -> List[int]:
+        rows = self._rows[step.index]
+
+        if output:
+            output = {key: self._align(value, rows) for key, value in output.items()}
+
+        return super().complete(step, inputs, output)
+
+    def output(self) -> List[Dict[str, Any]]:
+        """
+        Scatters the outputs of the executed steps back to the items of the batch
+
+        :return: the output of each item, in the order of the batch's index
+        """
+        results = {position: {} for position in self.index}
+
+        for output, rows in zip(self._outputs, self._rows):
+            if not output:
+                continue
+
+            for key, value in output.items():
+                if isinstance(value, pd.Series):
+                    for position, item_value in value.items():
+                        results[position][key] = item_value
+                elif isinstance(value, pd.DataFrame):
+                    for position, record in zip(value.index, value.to_dict(orient='records')):
+                        results[position][key] = record
+                else:
+                    for position in rows:
+                        results[position][key] = value
+
+        return [results[position] for position in self.index]
+
+    @staticmethod
+    def _align(value: Any, rows: pd.Index) -> Any:
+        """Indexes the per row values of a node's output by the rows the node was run for"""
+        if not is_row_aligned(value, len(rows)):
+            return value
+
+        if isinstance(value, np.ndarray):
+            return pd.Series(value, index=rows)
+
+        return value if value.index.equals(rows) else value.set_axis(rows)
+
+    @staticmethod
+    def _edge_rows(node: 'Node', edge_data: Mapping, rows: pd.Index) -> pd.Index:
+        """Gets the rows passed to a downstream step, i.e. the rows of the results routed by a Decision node"""
+        if not isinstance(node, Decision):
+            return rows
+
+        results = edge_data[node._result_field] if node._result_field in edge_data else next(iter(edge_data.values()))
+        if not isinstance(results, (pd.Series, pd.DataFrame)):
+            raise GraphException(
+                f'in batch mode, results of {type(node._containable).__name__} must be a DataFrame with one row '
+                f'per item')
+
+        return results.index
@@ -0,0 +1,235 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from h1st.h1flow.memory import sizeof
+
+
+class Uncacheable(Exception):
+    """Raised when the inputs of a node cannot be fingerprinted"""
+
+
+def fingerprint(value: Any) -> bytes:
+    """
+    Computes a content fingerprint of a value: DataFrames and Series are hashed with pd.util.hash_pandas_object
+    (pickled if they hold unhashable values), numeric arrays through their memory buffer without copy, containers
+    recursively and other values by pickling them.
+
+    :raise Uncacheable: if the value cannot be pickled
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    _update(hasher, value)
+    return hasher.digest()
+
+
+def _update(hasher, value: Any):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hasher.update(type(value).__name__.encode())
+        hasher.update(repr(value.columns.tolist() if isinstance(value, pd.DataFrame) else value.name).encode())
+        hasher.update(repr(value.dtypes.tolist() if isinstance(value, pd.DataFrame) else value.dtype).encode())
+        try:
+            hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy())
+        except TypeError:
+            # object columns holding unhashable values such as lists or dicts
+            _update_pickled(hasher, value)
+    elif isinstance(value, np.ndarray) and not value.dtype.hasobject:
+        hasher.update(f'ndarray{value.dtype.str}{value.shape}'.encode())
+        hasher.update(np.ascontiguousarray(value).reshape(-1).view(np.uint8))
+    elif isinstance(value, Mapping):
+        hasher.update(b'{')
+        for key in sorted(value, key=str):
+            _update(hasher, key)
+            _update(hasher, value[key])
+        hasher.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        hasher.update(b'[' if isinstance(value, list) else b'(')
+        for item in value:
+            _update(hasher, item)
+        hasher.update(b']')
+    elif isinstance(value, (str, int, float, bool, bytes)) or value is None:
+        hasher.update(f'{type(value).__name__}:{value!r};'.encode())
+    else:
+        _update_pickled(hasher, value)
+
+
+def _update_pickled(hasher, value: Any):
+    try:
+        hasher.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception as e:
+        raise Uncacheable(f'cannot fingerprint a value of type {type(value).__name__}') from e
+
+
+class NodeCache:
+    """
+    Cache of the outputs of a node, keyed by a fingerprint of the node's inputs. Entries are evicted in least recently
+    used order when the cache holds more than maxsize entries or more than max_bytes of outputs, and expire ttl
+    seconds after being stored. Subclasses may change the eviction order by overriding _victim().
+    """
+
+    def __init__(self, maxsize: Optional[int] = 128, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        :param maxsize: maximum number of entries, unbounded if None
+        :param ttl: number of seconds an entry stays valid, forever if None
+        :param max_bytes: maximum size of the cached outputs (estimated with memory.sizeof), unbounded if None
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        # key => (output, expiry time or None, size in bytes), from the least to the most recently used
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # the entries are not sent along with the graph to worker processes
+        state = self.__dict__.copy()
+        state['_entries'] = OrderedDict()
+        state['_bytes'] = 0
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """Gets the cached output of a key, None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, output: Dict):
+        size = sum(sizeof(value) for value in output.values()) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        expiry = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (output, expiry, size)
+            self._bytes += size
+
+            while (self.maxsize is not None and len(self._entries) > self.maxsize) or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._remove(self._victim())
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Gets the hits, misses, evictions, uncacheable inputs, number of entries and bytes of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+            'uncacheable': self.uncacheable,
+            'entries': len(self._entries),
+            'bytes': self._bytes if self.max_bytes is not None else None,
+        }
+
+    def _victim(self) -> Hashable:
+        """The key of the entry to evict: the least recently used one"""
+        return next(iter(self._entries))
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+def cached(cls=None, *, maxsize: Optional[int] = 128, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+    """
+    Class decorator caching the outputs of the nodes of a NodeContainable whose functions are pure functions of their
+    inputs. The cache of a node is keyed by the command and a fingerprint of the inputs the containable consumes
+    (NodeContainable.consumes), or of all of its inputs if it does not declare them. See NodeCache for the parameters.
+
+    .. code-block:: python
+        :caption: Caching the features of the last 1000 distinct inputs for 10 minutes
+
+        from h1st.h1flow.cache import cached
+
+        @cached(maxsize=1000, ttl=600)
+        class BuildFeatures(h1.NodeContainable):
+            consumes = ['df']
+
+            def predict(self, inputs):
+                return {'features': build_features(inputs['df'])}
+
+        g.nodes.BuildFeatures.cache.stats()
+    """
+    def decorate(cls):
+        cls.cache_options = {'maxsize': maxsize, 'ttl': ttl, 'max_bytes': max_bytes}
+        return cls
+
+    return decorate(cls) if cls is not None else decorate
+
+
+def _key(cache: NodeCache, command: str, keys: Optional[Sequence[str]], inputs: Mapping) -> Optional[bytes]:
+    try:
+        if keys is None:
+            return fingerprint((command, {key: inputs[key] for key in inputs}))
+
+        return fingerprint((command, {key: inputs[key] for key in keys if key in inputs}))
+    except Uncacheable:
+        cache.uncacheable += 1
+        return None
+
+
+def call_cached(cache: NodeCache, command: str, keys: Optional[Sequence[str]], call: Callable, inputs: Mapping) -> Dict:
+    """Invokes the function of a node unless its output for the same inputs is cached"""
+    key = _key(cache, command, keys, inputs)
+    if key is None:
+        return call(inputs)
+
+    output = cache.get(key)
+    if output is None:
+        output = call(inputs)
+        cache.put(key, output)
+
+    return dict(output)
+
+
+async def acall_cached(cache: NodeCache, command: str, keys: Optional[Sequence[str]], call: Callable,
+                       inputs: Mapping) -> Dict:
+    """Asynchronous version of call_cached() for coroutine functions"""
+    key = _key(cache, command, keys, inputs)
+    if key is None:
+        return await call(inputs)
+
+    output = cache.get(key)
+    if output is None:
+        output = await call(inputs)
+        cache.put(key, output)
+
+    return dict(output)
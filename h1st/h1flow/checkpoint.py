@@ -0,0 +1,206 @@
+import hashlib
+import inspect
+import io
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence
+
+import cloudpickle
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from h1st.h1flow.cache import Uncacheable, fingerprint
+from h1st.model.repository.storage.base import Storage
+
+
+def code_fingerprint(obj: Any) -> str:
+    """
+    Fingerprint of the code of a node or containable: the source of its class, and its checkpoint_version attribute
+    to invalidate the checkpoints when code outside the class changes (see NodeContainable.checkpoint_version)
+    """
+    cls = type(obj)
+    try:
+        source = inspect.getsource(cls)
+    except (OSError, TypeError):
+        source = f'{cls.__module__}.{cls.__qualname__}'
+
+    version = getattr(obj, 'checkpoint_version', None)
+    return hashlib.blake2b(f'{source}\n{version!r}'.encode(), digest_size=8).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Persists the output of each node of a graph's executions into a Storage, so that executing the graph again with
+    the same inputs loads the output of the nodes instead of recomputing them. An output is keyed by the node's id,
+    the command, a fingerprint of the code of the containable, a fingerprint of its state before the call (e.g. its
+    hyperparameters) and a fingerprint of the inputs it consumes (NodeContainable.consumes, all of its inputs if it
+    does not declare them).
+
+    DataFrames and Series are stored as Parquet files, the other values of the output are pickled. The state of the
+    containable (its attributes, e.g. a trained model) is stored along with its output and restored when the output
+    is loaded. Nodes whose inputs or state cannot be pickled are not checkpointed. Only the executions of the given
+    commands are checkpointed, training by default.
+
+    .. code-block:: python
+        :caption: Resuming a failed training
+
+        from h1st.h1flow.checkpoint import CheckpointStore
+        from h1st.model.repository.storage.local import LocalStorage
+
+        g.checkpoints = CheckpointStore(LocalStorage('/data/checkpoints'), namespace='my_graph')
+        g.execute('train', data)  # fails in the last node
+        g.execute('train', data)  # loads the output of the other nodes
+    """
+
+    def __init__(self, storage: Storage, namespace: str = 'checkpoints', restore_state: bool = True,
+                 commands: Optional[Iterable[str]] = ('train',)):
+        """
+        :param storage: the storage, e.g. LocalStorage or S3Storage
+        :param namespace: namespace of the checkpoints in the storage
+        :param restore_state: whether to store and restore the state of the containables
+        :param commands: the commands whose executions are checkpointed, all of them if None
+        """
+        self.storage = storage
+        self.namespace = namespace
+        self.restore_state = restore_state
+        self.commands = frozenset(commands) if commands is not None else None
+
+        self.loaded = 0
+        self.saved = 0
+
+    def key(self, node: 'Node', command: str, inputs: Mapping, keys: Optional[Sequence[str]] = None,
+            id: Optional[str] = None) -> Optional[str]:
+        """
+        Gets the key of the checkpoint of a node for its inputs and the state of its containable, None if they
+        cannot be fingerprinted. The id of the node's step (e.g. features.Scale for a node of an inlined graph)
+        distinguishes it from the nodes of other graphs with the same id.
+        """
+        # the containable is configured by its attributes (e.g. M(depth=5) and M(depth=3)), which load() overwrites
+        state = {name: value for name, value in getattr(node._containable, '__dict__', {}).items() if name != '_node'}
+        try:
+            digest = fingerprint((
+                {key: inputs[key] for key in (keys if keys is not None else inputs) if key in inputs},
+                state,
+            ))
+        except Uncacheable:
+            return None
+
+        code = code_fingerprint(node._containable or node)
+        return f'{self.namespace}::{id or node.id}::{command}-{code}-{digest.hex()}'
+
+    def load(self, node: 'Node', key: str) -> Optional[Dict]:
+        """Loads the output of a node, None if it is not checkpointed"""
+        manifest_name = f'{key}::manifest'
+        if not self.storage.exists(manifest_name):
+            return None
+
+        manifest = cloudpickle.loads(self.storage.get_bytes(manifest_name))
+        output = dict(manifest['objects'])
+        for name, kind in manifest['frames'].items():
+            frame = pd.read_parquet(io.BytesIO(self.storage.get_bytes(f'{key}::{name}.parquet')))
+            output[name] = frame.iloc[:, 0].rename(manifest['series_names'][name]) if kind == 'series' else frame
+
+        if manifest['state'] is not None and node._containable is not None:
+            vars(node._containable).update(manifest['state'])
+
+        self.loaded += 1
+        return output
+
+    def save(self, node: 'Node', key: str, output: Dict):
+        """Saves the output of a node, and the state of its containable if restore_state"""
+        manifest = {'state': None}
+        if self.restore_state and node._containable is not None:
+            manifest['state'] = {name: value for name, value in vars(node._containable).items() if name != '_node'}
+
+        frames, manifest['objects'], manifest['series_names'] = {}, {}, {}
+        for name, value in output.items():
+            data = _to_parquet(value)
+            if data is None:
+                manifest['objects'][name] = value
+            else:
+                frames[name] = data
+                if isinstance(value, pd.Series):
+                    manifest['series_names'][name] = value.name
+
+        manifest['frames'] = {name: 'series' if name in manifest['series_names'] else 'dataframe' for name in frames}
+        try:
+            data = cloudpickle.dumps(manifest)
+        except Exception as e:
+            logger.warning(f'Cannot checkpoint the output of node {node.id}: {e}')
+            return
+
+        for name, frame in frames.items():
+            self.storage.set_bytes(f'{key}::{name}.parquet', frame)
+        # written last: a checkpoint exists once complete
+        self.storage.set_bytes(f'{key}::manifest', data)
+        self.saved += 1
+
+    def applies_to(self, command: str) -> bool:
+        """Whether the executions of a command are checkpointed"""
+        return self.commands is None or command in self.commands
+
+    def clear(self):
+        """
+        Deletes all the checkpoints of the namespace. The storage must implement Storage.delete_namespace, as
+        LocalStorage and S3Storage do.
+        """
+        try:
+            self.storage.delete_namespace(self.namespace)
+        except NotImplementedError:
+            raise NotImplementedError(f'{type(self.storage).__name__} cannot delete the checkpoints of a namespace, '
+                                      f'delete_namespace() is not implemented') from None
+
+
+def _to_parquet(value: Any) -> Optional[bytes]:
+    """Serializes a DataFrame or Series into Parquet, None for other values or if Parquet does not support it"""
+    if isinstance(value, pd.Series):
+        value = value.to_frame(name='values')
+    elif not isinstance(value, pd.DataFrame):
+        return None
+
+    if any(isinstance(item, (list, tuple, dict, set, np.ndarray))
+           for _, column in value.select_dtypes(include='object').items() for item in column):
+        # Parquet reads nested values back as arrays, which would change the inputs of the next nodes
+        return None
+
+    buffer = io.BytesIO()
+    try:
+        value.to_parquet(buffer)
+    except Exception:
+        # e.g. non string column names or mixed object columns
+        return None
+
+    return buffer.getvalue()
+
+
+def call_checkpointed(store: CheckpointStore, step: 'ExecutionStep', command: str, keys: Optional[Sequence[str]],
+                      call: Callable, inputs: Mapping) -> Dict:
+    """Invokes the function of a step unless its output for the same code and inputs is checkpointed"""
+    node = step.node
+    key = store.key(node, command, inputs, keys, step.id)
+    if key is None:
+        return call(inputs)
+
+    output = store.load(node, key)
+    if output is None:
+        output = call(inputs)
+        if output is not None:
+            store.save(node, key, output)
+
+    return output
+
+
+async def acall_checkpointed(store: CheckpointStore, step: 'ExecutionStep', command: str,
+                             keys: Optional[Sequence[str]], call: Callable, inputs: Mapping) -> Dict:
+    """Asynchronous version of call_checkpointed() for coroutine functions"""
+    node = step.node
+    key = store.key(node, command, inputs, keys, step.id)
+    if key is None:
+        return await call(inputs)
+
+    output = store.load(node, key)
+    if output is None:
+        output = await call(inputs)
+        if output is not None:
+            store.save(node, key, output)
+
+    return output
@@ -0,0 +1,116 @@
+import inspect
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Union
+
+# weight of the last duration of a node in its estimated duration
+EWMA_WEIGHT = 0.2
+
+# values of Deadline.degraded
+SKIPPED = 'skipped'
+FALLBACK = 'fallback'
+
+
+class Deadline:
+    """
+    Latency budget of an execution of a graph, see Graph.execute(..., deadline=...). The budget starts when the
+    Deadline is created, so that it may include the time the request waited before being executed.
+
+    Before executing an optional node (NodeContainable.optional) or a node having a fallback (Node.fallback), the
+    remaining budget is compared to the estimated duration of the node, an exponentially weighted moving average of
+    its previous durations. If the node is not expected to complete in time, its fallback is executed instead, or
+    the optional node is skipped (it outputs nothing). The other nodes are always executed. The estimate of a node
+    decays each time the node is not executed, so that a node estimated slow once (e.g. by a cold start) is executed
+    again after a few executions, and its estimate updated.
+
+    .. code-block:: python
+        :caption: Bounding the latency of a prediction with a slow enrichment model
+
+        g.nodes.Enrichment.optional = True
+        g.nodes.RiskModel.fallback = RiskRules()
+
+        deadline = Deadline(0.05)
+        result = g.execute('predict', data, deadline=deadline)
+        deadline.degraded  # e.g. {'Enrichment': 'skipped', 'RiskModel': 'fallback'}
+    """
+
+    __slots__ = ('seconds', 'expires', 'degraded')
+
+    def __init__(self, seconds: float):
+        """
+        :param seconds: the budget
+        """
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+        # node id => 'skipped' or 'fallback'
+        self.degraded: Dict[str, str] = {}
+
+    @classmethod
+    def of(cls, value: Union[float, 'Deadline', None]) -> Optional['Deadline']:
+        """Gets the deadline of an execution from a number of seconds or a Deadline"""
+        if value is None or isinstance(value, Deadline):
+            return value
+
+        return cls(value)
+
+    def remaining(self) -> float:
+        """Remaining budget in seconds, negative once expired"""
+        return self.expires - time.monotonic()
+
+    def allows(self, estimate: Optional[float]) -> bool:
+        """Whether a node is expected to complete within the remaining budget"""
+        remaining = self.remaining()
+        return remaining > 0 and (estimate is None or estimate <= remaining)
+
+    def __repr__(self):
+        return f'Deadline({self.seconds}, remaining={self.remaining():.4f}, degraded={self.degraded})'
+
+
+def call_with_deadline(deadline: Deadline, durations: List[Optional[float]], step: 'ExecutionStep', call: Callable,
+                       fallback: Optional[Callable], inputs: Mapping) -> Dict:
+    """Invokes the function of an optional node or a node with a fallback if the deadline allows"""
+    if not deadline.allows(durations[step.index]):
+        _decay(durations, step.index)
+        if fallback is not None:
+            deadline.degraded[step.id] = FALLBACK
+            return fallback(inputs)
+
+        deadline.degraded[step.id] = SKIPPED
+        return {}
+
+    started = time.perf_counter()
+    output = call(inputs)
+    _record(durations, step.index, time.perf_counter() - started)
+
+    return output
+
+
+async def acall_with_deadline(deadline: Deadline, durations: List[Optional[float]], step: 'ExecutionStep',
+                              call: Callable, fallback: Optional[Callable], inputs: Mapping) -> Dict:
+    """Asynchronous version of call_with_deadline() for coroutine functions, the fallback may be synchronous"""
+    if not deadline.allows(durations[step.index]):
+        _decay(durations, step.index)
+        if fallback is not None:
+            deadline.degraded[step.id] = FALLBACK
+            output = fallback(inputs)
+            return await output if inspect.isawaitable(output) else output
+
+        deadline.degraded[step.id] = SKIPPED
+        return {}
+
+    started = time.perf_counter()
+    output = await call(inputs)
+    _record(durations, step.index, time.perf_counter() - started)
+
+    return output
+
+
+def _record(durations: List[Optional[float]], index: int, duration: float):
+    estimate = durations[index]
+    durations[index] = duration if estimate is None else EWMA_WEIGHT * duration + (1 - EWMA_WEIGHT) * estimate
+
+
+def _decay(durations: List[Optional[float]], index: int):
+    """Lowers the estimate of a node which is not executed, as there is no new duration to correct it otherwise"""
+    estimate = durations[index]
+    if estimate is not None:
+        durations[index] = (1 - EWMA_WEIGHT) * estimate
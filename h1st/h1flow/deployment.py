@@ -0,0 +1,92 @@
+import copy
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from h1st.exceptions.exception import GraphException, ModelException
+from h1st.h1flow.execution_plan import ExecutionPlan
+from h1st.h1flow.h1step_containable import NodeContainable
+
+
+def replace(graph: 'Graph', node_id: str, containable: NodeContainable, commands: Iterable[str] = ()) \
+        -> NodeContainable:
+    """
+    Replaces the containable of a node while the graph is being executed. See Graph.replace()
+    """
+    node = getattr(graph.nodes, node_id, None)
+    if node is None or node._containable is None:
+        raise GraphException(f'graph has no node "{node_id}" with a containable to replace')
+
+    previous = node._containable
+    containable._node = node
+    # a ResourceAwareExecutor pickles the new containable for its worker processes on the next execution of the node,
+    # as it checks its payloads against the containable of the node
+    node._containable = containable
+
+    # the executions in flight keep on writing the outputs of the previous containable to the previous cache
+    if node._cache is not None:
+        node._cache = copy.copy(node._cache)
+
+    # the new plan and its pruned plans are built and bound before being published, so that the executions do not
+    # compile them
+    previous_plan = graph._plan
+    plan = ExecutionPlan(graph)
+    plans = [plan] + [plan.prune(keys) for keys in (previous_plan._pruned if previous_plan is not None else ())]
+    for command in commands:
+        for each in plans:
+            each.bind(command)
+
+    graph._plan = plan
+    return previous
+
+
+def hot_swap(graph: 'Graph', node_id: str, repository: 'ModelRepository', version: Optional[str] = None,
+             sample: Optional[Dict] = None, command: str = 'predict', executor: Optional[Executor] = None) -> Future:
+    """
+    Loads a version of the model of a node in the background and replaces the node's model with it. See
+    Graph.hot_swap()
+    """
+    node = getattr(graph.nodes, node_id, None)
+    if node is None or node._containable is None:
+        raise GraphException(f'graph has no node "{node_id}" with a model to swap')
+
+    swap = _swap_function(graph, node_id, node._containable, repository, version, sample, command)
+    if executor is not None:
+        return executor.submit(swap)
+
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            future.set_result(swap())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f'h1st-hot-swap-{node_id}', daemon=True).start()
+    return future
+
+
+def _swap_function(graph: 'Graph', node_id: str, current: NodeContainable, repository: 'ModelRepository',
+                   version: Optional[str], sample: Optional[Dict], command: str) -> Callable[[], Any]:
+    def swap() -> Optional[str]:
+        # ModelRepository.load replaces the attributes of the copy, the current model is left untouched
+        model = copy.copy(current)
+        model._node = None
+        model.version = None
+
+        repository.load(model, version)
+        if model.version is None:
+            # ModelRepository.load logs the errors
+            raise ModelException(f'could not load version {version or "latest"} of the model of node "{node_id}"')
+
+        if sample is not None:
+            # e.g. lazy initializations and the first allocations happen before the model receives traffic
+            model.call(command, sample)
+
+        replace(graph, node_id, model, [command])
+        return model.version
+
+    return swap
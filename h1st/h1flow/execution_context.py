@@ -0,0 +1,300 @@
+from collections import ChainMap
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# origin of the data of a branch: (index of the step of the Decision node which split the results, positions of the
+# results passed to the branch)
+Origin = Optional[Tuple[int, np.ndarray]]
+
+
+class ExecutionScope(ChainMap):
+    """
+    Read-only view over the layered inputs of a node: the graph's input data and the outputs of the upstream nodes,
+    later layers shadowing earlier ones. Nothing is copied when a scope is created, and writes from a node only go
+    to a private top layer (copy-on-write) so they never leak into the upstream outputs.
+
+    Its layers are never empty, except the top one: a scope on top of another one reuses the list of its layers as is.
+    """
+
+    def child(self, *layers: Mapping) -> 'ExecutionScope':
+        """
+        Creates a new scope on top of this one
+
+        :param layers: mappings shadowing this scope, the first one having the highest priority
+        :return: the new scope with its own writable layer
+        """
+        maps = [{}]
+        for layer in layers:
+            if layer:
+                maps.append(layer)
+
+        parent = self.maps
+        maps += parent if parent[0] else parent[1:]
+
+        return ExecutionScope(*maps)
+
+    @classmethod
+    def of(cls, inputs: Mapping) -> 'ExecutionScope':
+        """Wraps any mapping (e.g. a dict returned by a node's transform_input) into a scope"""
+        if isinstance(inputs, ExecutionScope):
+            return inputs
+
+        return cls({}, inputs) if inputs else cls()
+
+
+class ExecutionContext:
+    """
+    Holds the state of one execution of an ExecutionPlan: the inputs handed over from each step to its downstream
+    steps and the outputs of the executed steps. Inputs of a step are released as soon as all of its downstream
+    steps have taken them, and the outputs are only merged once into the graph's output by output().
+
+    When the plan tracks the liveness of the keys (see ExecutionPlan.liveness), a key of the inputs is dropped as
+    soon as the last step which may read it is done, and an output is only kept for the graph's output if it is one
+    of the graph's output keys and no later step overrides it.
+    """
+
+    __slots__ = ('plan', 'data', 'trace', 'deadline', '_scopes', '_deliveries', '_consumers', '_outputs', '_origins',
+                 '_graphs', '_live', '_pending', '_writers')
+
+    def __init__(self, plan: 'ExecutionPlan', data: Mapping, trace: Optional['Trace'] = None,
+                 deadline: Optional['Deadline'] = None):
+        """
+        :param plan: the plan to execute
+        :param data: input data of the start step
+        :param trace: the trace of the execution if it is sampled by a tracer
+        :param deadline: the latency budget of the execution if any
+        """
+        size = len(plan.steps)
+
+        self.plan = plan
+        self.data = data
+        self.trace = trace
+        self.deadline = deadline
+
+        self._scopes: List[Optional[ExecutionScope]] = [None] * size
+        # edge data delivered to each step by its upstream steps: list of (upstream step index, edge data, origin)
+        self._deliveries: List[Optional[List[Tuple[int, Mapping, Origin]]]] = [None] * size
+        # number of downstream steps which have not yet taken the scope of a step
+        self._consumers: List[int] = [0] * size
+        self._outputs: List[Optional[Mapping]] = [None] * size
+        # the Decision node branch each step belongs to, for Merge nodes to put the rows of the branches back in order
+        self._origins: List[Origin] = [None] * size
+        # end step index of each inlined graph being executed => (inputs of the graph, list of (step index, output)
+        # of the graph's executed steps), see ExecutionStep.graph_end
+        self._graphs: Dict[int, Tuple[Optional[ExecutionScope], List[Tuple[int, Mapping]]]] = {}
+
+        if plan.liveness:
+            # (id of an input layer, key) => number of steps which may still read the key of the layer
+            self._live: Optional[Dict[Tuple[int, str], int]] = {}
+            # the (input layer, key) each step may read
+            self._pending: Optional[List[Optional[List[Tuple[Dict, str]]]]] = [None] * size
+            # key => the last step in plan order which output the key
+            self._writers: Optional[Dict[str, int]] = {}
+        else:
+            self._live = self._pending = self._writers = None
+
+    def has_inputs(self, step: 'ExecutionStep') -> bool:
+        """Whether the step is the start of the plan or received data from one of its upstream steps"""
+        return not step.parents or bool(self._deliveries[step.index])
+
+    def inputs(self, step: 'ExecutionStep') -> Optional[ExecutionScope]:
+        """
+        Builds the inputs of a step from the data delivered by its upstream steps
+
+        :return: the step's inputs or None if no upstream step passes data to the step
+        """
+        if not step.parents:
+            if self._live is None:
+                return ExecutionScope({}, self.data)
+
+            # own the input data so that the keys no step reads can be dropped
+            data = dict(self.data)
+            self._track(data, [step.index])
+            return ExecutionScope({}, data)
+
+        deliveries = self._deliveries[step.index]
+        if not deliveries:
+            return None
+
+        self._deliveries[step.index] = None
+
+        if len(deliveries) == 1:
+            parent, edge_data, self._origins[step.index] = deliveries[0]
+            scope = self._scopes[parent].child(edge_data)
+            self._release(parent)
+            return scope
+
+        # a join step sees the data of all its upstream steps, the later ones shadowing the earlier ones
+        layers = []
+        if not step.passthrough:
+            joined = step.node._join([
+                (self._scopes[parent].child(edge_data), origin) for parent, edge_data, origin in deliveries
+            ])
+            if joined:
+                layers.append(joined)
+
+        # the layers the branches share (e.g. the graph's input data) are only kept once, where they shadow the most
+        seen = set()
+        for parent, edge_data, _ in reversed(deliveries):
+            for layer in (edge_data, *self._scopes[parent].maps):
+                if layer and id(layer) not in seen:
+                    seen.add(id(layer))
+                    layers.append(layer)
+            self._release(parent)
+
+        return ExecutionScope({}, *layers)
+
+    def complete(self, step: 'ExecutionStep', inputs: Mapping, output: Optional[Mapping]) -> List[int]:
+        """
+        Records the output of an executed step and hands its data over to the downstream steps
+
+        :param step: the executed step
+        :param inputs: the step's inputs (after transform_input)
+        :param output: the step's output
+        :return: indices of the downstream steps which received data
+        """
+        output = output or {}
+        scope = None
+
+        if step.router is not step.node:
+            # the end step of an inlined graph hands over the graph's output on top of the graph's inputs, as the
+            # node of the graph does when the graph is not inlined, rather than only the data reaching the end node
+            scope, outputs = self._graphs.pop(step.index)
+            output = self._merge(outputs, output)
+
+        if step.graph_end is not None:
+            graph = self._graphs.get(step.graph_end)
+            if graph is None:
+                # the start step of the graph is the first of its steps to complete, its inputs are the graph's
+                graph = self._graphs[step.graph_end] = (ExecutionScope.of(inputs), [])
+            graph[1].append((step.index, output))
+
+        if self._live is not None:
+            self._done(step)
+            self._outputs[step.index] = self._retain(step.index, output)
+            output = dict(output)
+        else:
+            self._outputs[step.index] = output
+
+        receivers = []
+        if not step.children:
+            return receivers
+
+        routes = step.router._route(output)
+        if self.trace is not None:
+            self.trace.route(step, routes)
+
+        index = step.index
+        deliveries = self._deliveries
+        for (child, _), (edge_data, positions) in zip(step.children, routes):
+            if edge_data is None or child is None:
+                continue
+
+            origin = (index, positions) if positions is not None else self._origins[index]
+            if deliveries[child] is None:
+                deliveries[child] = [(index, edge_data, origin)]
+            else:
+                deliveries[child].append((index, edge_data, origin))
+            receivers.append(child)
+
+        if receivers:
+            self._scopes[step.index] = scope if scope is not None else ExecutionScope.of(inputs)
+            self._consumers[step.index] = len(receivers)
+
+            if self._live is not None:
+                self._track_routes(step, routes)
+
+        return receivers
+
+    def skip(self, step: 'ExecutionStep'):
+        """Records that a step is not executed, none of its upstream steps passing data to it"""
+        if self._live is not None:
+            self._done(step)
+
+    def output(self) -> Dict[str, Any]:
+        """Merges the outputs of all executed steps in plan order, the later ones overriding the earlier ones"""
+        result = {}
+        for output in self._outputs:
+            if output:
+                result.update(output)
+
+        return result
+
+    @staticmethod
+    def _merge(outputs: List[Tuple[int, Mapping]], output: Mapping) -> Dict:
+        """Merges the outputs of the steps of an inlined graph in plan order, then the output of its end step"""
+        merged = {}
+        for _, each in sorted(outputs, key=lambda entry: entry[0]):
+            merged.update(each)
+        merged.update(output)
+
+        return merged
+
+    def _retain(self, index: int, output: Mapping) -> Dict:
+        """Gets the part of the output of a step to keep for the graph's output"""
+        keys = self.plan.output_keys
+        retained = {}
+
+        for key, value in output.items():
+            if keys is not None and key not in keys:
+                continue
+
+            writer = self._writers.get(key)
+            if writer is not None:
+                if writer > index:
+                    # overridden in the graph's output by a later step
+                    continue
+
+                self._outputs[writer].pop(key, None)
+
+            self._writers[key] = index
+            retained[key] = value
+
+        return retained
+
+    def _track_routes(self, step: 'ExecutionStep', routes: List[Tuple[Optional[Mapping], Any]]):
+        # the same edge data may be passed to several downstream steps
+        layers = {}
+        for (child, _), (edge_data, _) in zip(step.children, routes):
+            if edge_data is not None and child is not None:
+                layers.setdefault(id(edge_data), (edge_data, []))[1].append(child)
+
+        for layer, receivers in layers.values():
+            self._track(layer, receivers)
+
+    def _track(self, layer: Dict, receivers: List[int]):
+        """Registers the steps which may read the keys of an input layer, dropping the keys no step reads"""
+        for key in list(layer):
+            readers = set()
+            for receiver in receivers:
+                readers.update(self.plan.readers(receiver, key))
+
+            if not readers:
+                del layer[key]
+                continue
+
+            self._live[(id(layer), key)] = len(readers)
+            for reader in readers:
+                if self._pending[reader] is None:
+                    self._pending[reader] = []
+                self._pending[reader].append((layer, key))
+
+    def _done(self, step: 'ExecutionStep'):
+        """Drops the keys of the input layers the step was the last one which may read"""
+        pending = self._pending[step.index]
+        if not pending:
+            return
+
+        self._pending[step.index] = None
+        for layer, key in pending:
+            entry = (id(layer), key)
+            self._live[entry] -= 1
+            if not self._live[entry]:
+                del self._live[entry]
+                layer.pop(key, None)
+
+    def _release(self, index: int):
+        self._consumers[index] -= 1
+        if not self._consumers[index]:
+            self._scopes[index] = None
@@ -0,0 +1,948 @@
+import asyncio
+import copy
+import gc
+import inspect
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple, Union
+
+from h1st.exceptions.exception import GraphException
+from h1st.h1flow.batch import BatchExecutionContext
+from h1st.h1flow.cache import acall_cached, call_cached
+from h1st.h1flow.checkpoint import acall_checkpointed, call_checkpointed
+from h1st.h1flow.deadline import Deadline, acall_with_deadline, call_with_deadline
+from h1st.h1flow.execution_context import ExecutionContext, ExecutionScope
+from h1st.h1flow.h1step import Action, Node
+from h1st.h1flow.h1step_containable import NodeContainable
+from h1st.h1flow.scheduling import ResourceAwareExecutor
+from h1st.h1flow.tracing import Span, Trace, Tracer, count_rows, input_values
+
+
+class ExecutionStep:
+    """
+    One entry of a compiled ExecutionPlan. It wraps a node of the graph together with everything the executor
+    needs to run it (transforms, output validation, connections to upstream/downstream steps) so that none of it
+    has to be looked up again on every execution.
+    """
+
+    __slots__ = ('index', 'node', 'id', 'parents', 'children', 'transform_input', 'transform_output', 'validate',
+                 'consumes', 'produces', 'passthrough', 'resource', 'max_concurrency', 'optional', 'fallback', 'router',
+                 'graph_end')
+
+    def __init__(self, index: int, node: Node, id: Optional[str] = None):
+        """
+        :param index: position of the step in the plan
+        :param node: the node
+        :param id: id of the step, the node's id prefixed with the ids of the nodes of the inlined graphs it
+            belongs to (e.g. features.Scale), the node's id if None
+        """
+        self.index = index
+        self.node = node
+        self.id = id or node.id
+
+        # list of (upstream step index, edge label)
+        self.parents: List[Tuple[int, Any]] = []
+        # list of (downstream step index, edge label) in the order the edges were added,
+        # the index being None for the downstream steps pruned by ExecutionPlan.prune()
+        self.children: List[Tuple[Optional[int], Any]] = []
+        # the node whose edges are the step's children and which routes the step's output to them: the node itself,
+        # or the node of the graph for the end node of an inlined graph
+        self.router = node
+        # index of the end step of the inlined graph the step belongs to, which collects the outputs of the graph's
+        # steps to hand them over as the graph's output. None for the steps of the plan's graph
+        self.graph_end: Optional[int] = None
+
+        # the slots of the node are read directly rather than through its properties, which matters when compiling
+        # graphs of many nodes
+        containable = node._containable
+        transform_input = node._transform_input
+        transform_output = node._transform_output
+        self.transform_input = transform_input if callable(transform_input) else None
+        self.transform_output = transform_output if node._id != 'end' and callable(transform_output) else None
+
+        # only nodes overriding _validate_output (i.e. Decision) need to validate their output
+        self.validate = node._validate_output if type(node)._validate_output is not Node._validate_output else None
+
+        # keys of the inputs the step reads, None if it may read any key (e.g. in a transform function)
+        self.consumes = node.consumes if self.transform_input is None and self.transform_output is None else None
+        # keys of the step's output, None if unknown
+        self.produces = node.produces if self.transform_output is None else None
+
+        # whether the step passes its inputs through to its downstream steps without executing its node,
+        # see ExecutionPlan.prune()
+        self.passthrough = False
+
+        # resource hint and concurrency limit of the node, see ResourceAwareExecutor
+        self.resource = node._resource if node._resource is not None or containable is None else containable.resource
+        self.max_concurrency = node._max_concurrency \
+            if node._max_concurrency is not None or containable is None else containable.max_concurrency
+
+        # whether the step may be skipped, and the containable executed instead, when the deadline of the execution
+        # does not allow it to complete in time. See Deadline
+        self.optional = node._optional if node._optional is not None else \
+            containable.optional if containable is not None else False
+        self.fallback = node._fallback
+
+    @property
+    def is_join(self) -> bool:
+        """A join step (e.g. the end node) has several upstream steps and is executed once all of them are done"""
+        return len(self.parents) > 1
+
+    def __repr__(self):
+        return f'ExecutionStep({self.index}, {self.id!r})'
+
+
+class ExecutionPlan:
+    """
+    Topologically ordered, flat representation of a Graph. The plan is built once by Graph.compile() and is then
+    executed by a simple loop, so the depth of the graph is not limited by the interpreter's recursion limit.
+
+    The steps are in depth-first order of the graph (following the order the edges were added, e.g. yes before no)
+    which is the same order the nodes' outputs used to be accumulated in, so later outputs keep on overriding
+    earlier ones. A step having several upstream steps (the end node) is placed after all of them.
+
+    The nodes of the graphs the graph is composed of are inlined into the plan in place of their node (see
+    Graph.inline), so a hierarchy of graphs is executed as one flat plan.
+    """
+
+    def __init__(self,
+                 graph: 'Graph',
+                 steps: Optional[List[ExecutionStep]] = None,
+                 output_keys: Optional[Iterable[str]] = None):
+        """
+        :param graph: the graph to compile
+        :param steps: the steps of the plan, built from the graph if None
+        :param output_keys: the keys of the graph's output, Graph.end(outputs=...) if None
+        """
+        self.graph = graph
+        # list of (inlined graph, plan of the inlined graph when the plan was built), see stale
+        self.inlined: List[Tuple['Graph', 'ExecutionPlan']] = []
+        if steps is None:
+            with paused_gc():
+                steps = self._build_steps(graph, self.inlined)
+        self.steps: List[ExecutionStep] = steps
+
+        # keys of the graph's output, all the keys if None. See Graph.end(outputs=...)
+        if output_keys is None:
+            output_keys = getattr(graph, '_output_keys', None)
+        self.output_keys = frozenset(output_keys) if output_keys is not None else None
+
+        # whether the inputs and outputs no step or graph output needs are released during the execution
+        self.liveness = self.output_keys is not None or any(
+            step.consumes is not None and step.node._containable is not None for step in self.steps)
+        # whether the plan is executed with plain dictionaries, see _run_plain()
+        self.plain = not self.liveness and all(_is_plain(step) for step in self.steps)
+        # steps reachable from each step, the step included
+        self._descendants: Optional[List[Tuple[int, ...]]] = self._build_descendants() if self.liveness else None
+        # (step index, key) => steps reachable from the step which may read the key
+        self._readers: Dict[Tuple[int, str], Tuple[int, ...]] = {}
+        # requested output keys => plan pruned by prune()
+        self._pruned: Dict[FrozenSet[str], ExecutionPlan] = {}
+
+        # command => list of pre-resolved callables, one per step
+        self._calls: Dict[str, List[Optional[Callable]]] = {}
+        # command => list of (pre-resolved callable, whether it is a coroutine function), one per step
+        self._async_calls: Dict[str, List[Tuple[Optional[Callable], bool]]] = {}
+        # command => estimated duration of the function of each step, see Deadline
+        self._durations: Dict[str, List[Optional[float]]] = {}
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def stale(self) -> bool:
+        """Whether one of the inlined graphs changed since the plan was built, so that the plan must be rebuilt"""
+        return any(graph._plan is not plan for graph, plan in self.inlined)
+
+    @property
+    def vectorized(self) -> bool:
+        """Whether all NodeContainables of the plan are vectorized, so that the plan can be executed in batch mode"""
+        return all(step.node._containable is None or step.node._containable.vectorized for step in self.steps)
+
+    def readers(self, index: int, key: str) -> Tuple[int, ...]:
+        """
+        Gets the steps which may read a key of the inputs of a step, i.e. the steps reachable from the step (the step
+        included) consuming the key or any key. The result is cached with the plan.
+        """
+        readers = self._readers.get((index, key))
+        if readers is None:
+            readers = tuple(
+                reader for reader in self._descendants[index]
+                if self.steps[reader].consumes is None or key in self.steps[reader].consumes
+            )
+            self._readers[(index, key)] = readers
+
+        return readers
+
+    def prune(self, outputs: Iterable[str]) -> 'ExecutionPlan':
+        """
+        Derives the plan computing only some keys of the graph's output, from the keys the nodes declare they consume
+        and produce (NodeContainable.consumes/produces). The result is cached with the plan.
+
+        Going backward from the end node, a step is executed if it may produce one of the requested keys or a key a
+        downstream executed step may consume, or if it is a Decision node routing the rows of such steps. A step
+        whose outputs are not needed but which has such steps downstream passes its inputs through without being
+        executed, and the other steps are skipped together with their downstream steps.
+
+        :param outputs: the requested keys
+        :return: plan whose output only holds the requested keys
+        :raise GraphException: if no node produces some of the requested keys, as far as the nodes declare it
+        """
+        requested = frozenset(outputs)
+        plan = self._pruned.get(requested)
+        if plan is None:
+            produced = [step.produces for step in self.steps]
+            if None not in produced:
+                unknown = requested.difference(*produced)
+                if unknown:
+                    raise GraphException(f'no node of the graph produces the output keys {sorted(unknown)}')
+
+            plan = ExecutionPlan(self.graph, self._prune_steps(requested), requested)
+            self._pruned[requested] = plan
+
+        return plan
+
+    def bind(self, command: str, executor: Optional[Executor] = None) -> List[Optional[Callable]]:
+        """
+        Resolves, once per command, the function each step will invoke. The result is cached with the plan, except
+        for a ResourceAwareExecutor which wraps the functions to dispatch them.
+
+        :param command: the command the graph is executing (predict, train, ...)
+        :param executor: the executor of the execution
+        :return: list of callables taking the inputs of the step, None for steps which do nothing
+        """
+        if isinstance(executor, ResourceAwareExecutor):
+            return [self._resolve(step, command, executor=executor) for step in self.steps]
+
+        calls = self._calls.get(command)
+        if calls is None:
+            calls = [self._resolve(step, command) for step in self.steps]
+            self._calls[command] = calls
+
+        return calls
+
+    def bind_async(self, command: str, executor: Optional[Executor] = None) -> List[Tuple[Optional[Callable], bool]]:
+        """
+        Same as bind() but for an asynchronous execution: coroutine functions are preferred,
+        i.e. a<command> (e.g. apredict) when the containable defines it as a coroutine function.
+
+        :return: list of tuple(callable, whether the callable is a coroutine function)
+        """
+        dispatched = isinstance(executor, ResourceAwareExecutor)
+        calls = self._async_calls.get(command) if not dispatched else None
+        if calls is None:
+            calls = []
+            for step in self.steps:
+                call = self._resolve(step, command, asynchronous=True, executor=executor if dispatched else None)
+                calls.append((call, inspect.iscoroutinefunction(call)))
+
+            if not dispatched:
+                self._async_calls[command] = calls
+
+        return calls
+
+    def run(self, command: str, data: Dict, executor: Optional[Executor] = None,
+            tracer: Optional[Tracer] = None, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Executes the plan exactly 1 time
+
+        :param command: the command for the nodes (predict, train, ...)
+        :param data: input data of the start node
+        :param executor: optional executor to run independent branches concurrently
+        :param tracer: optional tracer recording the execution of the steps
+        :param deadline: optional latency budget of the execution
+        :return: accumulated outputs of all executed nodes
+        """
+        if tracer is None and executor is None and deadline is None and self.plain:
+            return self._run_plain(command, data)
+
+        with self._tracing(tracer, command) as trace:
+            context = ExecutionContext(self, data, trace, deadline)
+            self.execute(command, context, executor)
+
+        return context.output()
+
+    def _run_plain(self, command: str, data: Mapping) -> Dict:
+        """
+        Executes a plain plan (see plain) without the bookkeeping of an ExecutionContext: each step passes its inputs
+        merged with its output to each of its downstream steps as a dictionary of their own, which for small graphs
+        costs less than layering them
+        """
+        steps = self.steps
+        inputs_of: List[Optional[Mapping]] = [None] * len(steps)
+        inputs_of[0] = dict(data)
+        outputs = []
+
+        for step, call in zip(steps, self.bind(command)):
+            inputs = inputs_of[step.index]
+            if inputs is None:
+                continue
+            inputs_of[step.index] = None
+
+            inputs, output = execute_step(step, call, inputs)
+            if output:
+                outputs.append(output)
+
+            for child, _ in step.children:
+                inputs_of[child] = {**inputs, **output} if output else dict(inputs)
+
+        result = {}
+        for output in outputs:
+            result.update(output)
+
+        return result
+
+    def run_batch(self, command: str, items: List[Dict], index: List[int],
+                  executor: Optional[Executor] = None, tracer: Optional[Tracer] = None) -> List[Dict]:
+        """
+        Executes the plan exactly 1 time for a batch of items, see BatchExecutionContext
+
+        :param command: the command for the nodes (predict, train, ...)
+        :param items: dictionaries with the same keys and scalar values
+        :param index: positions of the items in the list input
+        :param executor: optional executor to run independent branches concurrently
+        :param tracer: optional tracer recording the execution of the steps
+        :return: accumulated outputs of the executed nodes for each item
+        """
+        with self._tracing(tracer, command) as trace:
+            context = BatchExecutionContext(self, items, index, trace)
+            self.execute(command, context, executor)
+
+        return context.output()
+
+    def execute(self, command: str, context: ExecutionContext, executor: Optional[Executor] = None):
+        """
+        Executes the steps of the plan, recording their outputs into the execution context
+
+        :param command: the command for the nodes (predict, train, ...)
+        :param context: the context holding the inputs and outputs of the execution
+        :param executor: optional executor to run independent branches concurrently
+        """
+        if executor is not None:
+            return self._execute_concurrently(command, context, executor)
+
+        calls = self.bind(command)
+        if context.deadline is not None:
+            calls = self._bind_deadline(command, calls, context.deadline)
+
+        for step, call in zip(self.steps, calls):
+            inputs = context.inputs(step)
+            if inputs is None:
+                # none of the upstream steps passes data to this step
+                context.skip(step)
+                continue
+
+            inputs, output = execute_step(step, call, inputs, context.trace)
+            context.complete(step, inputs, output)
+
+    def _execute_concurrently(self, command: str, context: ExecutionContext, executor: Executor):
+        """
+        Executes the plan by submitting every step to the executor as soon as all its upstream steps are done,
+        so sibling branches run at the same time. The bookkeeping stays on the calling thread and the outputs are
+        merged in plan order, so the result is the same as the one of a sequential execution.
+        """
+        calls = self.bind(command, executor)
+        if context.deadline is not None:
+            calls = self._bind_deadline(command, calls, context.deadline)
+        steps = self.steps
+
+        # number of upstream steps of each step which are not done yet
+        waiting = [len(step.parents) for step in steps]
+        ready = [0]
+        running = {}
+        # a ResourceAwareExecutor decides itself which steps run on this thread
+        dispatched = isinstance(executor, ResourceAwareExecutor)
+
+        while ready or running:
+            if len(ready) == 1 and not running and not dispatched:
+                # nothing to run concurrently with, save the round trip to the executor
+                index = ready.pop()
+                inputs = context.inputs(steps[index])
+                inputs, output = execute_step(steps[index], calls[index], inputs, context.trace)
+                done = [(index, inputs, output)]
+            else:
+                for index in ready:
+                    inputs = context.inputs(steps[index])
+                    future = _submit(executor, steps[index], calls[index], inputs, context.trace)
+                    running[future] = index
+                ready = []
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                done = []
+                for future in finished:
+                    index = running.pop(future)
+                    try:
+                        inputs, output, span = future.result()
+                    except BaseException:
+                        for other in running:
+                            other.cancel()
+                        raise
+
+                    if span is not None:
+                        # recorded in the copy of the trace of a worker process
+                        context.trace.spans[index] = span
+                    done.append((index, inputs, output))
+
+            for index, inputs, output in done:
+                context.complete(steps[index], inputs, output)
+                ready.extend(self._resolve_downstream(context, waiting, index))
+
+    async def arun(self, command: str, data: Dict, executor: Optional[Executor] = None,
+                   tracer: Optional[Tracer] = None, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Executes the plan exactly 1 time in the running event loop. Coroutine functions of the nodes are awaited
+        while the synchronous ones are run in the executor. Each step is a task started as soon as all its upstream
+        steps are done, so independent branches run concurrently.
+
+        :param command: the command for the nodes (predict, train, ...)
+        :param data: input data of the start node
+        :param executor: executor for the synchronous functions, the event loop's default executor if None
+        :param tracer: optional tracer recording the execution of the steps
+        :param deadline: optional latency budget of the execution
+        :return: accumulated outputs of all executed nodes
+        """
+        with self._tracing(tracer, command) as trace:
+            context = ExecutionContext(self, data, trace, deadline)
+            await self._aexecute(command, context, executor)
+
+        return context.output()
+
+    async def _aexecute(self, command: str, context: ExecutionContext, executor: Optional[Executor] = None):
+        calls = self.bind_async(command, executor)
+        if context.deadline is not None:
+            calls = self._bind_deadline(command, calls, context.deadline, asynchronous=True)
+        steps = self.steps
+
+        waiting = [len(step.parents) for step in steps]
+        ready = [0]
+        running = {}
+
+        while ready or running:
+            for index in ready:
+                call, is_coroutine = calls[index]
+                inputs = context.inputs(steps[index])
+                pool = executor.pool(steps[index]) if isinstance(executor, ResourceAwareExecutor) else executor
+                task = asyncio.ensure_future(
+                    aexecute_step(steps[index], call, is_coroutine, inputs, pool, context.trace))
+                running[task] = index
+            ready = []
+
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                index = running.pop(task)
+                try:
+                    inputs, output = task.result()
+                except BaseException:
+                    for other in running:
+                        other.cancel()
+                    raise
+
+                context.complete(steps[index], inputs, output)
+                ready.extend(self._resolve_downstream(context, waiting, index))
+
+    def _resolve(self, step: ExecutionStep, command: str, asynchronous: bool = False,
+                 executor: Optional[ResourceAwareExecutor] = None) -> Optional[Callable]:
+        """
+        Resolves the function of a step, looking up the node's cache and the graph's checkpoints first if any, and
+        dispatched by the executor if given
+        """
+        if step.passthrough:
+            return None
+
+        call = resolve_call(step.node, command, asynchronous)
+        if call is None:
+            return None
+
+        keys = sorted(step.consumes) if step.consumes is not None else None
+        coroutine = asynchronous and inspect.iscoroutinefunction(call)
+
+        if executor is not None and not coroutine:
+            call = executor.bind(step, command, call)
+
+        checkpoints = self.graph.checkpoints
+        if checkpoints is not None and checkpoints.applies_to(command):
+            checkpointed = acall_checkpointed if coroutine else call_checkpointed
+            call = partial(checkpointed, checkpoints, step, command, keys, call)
+
+        cache = step.node.cache
+        if cache is not None:
+            call = partial(acall_cached if coroutine else call_cached, cache, command, keys, call)
+
+        return call
+
+    def _bind_deadline(self, command: str, calls: List, deadline: Deadline, asynchronous: bool = False) -> List:
+        """Wraps the functions of the optional steps and of the steps having a fallback to check the deadline first"""
+        durations = self._durations.get(command)
+        if durations is None:
+            durations = self._durations[command] = [None] * len(self.steps)
+
+        calls = list(calls)
+        for step in self.steps:
+            call = calls[step.index]
+            if (not step.optional and step.fallback is None) or (call[0] if asynchronous else call) is None:
+                continue
+
+            fallback = resolve_containable_call(step.fallback, command, asynchronous) if step.fallback else None
+            if asynchronous:
+                call, is_coroutine = call
+                wrapper = acall_with_deadline if is_coroutine else call_with_deadline
+                if not is_coroutine and fallback is not None and inspect.iscoroutinefunction(fallback):
+                    fallback = resolve_containable_call(step.fallback, command)
+                calls[step.index] = (partial(wrapper, deadline, durations, step, call, fallback), is_coroutine)
+            else:
+                calls[step.index] = partial(call_with_deadline, deadline, durations, step, call, fallback)
+
+        return calls
+
+    @contextmanager
+    def _tracing(self, tracer: Optional[Tracer], command: str):
+        """Starts the trace of an execution if the tracer samples it, and records it once the execution is done"""
+        trace = tracer.start(self, command) if tracer is not None else None
+        if trace is None:
+            yield None
+            return
+
+        try:
+            yield trace
+        except BaseException as e:
+            trace.finish(e)
+            raise
+
+        trace.finish()
+
+    def _resolve_downstream(self, context: ExecutionContext, waiting: List[int], index: int) -> List[int]:
+        """
+        Updates the number of upstream steps the downstream steps of a done step are waiting for
+
+        :return: the downstream steps ready to be executed, the ones which received no data from any upstream step
+            being skipped together with their own downstream steps
+        """
+        steps = self.steps
+        ready = []
+
+        resolved = [child for child, _ in steps[index].children if child is not None]
+        while resolved:
+            child = resolved.pop()
+            waiting[child] -= 1
+            if waiting[child]:
+                continue
+
+            if context.has_inputs(steps[child]):
+                ready.append(child)
+            else:
+                context.skip(steps[child])
+                resolved.extend(next_child for next_child, _ in steps[child].children if next_child is not None)
+
+        return ready
+
+    def _build_descendants(self) -> List[Tuple[int, ...]]:
+        descendants = [None] * len(self.steps)
+
+        # downstream steps are after their upstream steps in the plan
+        for step in reversed(self.steps):
+            reachable = {step.index}
+            for child, _ in step.children:
+                if child is not None:
+                    reachable.update(descendants[child])
+            descendants[step.index] = reachable
+
+        return [tuple(sorted(reachable)) for reachable in descendants]
+
+    def _prune_steps(self, requested: FrozenSet[str]) -> List[ExecutionStep]:
+        run, passthrough, skip = range(3)
+        steps = self.steps
+        modes = [skip] * len(steps)
+        # keys each step needs from its upstream steps, None for any key
+        needs: List[Optional[FrozenSet[str]]] = [frozenset()] * len(steps)
+
+        for step in reversed(steps):
+            needed = False
+            needed_keys = frozenset()
+            for child, _ in step.children:
+                # the end node only merges the outputs, it needs nothing from its upstream steps
+                if modes[child] == skip or steps[child].id == 'end':
+                    continue
+
+                needed = True
+                needed_keys = None if needed_keys is None or needs[child] is None else needed_keys | needs[child]
+
+            produces = step.produces
+            if step.id == 'end':
+                mode = run
+            elif not step.parents:
+                mode = run
+            elif produces is None or produces & requested:
+                mode = run
+            elif needed and (type(step.router)._route is not Node._route or needed_keys is None
+                             or produces & needed_keys):
+                # a Decision node routes the rows of its downstream steps
+                mode = run
+            else:
+                mode = passthrough if needed else skip
+
+            modes[step.index] = mode
+            if mode == run:
+                consumes = step.consumes
+                needs[step.index] = None if consumes is None or needed_keys is None else consumes | needed_keys
+            elif mode == passthrough:
+                needs[step.index] = needed_keys
+
+        end = steps[-1]
+        if end.id == 'end' and all(modes[parent] == skip for parent, _ in end.parents):
+            modes[end.index] = skip
+
+        pruned = []
+        for step, mode in zip(steps, modes):
+            step = copy.copy(step)
+            step.children = [(child if modes[child] != skip else None, label) for child, label in step.children]
+            if mode != skip:
+                step.parents = [(parent, label) for parent, label in step.parents if modes[parent] != skip]
+
+            if mode == passthrough:
+                step.passthrough = True
+                step.transform_input = step.transform_output = step.validate = None
+                step.consumes = step.produces = frozenset()
+
+            pruned.append(step)
+
+        return pruned
+
+    @staticmethod
+    def _build_steps(graph: 'Graph', inlined: Optional[List[Tuple['Graph', 'ExecutionPlan']]] = None
+                     ) -> List[ExecutionStep]:
+        """
+        Orders the nodes reachable from the start node without recursion, the nodes of the inlined graphs taking
+        the place of their node
+
+        :param graph: the graph
+        :param inlined: list the inlined graphs are appended to, together with their plan
+        """
+        start = getattr(graph.nodes, 'start', None)
+        if start is None:
+            raise GraphException('Graph.start() must be called before compiling the graph')
+
+        # a vertex of the plan is a node of the graph, or a tuple of (node, id prefix) for the nodes of the inlined
+        # graphs, so that a graph inlined several times has one step per node and place
+        exits: Dict[str, Tuple[Node, str]] = {}
+        successors = {}
+        # vertex => node routing the output of the vertex if it is not the vertex's node, see ExecutionStep.router
+        routers = {}
+
+        # count the incoming edges of every reachable vertex
+        in_degrees = {start: 0}
+        pending = [start]
+        while pending:
+            vertex = pending.pop()
+            router, edges = successors[vertex] = _successors(vertex, exits)
+            if router is not vertex:
+                routers[vertex] = router
+
+            for next_vertex, _ in edges:
+                degree = in_degrees.get(next_vertex)
+                if degree is None:
+                    in_degrees[next_vertex] = 1
+                    pending.append(next_vertex)
+                else:
+                    in_degrees[next_vertex] = degree + 1
+
+        # Kahn's algorithm using a stack, so that the order is depth-first
+        steps = []
+        vertices = []
+        indices = {}
+        pending = [start]
+        while pending:
+            vertex = pending.pop()
+            if type(vertex) is tuple:
+                node, prefix = vertex
+                step = ExecutionStep(len(steps), node, prefix + node.id)
+            else:
+                step = ExecutionStep(len(steps), vertex)
+            step.router = routers.get(vertex, step.node)
+            indices[vertex] = step.index
+            steps.append(step)
+            vertices.append(vertex)
+
+            for next_vertex, _ in reversed(successors[vertex][1]):
+                degree = in_degrees[next_vertex] - 1
+                in_degrees[next_vertex] = degree
+                if not degree:
+                    pending.append(next_vertex)
+
+        if len(steps) != len(in_degrees):
+            raise GraphException('Graph contains a cycle')
+
+        for step, vertex in zip(steps, vertices):
+            children = step.children = [(indices[next_vertex], label) for next_vertex, label in successors[vertex][1]]
+            for child, label in children:
+                steps[child].parents.append((step.index, label))
+
+            if type(vertex) is tuple:
+                prefix = vertex[1]
+                if step.router is not step.node:
+                    # the output of an inlined graph is the output of its node in the enclosing graph
+                    prefix = exits[prefix][1]
+                if prefix:
+                    step.graph_end = indices[(exits[prefix][0]._containable.nodes.end, prefix)]
+
+        if inlined is not None:
+            for node, _ in exits.values():
+                child = node._containable
+                inlined.append((child, child._plan or child.compile()))
+
+        return steps
+
+
+def execute_step(step: ExecutionStep,
+                 call: Optional[Callable],
+                 inputs: Mapping,
+                 trace: Optional[Trace] = None
+                 ) -> Tuple[Mapping, Dict]:
+    """
+    Executes a single step: transform_input, the node's function, transform_output and the output validation
+
+    :param step: the step to execute
+    :param call: the function resolved for the step by ExecutionPlan.bind()
+    :param inputs: the step's inputs
+    :param trace: the trace of the execution if it is sampled by a tracer
+    :return: tuple of (inputs after transform_input, output of the step)
+    """
+    if trace is not None:
+        return trace.execute_step(step, call, inputs)
+
+    if step.transform_input:
+        inputs = step.transform_input(inputs)
+
+    output = call(inputs) if call else {}
+
+    if step.transform_output:
+        output = step.transform_output(ExecutionScope.of(inputs).child(output))
+
+    if step.validate:
+        step.validate(output)
+
+    return inputs, output
+
+
+async def aexecute_step(step: ExecutionStep,
+                        call: Optional[Callable],
+                        is_coroutine: bool,
+                        inputs: Mapping,
+                        executor: Optional[Executor] = None,
+                        trace: Optional[Trace] = None
+                        ) -> Tuple[Mapping, Dict]:
+    """
+    Asynchronous version of execute_step(): awaits the node's function if it is a coroutine function,
+    otherwise runs it in the executor so that it does not block the event loop.
+    The span of a traced step has no CPU time as other tasks run on the event loop's thread meanwhile.
+    """
+    span = None
+    if trace is not None:
+        span = trace.span_class(step)
+        span.rows_in = count_rows(input_values(step, inputs))
+        span.start = time.perf_counter_ns()
+
+    if step.transform_input:
+        inputs = step.transform_input(inputs)
+        if span is not None:
+            span.transform_input = time.perf_counter_ns() - span.start
+
+    started = time.perf_counter_ns() if span is not None else 0
+    if call is None:
+        output = {}
+    elif is_coroutine:
+        output = await call(inputs)
+    else:
+        output = await asyncio.get_running_loop().run_in_executor(executor, call, inputs)
+
+    if span is not None:
+        span.call = time.perf_counter_ns() - started
+
+    if step.transform_output:
+        started = time.perf_counter_ns() if span is not None else 0
+        output = step.transform_output(ExecutionScope.of(inputs).child(output))
+        if span is not None:
+            span.transform_output = time.perf_counter_ns() - started
+
+    if step.validate:
+        step.validate(output)
+
+    if span is not None:
+        span.end = time.perf_counter_ns()
+        span.rows_out = count_rows(output.values()) if output else None
+        trace.spans[step.index] = span
+
+    return inputs, output
+
+
+@contextmanager
+def paused_gc():
+    """
+    Pauses the cyclic garbage collector while a graph is built or compiled: the many objects allocated at once
+    trigger collections that walk all of them again and again (e.g. about half the time of compiling a graph of
+    50k nodes), while none of them is garbage
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _is_plain(step: ExecutionStep) -> bool:
+    """
+    Whether a step can be executed by ExecutionPlan._run_plain(): it passes its whole output to all its downstream
+    steps, and it is not a join step unless it is a leaf doing nothing with its inputs (i.e. the end node)
+    """
+    node = step.node
+    router = type(step.router)
+    if step.router is not node or step.graph_end is not None or step.passthrough \
+            or router._route is not Node._route or router._get_edge_data is not Node._get_edge_data:
+        return False
+
+    return len(step.parents) <= 1 or (not step.children and step.transform_input is None
+                                      and node._containable is None and type(node).call is Node.call)
+
+
+def inlined_graph(node: Node) -> Optional['Graph']:
+    """
+    Gets the graph a node executes if its nodes can be inlined into the plan of the node's graph (see Graph.inline):
+    the node only invokes the graph, which has no transform function of its output, no output keys, no checkpoints,
+    and whose class is Graph or a subclass only defining __init__
+    """
+    graph = node._containable
+    if type(node) is not Action or graph is None or not getattr(graph, 'inline', False):
+        return None
+
+    from h1st.h1flow.h1flow import Graph
+
+    # a subclass may define any command (e.g. train) or override how the graph is executed: only the subclasses
+    # merely building their nodes in __init__ are inlined
+    if not isinstance(graph, Graph) or any(
+            name != '__init__' and (inspect.isfunction(value) or isinstance(value, (classmethod, staticmethod)))
+            for cls in type(graph).__mro__[:type(graph).__mro__.index(Graph)] for name, value in vars(cls).items()):
+        return None
+
+    if node.transform_input or node.transform_output or node.cache is not None or node.optional \
+            or node.fallback is not None or node.resource is not None or node.max_concurrency is not None:
+        return None
+
+    end = getattr(graph.nodes, 'end', None)
+    if end is None or end.transform_output or graph._output_keys is not None or graph.checkpoints is not None \
+            or graph.singleflight is not None:
+        return None
+
+    return graph
+
+
+def _successors(vertex: Union[Node, Tuple[Node, str]], exits: Dict[str, Tuple[Node, str]]
+                ) -> Tuple[Node, List[Tuple[Union[Node, Tuple[Node, str]], Any]]]:
+    """
+    Gets the vertices following a vertex of the plan, see ExecutionPlan._build_steps(): the end node of an inlined
+    graph is followed by the nodes following the graph's node, and the node of an inlined graph stands for the
+    graph's start node
+
+    :param vertex: a node of the graph, or a tuple of (node, id prefix) for a node of an inlined graph
+    :param exits: id prefix of each inlined graph => (node of the graph, id prefix of the node), updated with the
+        graphs inlined by the vertices returned
+    :return: tuple of (the node whose edges are followed, list of (next vertex, edge label))
+    """
+    node, prefix = vertex if type(vertex) is tuple else (vertex, '')
+    while prefix and node is exits[prefix][0]._containable.nodes.end:
+        node, prefix = exits[prefix]
+
+    edges = node._edges
+    if not prefix:
+        for next_node, _ in edges:
+            if inlined_graph(next_node) is not None:
+                break
+        else:
+            return node, edges
+
+    successors = []
+    for next_node, label in edges:
+        graph = inlined_graph(next_node)
+        if graph is not None:
+            next_prefix = f'{prefix}{next_node.id}.'
+            exits[next_prefix] = (next_node, prefix)
+            successors.append(((graph.nodes.start, next_prefix), label))
+        else:
+            successors.append(((next_node, prefix) if prefix else next_node, label))
+
+    return node, successors
+
+
+def _submit(executor: Executor, step: ExecutionStep, call: Optional[Callable], inputs: Mapping,
+            trace: Optional[Trace]):
+    """
+    Submits the execution of a step to the executor, to the pool of its node for a ResourceAwareExecutor. The future
+    gives the span of the step along with its inputs and output, as a process pool records it in a copy of the trace.
+    """
+    if isinstance(executor, ResourceAwareExecutor):
+        return executor.submit_step(_execute_submitted_step, step, call, inputs, trace)
+
+    return executor.submit(_execute_submitted_step, step, call, inputs, trace)
+
+
+def _execute_submitted_step(step: ExecutionStep, call: Optional[Callable], inputs: Mapping,
+                            trace: Optional[Trace]) -> Tuple[Mapping, Dict, Optional[Span]]:
+    inputs, output = execute_step(step, call, inputs, trace)
+    return inputs, output, trace.spans[step.index] if trace is not None else None
+
+
+def resolve_call(node: Node, command: str, asynchronous: bool = False) -> Optional[Callable]:
+    """
+    Finds the function a node will invoke for a command, skipping the per call getattr() of NodeContainable.call.
+    Nodes or containables overriding call() keep on being invoked through call().
+
+    :param node: the node
+    :param command: the command the graph is executing
+    :param asynchronous: resolves the coroutine function a<command> of the containable (e.g. apredict) if it
+        exists, and checks the output of coroutine functions once awaited
+    """
+    if type(node).call is not Node.call:
+        return partial(node.call, command)
+
+    containable = node._containable
+    if containable is None:
+        return None
+
+    return resolve_containable_call(containable, command, asynchronous)
+
+
+def resolve_containable_call(containable: NodeContainable, command: str, asynchronous: bool = False) -> Callable:
+    """Finds the function of a containable for a command, see resolve_call()"""
+    if type(containable).call is not NodeContainable.call:
+        return partial(containable.call, command)
+
+    func = getattr(containable, f'a{command}', None) if asynchronous else None
+    if not inspect.iscoroutinefunction(func):
+        func = getattr(containable, command, None)
+
+    if func is None:
+        # let NodeContainable.call report the missing method
+        return partial(containable.call, command)
+
+    if asynchronous and inspect.iscoroutinefunction(func):
+        return partial(_acall_checked, func, containable.__class__.__name__)
+
+    return partial(_call_checked, func, containable.__class__.__name__)
+
+
+def _call_checked(func: Callable, classname: str, inputs: Dict) -> Dict:
+    result = func(inputs)
+    if not isinstance(result, dict):
+        raise GraphException(f'output of {classname} must be a dict')
+
+    return result
+
+
+async def _acall_checked(func: Callable, classname: str, inputs: Dict) -> Dict:
+    result = await func(inputs)
+    if not isinstance(result, dict):
+        raise GraphException(f'output of {classname} must be a dict')
+
+    return result
@@ -1,9 +1,23 @@
-import sys
+import asyncio
+from functools import partial
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from types import SimpleNamespace
-from typing import List, Union, Any, NoReturn, Dict
+from typing import List, Union, Any, NoReturn, Dict, Optional, Callable, Iterable, Iterator, Sequence
 
-from .h1step import Node, Action
+import pandas as pd
+
+from .h1step import Node, Action, Switch, Merge
 from .h1step_containable import NodeContainable
+from .execution_plan import ExecutionPlan, paused_gc
+from .batch import coalesce
+from .checkpoint import CheckpointStore
+from .deadline import Deadline
+from .deployment import hot_swap, replace
+from .parallel import create_process_pool, execute_in_processes
+from .partitioning import execute_partitioned, is_partitionable
+from .singleflight import SingleFlight
+from .streaming import execute_stream
+from .tracing import Tracer, get_tracer
 from h1st.exceptions.exception import GraphException
 from h1st.core.viz import DotGraphVisualizer
 from h1st.trust.trustable import Trustable
@@ -17,6 +31,15 @@ class Graph(NodeContainable, Trustable):
     forming a hierarchy of Graphs
     """
 
+    # whether the nodes of the graph are inlined into the execution plan of the graphs it is a node of, instead of
+    # the graph being executed as one node. The nodes of an inlined graph are traced with their id prefixed by the
+    # id of the graph's node (e.g. features.Scale), and the nodes following the graph's node see the graph's output
+    # on top of its inputs, as when the graph is executed as one node. A graph whose node has
+    # settings of its own (transform functions, cache, deadline or resource settings), or with an end transform
+    # function, output keys, checkpoints or singleflight, or whose class defines methods other than __init__ (e.g.
+    # a train method of its own), is always executed as one node
+    inline = True
+
     def __init__(self, node_validation_schema_name='NODE_VALIDATION_SCHEMA'):
         """
         :param node_validation_schema_name: name of the variable in config.py to load schema definition fornode_validation_schema_name
@@ -31,6 +54,21 @@ class Graph(NodeContainable, Trustable):
         # map { node's id: number} to trake the used ids.
         # with number=0 if id is manual provided, number=1 if id is generated
         self._used_node_ids = {}
+        # map { class name: last number used to generate the id of a node of the class }
+        self._id_counters: Dict[str, int] = {}
+        # nodes without out-going edges by id, in the order they were added, connected to the end node by end()
+        self._leaves: Dict[str, Node] = {}
+
+        # compiled execution plan, built by compile()
+        self._plan = None
+        # the tracer of the executions with trace=True, created on first use
+        self._tracer = None
+        # the store of the outputs of the nodes, None if they are not checkpointed
+        self._checkpoints = None
+        # de-duplication of the concurrent identical executions, None if disabled
+        self.singleflight: Optional[SingleFlight] = None
+        # keys of the graph's output, all the keys if None. See end()
+        self._output_keys = None
 
     @property
     def nodes(self) -> SimpleNamespace:
@@ -40,6 +78,27 @@ class Graph(NodeContainable, Trustable):
         """
         return self._nodes
 
+    @property
+    def tracer(self) -> Tracer:
+        """The tracer recording the executions of this graph with trace=True, see execute()"""
+        if self._tracer is None:
+            self._tracer = Tracer()
+
+        return self._tracer
+
+    @property
+    def checkpoints(self) -> Optional[CheckpointStore]:
+        """
+        The store persisting the output of each node, None by default. When set, executing the graph loads the
+        output of the nodes whose code and inputs did not change instead of executing them, see CheckpointStore
+        """
+        return self._checkpoints
+
+    @checkpoints.setter
+    def checkpoints(self, value: Optional[CheckpointStore]):
+        self._checkpoints = value
+        self._plan = None
+
     def start(self) -> 'Graph':
         """
         Initial action to begin adding nodes to a (fresh) Graph. A node with the id='start' will be
@@ -51,7 +110,8 @@ class Graph(NodeContainable, Trustable):
             node: Union[Node, NodeContainable, None] = None,
             yes: Union[Node, NodeContainable, None] = None,
             no: Union[Node, NodeContainable, None] = None,
-            id: str = None
+            id: str = None,
+            cases: Optional[Dict[Any, Union[Node, NodeContainable]]] = None
             ) -> Union[Node, List[Node]]:
         """
         Adds a new Node or NodeContainable to this graph. Period keeps a running preference to the current possition in the graph to be added
@@ -62,12 +122,15 @@ class Graph(NodeContainable, Trustable):
         :param yes/no: Node or NodeContable object to be added to the graph following a conditional (Decision) node
         :param from_: the node to which the new node will be connected
         :param id: the id of the new node
+        :param cases: {edge label: Node or NodeContainable} objects to be added to the graph following a Switch node,
+            the label None being the branch for the items matching no other label
 
         :return:
             new added node if adding a single node
             Or new added node for yes branch if adding yes node only (without no node) following a condition node
             Or new added node for no branch if adding no node only (without yes node) following a condition node
             Or [new added node for yes branch, new added node for no branch] if adding both yes & no nodes following a condition node
+            Or the list of new added nodes, in the order of the cases, if adding cases following a Switch node
 
         .. code-block:: python
             :caption: Cyber Security example to handle injection and replacement attacks
@@ -96,24 +159,116 @@ class Graph(NodeContainable, Trustable):
                     self.end()
 
         """
-        return self._add_and_connect(node, yes, no, id, self._last_added_node)
+        return self._add_and_connect(node, yes, no, id, self._last_added_node, cases)
+
+    def add_many(self, branches: Iterable[Union[Node, NodeContainable, Sequence[Union[Node, NodeContainable]]]]
+                 ) -> List[Node]:
+        """
+        Adds many branches at once, all of them following the latest added node: each branch is a Node or
+        NodeContainable, or a sequence of them chained one after the other. Ids are generated as by add().
+
+        :param branches: the branches to add
+        :return: the last node of each branch
+
+        .. code-block:: python
+            :caption: Graph with one branch per asset
+
+            g = h1.Graph()
+            g.start().add(LoadReadings())
+            g.add_many([AssetFeatures(asset), AssetModel(asset)] for asset in assets)
+            g.end()
+        """
+        if hasattr(self.nodes, 'end'):
+            raise GraphException('not allow to add a node after Graph.end()')
+
+        from_ = self._last_added_node
+        last_nodes = []
+        with paused_gc():
+            for branch in branches:
+                previous = from_
+                # checking for the nodes first is much cheaper than an isinstance check against the Sequence ABC
+                for node in ((branch,) if isinstance(branch, (Node, NodeContainable)) else branch):
+                    if isinstance(node, Node) and node.id and hasattr(self.nodes, node.id):
+                        raise GraphException(f'Node id={node.id} is duplicated')
+
+                    node = self._wrap_and_add(node)
+                    self._connect_nodes(previous, node)
+                    previous = node
+
+                last_nodes.append(previous)
+
+        self._last_added_node = last_nodes[0] if len(last_nodes) == 1 else None
+
+        return last_nodes
 
-    def end(self) -> 'Graph':
+    def end(self, outputs: Optional[Iterable[str]] = None) -> 'Graph':
         """
         This method is required after adding all nodes to the graph. The end node with id='end' will be automatically added to the graph.
         All leaf nodes (without outgoing edges) will be automatically connected to the end node.
         Consolidate ids for nodes using the same NodeContainable type without provided id. Ids will be Xyz1, Xyz2, ... with class Xyz inherits from NodeContainable
+
+        :param outputs: the keys of the graph's output, all the keys output by the nodes if None. Together with the
+            keys the NodeContainables consume (NodeContainable.consumes), it lets the graph release the intermediate
+            outputs (e.g. large feature DataFrames) as soon as the last node reading them is done.
+
+        .. code-block:: python
+            :caption: Graph releasing its feature DataFrame once the model is done
+
+            class BuildFeatures(h1.NodeContainable):
+                consumes = ['df']
+
+                def predict(self, inputs):
+                    return {'features': build_features(inputs['df'])}
+
+            class MyModel(h1.Model):
+                consumes = ['features']
+
+                def predict(self, inputs):
+                    return {'risk_score': self.model.predict(inputs['features'])}
+
+            class MyGraph(h1.Graph):
+                def __init__(self):
+                    super().__init__()
+                    self.start().add(BuildFeatures()).add(MyModel())
+                    self.end(outputs=['risk_score'])
         """
+        if outputs is not None:
+            self._output_keys = list(outputs)
+
         end_node = self.add(Action(id='end'))
 
-        # connect all nodes without out-going edges to end node
-        for id, node in self.nodes.__dict__.items():
-            if not node.edges and id != end_node.id:
+        with paused_gc():
+            # connect all nodes without out-going edges to end node
+            for node in [node for id, node in self._leaves.items() if id != end_node.id]:
                 self._connect_nodes(node, end_node)
 
+            self.compile()
+
         return end_node
 
-    def execute(self, command: str, data: Union[Dict, List[Dict]]) -> Union[Dict, List[Dict]]:
+    def compile(self) -> ExecutionPlan:
+        """
+        Builds the execution plan of the graph: a flat, topologically ordered list of steps with the functions to
+        invoke for each command resolved once. Graph.end() compiles the graph, and the plan is rebuilt automatically
+        when a node's transform_input/transform_output is changed afterward.
+
+        :return: the compiled ExecutionPlan
+        """
+        self._plan = ExecutionPlan(self)
+        return self._plan
+
+    def execute(self,
+                command: str,
+                data: Union[Dict, List[Dict]],
+                executor: Optional[Executor] = None,
+                batch: bool = False,
+                workers: Union[int, ProcessPoolExecutor, None] = None,
+                loader: Optional[Callable[[], 'Graph']] = None,
+                trace: Union[bool, Tracer, None] = None,
+                outputs: Optional[Iterable[str]] = None,
+                partition: Union[bool, int] = False,
+                deadline: Union[float, Deadline, None] = None
+                ) -> Union[Dict, List[Dict]]:
         """
         The graph will scan through nodes to invoke appropriate node's function with name = value of command parameter.
         Everytime the graph invokes the appropreate function of the node, it will passing an accumulated dictionary as the input and merge result of the function into the accumulated dictionary.
@@ -122,6 +277,45 @@ class Graph(NodeContainable, Trustable):
         :param data: input data to execute.
             if data is a dictionary, the graph will execute one.
             if data is a list of dictionary, the graph will execute multiple time
+        :param executor: optional ThreadPoolExecutor/ProcessPoolExecutor to run independent branches of the graph
+            (e.g. the yes and no branches of a Decision node) concurrently. The outputs of the branches are merged in
+            the same order as in a sequential execution. With a ProcessPoolExecutor, the nodes and their inputs must
+            be picklable. A scheduling.ResourceAwareExecutor runs each node in the pool matching its resource hint
+            (NodeContainable.resource).
+        :param batch: if data is a list of dictionary, executes the graph once for all the dictionaries having the same
+            keys and only scalar values instead of once per dictionary. The nodes then receive a pandas Series of
+            the values of all the dictionaries for each key and must return Series/DataFrames/1-D arrays with one entry
+            per dictionary (any other value is the same for all the dictionaries). A Decision node must return a
+            DataFrame with one row per dictionary, its rows being routed to the yes/no branches. The outputs are
+            scattered back to one dictionary per input dictionary. Batch mode requires all NodeContainables of the
+            graph to be vectorized (NodeContainable.vectorized = True), otherwise the dictionaries are executed one
+            by one.
+        :param workers: if data is a list of dictionary, shards the list across this number of worker processes,
+            or across the workers of a pool created by Graph.process_pool() to reuse them between executions.
+            Each worker loads the graph and its models once; the order of the outputs is preserved.
+        :param loader: a picklable function returning the graph, called once by each worker (instead of receiving
+            a pickled copy of this graph), e.g. to re-load the models from the ModelRepository by version
+        :param trace: True to record the execution of each node (wall/CPU time, rows, Decision branches) into
+            Graph.tracer, or the Tracer to record it into. By default, the tracer set by tracing.set_tracer() if any,
+            False to disable it. Executions in worker processes are not traced.
+        :param outputs: the keys of the output to compute. Only the nodes needed for these keys are executed, based
+            on the keys the NodeContainables declare they consume and produce (NodeContainable.consumes/produces),
+            and the output only holds these keys. See ExecutionPlan.prune(). A key no node produces raises a
+            GraphException when all the nodes declare the keys they produce
+        :param partition: if data is a dictionary holding DataFrames, True (or the number of rows of the first
+            chunks) to split their rows into chunks and execute the graph on the chunks in parallel: in the
+            executor if given, otherwise in worker processes (see workers). The chunk size adapts to the measured
+            duration of the chunks. DataFrames, Series and 1-D arrays of the outputs of the chunks are concatenated
+            in the order of the rows of the input, any other output is taken from the first chunk. The graph is
+            executed without partitioning if one of its nodes is not row separable (NodeContainable.row_separable),
+            if its end node has a transform function of its output, or if the DataFrame has no rows
+        :param deadline: latency budget of the execution in seconds, or a Deadline to get the nodes which were
+            degraded (Deadline.degraded). Optional nodes are skipped and nodes having a fallback execute it when they
+            are not expected to complete within the remaining budget, see Deadline. For a list input, a number of
+            seconds is the budget of each item. Not supported in batch mode or with workers
+
+        When Graph.singleflight is set, concurrent executions of a dictionary input with the same command, input and
+        outputs (and no deadline) share one execution, see SingleFlight.
 
         :return:
             single dictionary if the input is a single dictionary
@@ -153,21 +347,237 @@ class Graph(NodeContainable, Trustable):
 
             g = MyGraph()
             result = g.execute(command='predict', data={'df': my_dataframe})
+
+            with ThreadPoolExecutor() as executor:
+                result = g.execute(command='predict', data={'df': my_dataframe}, executor=executor)
+
+            result = g.execute(command='predict', data={'df': my_dataframe}, trace=True)
+            g.tracer.export('my_graph.trace.json')  # to open in ui.perfetto.dev
+
+            # skips the nodes computing explanations for dashboards
+            result = g.execute(command='predict', data={'df': my_dataframe}, outputs=['risk_score'])
+
+            # runs the graph on chunks of the rows of a large DataFrame in worker processes
+            result = g.execute(command='predict', data={'df': my_large_dataframe}, partition=True)
+        """
+        tracer = self._resolve_tracer(trace)
+        if deadline is not None and (batch or workers or partition):
+            raise GraphException('deadline is not supported in batch mode, with workers or with partition')
+
+        if isinstance(data, list):
+            if workers and data:
+                return execute_in_processes(self, command, data, workers, loader, batch, outputs)
+
+            if batch:
+                return self._execute_batch(command, data, executor, tracer, outputs)
+
+            return [self._execute_one(command, item, executor, tracer, outputs, deadline) for item in data]
+
+        if partition and is_partitionable(self, data, outputs):
+            chunk_rows = partition if partition is not True else None
+            execute = partial(execute_partitioned, self, command, data, executor, workers, loader, chunk_rows, tracer,
+                              outputs)
+        else:
+            execute = partial(self._execute_one, command, data, executor, tracer, outputs, deadline)
+
+        if self.singleflight is not None and deadline is None:
+            return self.singleflight.execute(self.singleflight.key(command, data, outputs), execute)
+
+        return execute()
+
+    def execute_stream(self,
+                       command: str,
+                       data: Iterable[Union[Dict, pd.DataFrame]],
+                       executor: Optional[Executor] = None,
+                       window: Optional[int] = None,
+                       ordered: bool = True,
+                       key: str = 'df',
+                       trace: Union[bool, Tracer, None] = None
+                       ) -> Iterator[Dict]:
+        """
+        Executes the graph for each item of an iterable (records, DataFrame chunks, ...) and yields the outputs.
+        The items are pulled lazily and at most "window" of them are in flight at any time, so an input of any size
+        is processed with a bounded memory.
+
+        :param command: for Node or NodeContainable object to decide which function will be invoked during executing
+            the graph
+        :param data: iterable of input dictionaries or DataFrame chunks, a chunk being executed as {key: chunk}
+        :param executor: optional executor to execute several items concurrently, otherwise the items are executed
+            one after another
+        :param window: maximum number of items being executed at the same time with an executor,
+            twice the number of workers of the executor by default
+        :param ordered: with an executor, yields the outputs in the order of the items if True,
+            or as soon as they are done if False
+        :param key: the input key of DataFrame chunks
+        :param trace: see execute()
+
+        :return: generator of the output dictionaries
+
+        .. code-block:: python
+            :caption: Example of scoring a large parquet extract in chunks
+
+            import pyarrow.parquet as pq
+
+            chunks = (batch.to_pandas() for batch in pq.ParquetFile('extract.parquet').iter_batches())
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                for output in g.execute_stream('predict', chunks, executor=executor, window=8):
+                    write(output)
+        """
+        return execute_stream(self, command, data, executor, window, ordered, key, self._resolve_tracer(trace))
+
+    async def aexecute(self,
+                       command: str,
+                       data: Union[Dict, List[Dict]],
+                       executor: Optional[Executor] = None,
+                       trace: Union[bool, Tracer, None] = None,
+                       outputs: Optional[Iterable[str]] = None,
+                       deadline: Union[float, Deadline, None] = None
+                       ) -> Union[Dict, List[Dict]]:
+        """
+        Asynchronous version of the "execute" function to be awaited in an event loop.
+        If the NodeContainable's function for the command is a coroutine function (async def predict(...)), or if
+        the NodeContainable has a coroutine function named after the command prefixed with "a" (apredict), it is
+        awaited. Otherwise the function is run in the executor so that the event loop is never blocked.
+        Independent branches of the graph, as well as the items of a list input, are executed concurrently.
+
+        :param command: for Node or NodeContainable object to decide which function will be invoked during executing
+            the graph
+        :param data: input data to execute, a dictionary or a list of dictionary
+        :param executor: the executor running the synchronous functions, the bounded default executor of the event
+            loop if not provided
+        :param trace: see execute(), the spans of the nodes having no CPU time
+        :param outputs: the keys of the output to compute, see execute()
+        :param deadline: latency budget of the execution, see execute()
+
+        :return:
+            single dictionary if the input is a single dictionary
+            Or list of dictionary if the input is a list of dictionary
+
+        .. code-block:: python
+            :caption: Example of a NodeContainable with I/O bound work
+
+            import h1st.core as h1
+
+            class FeatureLookup(h1.NodeContainable):
+                async def predict(self, inputs):
+                    features = await feature_store.get(inputs['equipment_id'])
+                    return {'features': features}
+
+            result = await g.aexecute(command='predict', data={'equipment_id': 'eq-1'})
         """
+        tracer = self._resolve_tracer(trace)
+
         if isinstance(data, list):
-            return [self._execute_one(command, item) for item in data]
+            return list(await asyncio.gather(*[
+                self._aexecute_one(command, item, executor, tracer, outputs, deadline) for item in data
+            ]))
+
+        if self.singleflight is not None and deadline is None:
+            return await self.singleflight.aexecute(
+                self.singleflight.key(command, data, outputs),
+                partial(self._aexecute_one, command, data, executor, tracer, outputs))
 
-        return self._execute_one(command, data)
+        return await self._aexecute_one(command, data, executor, tracer, outputs, deadline)
 
     def predict(self, data) -> Any:
         """ A shortcut function for the "execute" function with command="predict" """
         return self.execute('predict', data)
 
-    def visualize(self):
-        """Visualizes the flowchart for this graph"""
-        vs = DotGraphVisualizer(self)
+    async def apredict(self, data) -> Any:
+        """ A shortcut function for the "aexecute" function with command="predict" """
+        return await self.aexecute('predict', data)
+
+    def process_pool(self,
+                     max_workers: Optional[int] = None,
+                     loader: Optional[Callable[[], 'Graph']] = None
+                     ) -> ProcessPoolExecutor:
+        """
+        Creates a process pool whose workers load this graph once, to be passed as the "workers" parameter of
+        execute() for offline scoring of many inputs.
+
+        :param max_workers: number of worker processes, the number of CPUs by default
+        :param loader: a picklable function returning the graph, called once by each worker instead of receiving a
+            pickled copy of this graph
+
+        .. code-block:: python
+            :caption: Example of scoring a large list input with models loaded by version in each worker
+
+            def load_graph():
+                g = MyGraph()
+                g.nodes.my_model._containable.load(MODEL_REPO_PATH, version='01F...')
+                return g
+
+            with g.process_pool(max_workers=8, loader=load_graph) as pool:
+                results = g.execute('predict', items, workers=pool)
+        """
+        return create_process_pool(self, max_workers, loader)
+
+    def replace(self, node_id: str, containable: NodeContainable, commands: Iterable[str] = ()) -> NodeContainable:
+        """
+        Replaces the containable of a node, e.g. by a new version of its model, while the graph is being executed.
+        The executions in flight finish with the previous containable, and the next ones execute the new one: the
+        execution plan is rebuilt with the new containable and then replaces the previous plan at once. The node's
+        cache starts empty.
+
+        :param node_id: the id of the node
+        :param containable: the new containable of the node
+        :param commands: the commands (e.g. predict) for which the functions of the nodes are resolved before the plan
+            is replaced, rather than by the first execution
+        :return: the previous containable
+        """
+        return replace(self, node_id, containable, commands)
+
+    def hot_swap(self,
+                 node_id: str,
+                 repository: 'ModelRepository',
+                 version: Optional[str] = None,
+                 sample: Optional[Dict] = None,
+                 command: str = 'predict',
+                 executor: Optional[Executor] = None
+                 ) -> Future:
+        """
+        Deploys a version of the model of a node without interrupting the executions of the graph: a copy of the
+        model is loaded with ModelRepository.load in the background, warmed up by executing the command on the
+        sample input, and replaces the node's model (see replace()). The graph keeps on executing the current model
+        until then, and keeps it if the model cannot be loaded or fails on the sample.
+
+        :param node_id: the id of the node of the model
+        :param repository: the repository of the model's versions
+        :param version: the version to load, the latest one if None
+        :param sample: input of the command warming up the new model, not warmed up if None
+        :param command: the command warming up the model and whose functions are resolved before the swap
+        :param executor: the executor loading the model, a new thread if None
+        :return: future of the version of the model once swapped
+
+        .. code-block:: python
+            :caption: Deploying the latest version of a model of a graph serving requests
+
+            g.hot_swap('ChurnModel', ModelRepository('s3://models'), sample={'df': recent_rows}).result()
+        """
+        return hot_swap(self, node_id, repository, version, sample, command, executor)
+
+    def visualize(self, annotations: Optional[Dict[str, str]] = None):
+        """
+        Visualizes the flowchart for this graph
+
+        :param annotations: {node id: text} displayed on the nodes, e.g. Tracer.annotations()
+        """
+        vs = DotGraphVisualizer(self, annotations)
         return vs
 
+    def cache_stats(self) -> pd.DataFrame:
+        """
+        Gets the statistics of the caches of the graph's nodes, see Node.cache
+
+        :return: DataFrame indexed by node_id with columns hits, misses, hit_rate, evictions, uncacheable, entries,
+            bytes
+        """
+        rows = {node.id: node.cache.stats() for node in vars(self.nodes).values() if node.cache is not None}
+        columns = ['hits', 'misses', 'hit_rate', 'evictions', 'uncacheable', 'entries', 'bytes']
+
+        return pd.DataFrame.from_dict(rows, orient='index', columns=columns).rename_axis('node_id')
+
     def describe(self):
         pass
 
@@ -183,23 +593,27 @@ class Graph(NodeContainable, Trustable):
 
         :return: the newly added node
         """
-        if not isinstance(node, (Node, NodeContainable)):
-            raise GraphException('object to add to a graph must be an instance of Node or NodeContainable')
-
         if isinstance(node, NodeContainable):
-            containable = node
-            node = Action(containable)
+            node = Action(node)
+        elif not isinstance(node, Node):
+            raise GraphException('object to add to a graph must be an instance of Node or NodeContainable')
 
-        id = id or node.id
+        # the slots of the node are set directly, as add_many() adds many nodes at once
+        id = id or node._id
         if id:  # manual provided id
             self._used_node_ids[id] = 0
         else:  # automatic id
             id = self._generate_id(node)
             self._used_node_ids[id] = 1
 
+        if node._graph is not None:
+            raise GraphException('This node belongs to another graph already')
+
         node._id = id
-        node.graph = self
+        node._graph = self
         setattr(self.nodes, id, node)
+        if not node._edges:
+            self._leaves[id] = node
 
         return node
 
@@ -214,9 +628,13 @@ class Graph(NodeContainable, Trustable):
         if classname not in self._used_node_ids:
             return classname
 
-        for i in range(2, sys.maxsize):
+        # continue from the last number used for the class, skipping the ids provided manually
+        i = self._id_counters.get(classname, 1)
+        while True:
+            i += 1
             id = f'{classname}{i}'
             if id not in self._used_node_ids:
+                self._id_counters[classname] = i
                 return id
 
     def _connect_nodes(self, from_: Node, to: Node, edge_label=None) -> NoReturn:
@@ -230,39 +648,125 @@ class Graph(NodeContainable, Trustable):
         if not from_:
             return
 
-        if edge_label not in ['yes', 'no', None]:
+        if edge_label is not None and edge_label != 'yes' and edge_label != 'no' and not isinstance(from_, Switch):
             raise GraphException(
                 f'edge_label="{edge_label}" is not supported')
 
-        from_.edges.append(
+        from_._edges.append(
             (to, edge_label)
         )
+        self._leaves.pop(from_._id, None)
+        self._plan = None
 
-    def _execute_one(self, command: str, data: Dict) -> Dict:
+    def _execute_one(self, command: str, data: Dict, executor: Optional[Executor] = None,
+                     tracer: Optional[Tracer] = None, outputs: Optional[Iterable[str]] = None,
+                     deadline: Union[float, Deadline, None] = None) -> Dict:
         """
         Executes the graph exactly 1 time
 
         :param command: for Node or NodeContainable object to decide which function will be invoked during executing the graph
         :param data: input data to execute the graph
+        :param executor: optional executor to run independent branches concurrently
+        :param tracer: optional tracer recording the execution
+        :param outputs: the keys of the output to compute, all of them if None
+        :param deadline: optional latency budget, in seconds or as a Deadline
 
         :return: result as a dictionary
         """
-        output = self.nodes.start._execute(command, data, {})
+        plan = self._get_plan(outputs)
+        output = plan.run(command, data, executor, tracer, Deadline.of(deadline))
 
         if self.nodes.end.transform_output:
             output = self.nodes.end.transform_output(output)
 
         return output
 
+    def _execute_batch(self, command: str, data: List[Dict], executor: Optional[Executor] = None,
+                       tracer: Optional[Tracer] = None, outputs: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Executes the graph once per group of compatible dictionaries of the list input
+
+        :param command: for Node or NodeContainable object to decide which function will be invoked during executing
+            the graph
+        :param data: list of input dictionaries
+        :param executor: optional executor to run independent branches concurrently
+        :param tracer: optional tracer recording the executions
+        :param outputs: the keys of the output to compute, all of them if None
+
+        :return: list of result dictionaries in the order of the input
+        """
+        plan = self._get_plan(outputs)
+        if not plan.vectorized:
+            return [self._execute_one(command, item, executor, tracer, outputs) for item in data]
+
+        results = [None] * len(data)
+
+        groups, others = coalesce(data)
+        for positions in groups.values():
+            items = [data[position] for position in positions]
+            for position, output in zip(positions, plan.run_batch(command, items, positions, executor, tracer)):
+                results[position] = output
+
+        for position in others:
+            results[position] = plan.run(command, data[position], executor, tracer)
+
+        if self.nodes.end.transform_output:
+            results = [self.nodes.end.transform_output(output) for output in results]
+
+        return results
+
+    async def _aexecute_one(self, command: str, data: Dict, executor: Optional[Executor] = None,
+                            tracer: Optional[Tracer] = None, outputs: Optional[Iterable[str]] = None,
+                            deadline: Union[float, Deadline, None] = None) -> Dict:
+        """
+        Executes the graph exactly 1 time in the running event loop
+
+        :param command: for Node or NodeContainable object to decide which function will be invoked during executing
+            the graph
+        :param data: input data to execute the graph
+        :param executor: the executor running the synchronous functions
+        :param tracer: optional tracer recording the execution
+        :param outputs: the keys of the output to compute, all of them if None
+        :param deadline: optional latency budget, in seconds or as a Deadline
+
+        :return: result as a dictionary
+        """
+        plan = self._get_plan(outputs)
+        output = await plan.arun(command, data, executor, tracer, Deadline.of(deadline))
+
+        if self.nodes.end.transform_output:
+            output = self.nodes.end.transform_output(output)
+
+        return output
+
+    def _get_plan(self, outputs: Optional[Iterable[str]] = None) -> ExecutionPlan:
+        """Gets the compiled plan, pruned to compute only the given output keys if any"""
+        plan = self._plan
+        if plan is None or plan.stale:
+            plan = self.compile()
+
+        return plan.prune(outputs) if outputs is not None else plan
+
+    def _resolve_tracer(self, trace: Union[bool, Tracer, None]) -> Optional[Tracer]:
+        """Gets the tracer of an execution from its trace parameter, see execute()"""
+        if trace is None:
+            return get_tracer()
+
+        if trace is True:
+            return self.tracer
+
+        return trace or None
+
     def _add_and_connect(self,
                          node: Union[Node, NodeContainable, None] = None,
                          yes: Union[Node, NodeContainable, None] = None,
                          no: Union[Node, NodeContainable, None] = None,
                          id: str = None,
-                         from_: Union[Node, None] = None
+                         from_: Union[Node, None] = None,
+                         cases: Optional[Dict[Any, Union[Node, NodeContainable]]] = None
                          ) -> Union[Node, List[Node]]:
         """
-        Adds node/yes/no nodes to self.nodes and connect from_node to newly added nodes
+        Adds node/yes/no/cases nodes to self.nodes and connect from_node to newly added nodes
         """
         if id == 'start' and hasattr(self.nodes, 'start'):
             raise GraphException('Graph.start() may only be called once')
@@ -282,17 +786,30 @@ class Graph(NodeContainable, Trustable):
 
         # add a single node
         if node:
-            node = self._wrap_and_add(node, id)
-            self._connect_nodes(from_, node)
+            if isinstance(node, Merge) and node.graph is self:
+                # a Merge node is added once, then connected from each of the branches it joins
+                self._connect_nodes(from_, node)
+            else:
+                node = self._wrap_and_add(node, id)
+                self._connect_nodes(from_, node)
 
             # keep reference to the latest node
             self._last_added_node = node
 
             return node
 
-        # add nodes with edge_label 'yes' / 'no'
+        # add nodes with edge_label 'yes' / 'no' or the labels of the cases
         return_nodes = []
 
+        if cases:
+            if not isinstance(from_, Switch):
+                raise GraphException('cases may only be added following a Switch node')
+
+            for label, case in cases.items():
+                node = self._wrap_and_add(case)
+                self._connect_nodes(from_, node, label)
+                return_nodes.append(node)
+
         if yes:
             node = self._wrap_and_add(yes)
             self._connect_nodes(from_, node, 'yes')
@@ -1,9 +1,11 @@
 import os
+import numpy as np
 import pandas as pd
-from typing import Union, Optional, Callable, List, NoReturn, Any, Dict, Tuple
+from typing import Union, Optional, Callable, List, NoReturn, Any, Dict, Tuple, Mapping, FrozenSet
 
 from h1st.exceptions.exception import GraphException
 from h1st.model.model import Model
+from h1st.h1flow.cache import NodeCache
 from h1st.h1flow.h1step_containable import NodeContainable
 
 
@@ -14,6 +16,9 @@ class Node:
     Base class for h1st Node
     """
 
+    __slots__ = ('_id', '_containable', '_graph', '_edges', '_transform_input', '_transform_output', '_cache',
+                 '_resource', '_max_concurrency', '_optional', '_fallback', 'rank')
+
     def __init__(self, containable: NodeContainable = None, id: str = None):
         """
         :param containable: instance of subclass of NodeContainable to attach to the node
@@ -30,6 +35,17 @@ class Node:
         self._transform_input = None
         self._transform_output = None
 
+        options = containable.cache_options if containable else None
+        self._cache = NodeCache(**options) if options is not None else None
+
+        # resource hint and concurrency limit overriding the containable's ones
+        self._resource = None
+        self._max_concurrency = None
+
+        # deadline settings, see deadline.Deadline
+        self._optional = None
+        self._fallback = None
+
         # viz attribute
         self.rank = None
 
@@ -37,6 +53,11 @@ class Node:
     def id(self) -> str:
         return self._id
 
+    @property
+    def containable(self) -> Optional[NodeContainable]:
+        """the NodeContainable attached to the node, e.g. to call its methods outside of the graph's executions"""
+        return self._containable
+
     @property
     def edges(self) -> List[Tuple['Node', str]]:
         """
@@ -50,6 +71,112 @@ class Node:
     def graph(self) -> 'Graph':
         return self._graph
 
+    @property
+    def consumes(self) -> Optional[FrozenSet[str]]:
+        """Keys of the inputs the node reads, None if it may read any key. See NodeContainable.consumes"""
+        if self._containable:
+            consumes = self._containable.consumes
+            return frozenset(consumes) if consumes is not None else None
+
+        return frozenset() if type(self).call is Node.call else None
+
+    @property
+    def produces(self) -> Optional[FrozenSet[str]]:
+        """Keys of the outputs of the node, None if unknown. See NodeContainable.produces"""
+        if self._containable:
+            produces = self._containable.produces
+            return frozenset(produces) if produces is not None else None
+
+        return frozenset() if type(self).call is Node.call else None
+
+    @property
+    def cache(self) -> Optional[NodeCache]:
+        """
+        Cache of the node's outputs by inputs, None if the node is executed every time. Created from the
+        containable's options (see cache.cached), or set on the node:
+
+        .. code-block:: python
+
+            g.nodes.BuildFeatures.cache = NodeCache(maxsize=1000, ttl=600)
+            g.nodes.BuildFeatures.cache.stats()
+        """
+        return self._cache
+
+    @cache.setter
+    def cache(self, value: Optional[NodeCache]):
+        self._cache = value
+        self._invalidate_plan()
+
+    @property
+    def resource(self) -> Optional[str]:
+        """
+        Kind of resource the node uses: 'cpu', 'io', 'gil_free' or 'inline', None if unknown.
+        Defaults to NodeContainable.resource, see scheduling.ResourceAwareExecutor
+        """
+        if self._resource is not None:
+            return self._resource
+
+        return self._containable.resource if self._containable else None
+
+    @resource.setter
+    def resource(self, value: Optional[str]):
+        if value is not None and value not in ('cpu', 'io', 'gil_free', 'inline'):
+            raise GraphException(f'unknown resource "{value}", must be one of cpu, io, gil_free or inline')
+
+        self._resource = value
+        self._invalidate_plan()
+
+    @property
+    def max_concurrency(self) -> Optional[int]:
+        """Maximum number of concurrent executions of the node, defaults to NodeContainable.max_concurrency"""
+        if self._max_concurrency is not None:
+            return self._max_concurrency
+
+        return self._containable.max_concurrency if self._containable else None
+
+    @max_concurrency.setter
+    def max_concurrency(self, value: Optional[int]):
+        self._max_concurrency = value
+        self._invalidate_plan()
+
+    @property
+    def optional(self) -> bool:
+        """
+        Whether the node is skipped when the deadline of the execution does not allow it to complete in time,
+        defaults to NodeContainable.optional. See deadline.Deadline
+        """
+        if self._optional is not None:
+            return self._optional
+
+        return self._containable.optional if self._containable else False
+
+    @optional.setter
+    def optional(self, value: bool):
+        self._optional = value
+        self._invalidate_plan()
+
+    @property
+    def fallback(self) -> Optional[NodeContainable]:
+        """
+        Faster containable executed instead of the node's one when the deadline of the execution does not allow the
+        node to complete in time, see deadline.Deadline. The node must only invoke the function of its containable
+        (it cannot be e.g. the start node or a Merge node)
+        """
+        return self._fallback
+
+    @fallback.setter
+    def fallback(self, value: Optional[NodeContainable]):
+        if value is not None and (self._containable is None or type(self).call is not Node.call):
+            raise GraphException(f'{type(self).__name__} node {self.id} cannot have a fallback')
+
+        self._fallback = value
+        self._invalidate_plan()
+
+    @property
+    def row_separable(self) -> bool:
+        """Whether the node can be executed on chunks of rows, see NodeContainable.row_separable"""
+        return self._containable.row_separable if self._containable else True
+
     @graph.setter
     def graph(self, value):
         if self.graph:
@@ -87,6 +214,7 @@ class Node:
                     return inputs
         """
         self._transform_input = value
+        self._invalidate_plan()
 
     @property
     def transform_output(self) -> Callable:
@@ -119,61 +247,21 @@ class Node:
                     }
         """
         self._transform_output = value
+        self._invalidate_plan()
 
     def add(
             self,
             node: Union['Node', NodeContainable, None] = None,
             yes: Union['Node', NodeContainable, None] = None,
             no: Union['Node', NodeContainable, None] = None,
-            id: str = None
+            id: str = None,
+            cases: Optional[Dict[Any, Union['Node', NodeContainable]]] = None
     ) -> Union['Node', List['Node']]:
         """
         The bridge function to add nodes to a graph. This will invoke the Graph.add() function and
         will then connect this node to newly added nodes.
         """
-        return self._graph._add_and_connect(node, yes, no, id, self)
-
-    def _execute(self, command: Optional[str], inputs: Dict[str, Any], state: Dict) -> Dict:
-        """
-        The execution of graph will be executed recursively. The upstream node will invoke the down stream nodes to be executed.
-        If it is the start node, this function will be invoked by the graph.
-        The containable.call() will be invoked if this node contains a NodeContainable object. Otherwise, its call() function will be invoked.
-
-        :param command: for this node to know which flow (predict, train, ...) the graph is running
-        :param inputs: the input data to execute the node. During the graph execution, output of all executed nodes will be merged into inputs
-        :param state: executing state
-        """
-        # transform input
-        if callable(self.transform_input):
-            inputs = self.transform_input(inputs)
-
-        # execute
-        node_output = self.call(command, inputs)
-
-        # transform output
-        if self.id != "end" and callable(self.transform_output):
-            node_output = self.transform_output({**inputs, **node_output})
-
-        # validate output
-        self._validate_output(node_output)
-
-        # state = state or {}
-        if node_output:
-            state.update(node_output)
-        else:
-            node_output = {}
-
-        # recursively executing downstream nodes
-        for edge in self.edges:
-            edge_data = self._get_edge_data(edge, node_output)
-
-            # data is available to execute the next node
-            if edge_data is not None:
-                next_node = edge[0]
-                next_inputs = {**inputs, **edge_data}
-                next_node._execute(command, next_inputs, state)
-
-        return {**node_output, **state}
+        return self._graph._add_and_connect(node, yes, no, id, self, cases)
 
     def call(self, command: Optional[str], inputs: Dict[str, Any]) -> Dict:
         """
@@ -203,10 +291,35 @@ class Node:
             output = self.call(command, input_data)
             return SchemaValidator().validate(output, schema)
 
+    def _invalidate_plan(self) -> NoReturn:
+        """The graph's execution plan captures the node's settings so it is rebuilt on the next execution"""
+        if self._graph:
+            self._graph._plan = None
+
     def _get_edge_data(self, edge, node_output):
         """Gets data from node's output to pass to the next node"""
         return node_output
 
+    def _route(self, node_output) -> List[Tuple[Optional[Dict], Optional[np.ndarray]]]:
+        """
+        Gets the data to pass to each next node, in the order of the edges
+
+        :return: list of (edge data or None if the next node is skipped, positions of the rows of the node's results
+            passed to the next node or None if the node does not split its results)
+        """
+        return [(self._get_edge_data(edge, node_output), None) for edge in self.edges]
+
+    def _join(self, branches: List[Tuple[Mapping, Optional[Tuple[int, np.ndarray]]]]) -> Optional[Dict]:
+        """
+        Combines the inputs a join node receives from its upstream nodes
+
+        :param branches: list of (inputs from the upstream node, origin of the inputs) in the order of the plan. The
+            origin is a tuple of (index of the Decision node step which split the results, positions of the results
+            passed to the branch), or None
+        :return: values shadowing the inputs of the upstream nodes, or None
+        """
+        return None
+
     def _validate_output(self, node_output) -> bool:
         return True
 
@@ -237,6 +350,8 @@ class Action(Node):
                 self.end()
     """
 
+    __slots__ = ()
+
     def to_dot_node(self, visitor):
         """Constructs and returns the graphviz compatible node"""
         return visitor.render_dot_action_node(self)
@@ -245,9 +360,19 @@ class Action(Node):
 class NoOp(Action):
     """A do-nothing action."""
 
+    __slots__ = ()
+
     def call(self, command, inputs):
         pass
 
+    @property
+    def consumes(self) -> Optional[FrozenSet[str]]:
+        return frozenset()
+
+    @property
+    def produces(self) -> Optional[FrozenSet[str]]:
+        return frozenset()
+
 
 class Decision(Action):
     """
@@ -302,6 +427,8 @@ class Decision(Action):
                 self.end()
     """
 
+    __slots__ = ('_result_field', '_decision_field')
+
     def __init__(self, containable: NodeContainable = None, id: str = None, result_field='results',
                  decision_field='prediction'):
         """
@@ -320,17 +447,98 @@ class Decision(Action):
 
     def _get_edge_data(self, edge, node_output):
         """splits data for yes/no path from the node's output to pass to the next node"""
+        result_field, results, partitions = self._partition(node_output)
+        return self._to_edge_data(result_field, self._take(results, partitions.get(self._branch_key(edge[1]))))
+
+    def _route(self, node_output) -> List[Tuple[Optional[Dict], Optional[np.ndarray]]]:
+        """splits the node's output into its branches at once and gives each edge its part with the part's positions"""
+        result_field, results, partitions = self._partition(node_output)
+
+        routes = []
+        for _, label in self.edges:
+            positions = partitions.get(self._branch_key(label))
+            edge_data = self._to_edge_data(result_field, self._take(results, positions))
+            routes.append((edge_data, positions if edge_data is not None else None))
+
+        return routes
+
+    @staticmethod
+    def _branch_key(label: Any) -> Any:
+        """the key of the partition of an edge label"""
+        return label == 'yes'
+
+    def _partition(self, node_output) -> Tuple[str, Any, Dict[bool, np.ndarray]]:
+        """
+        Splits the results in a single pass over the decision field
+
+        :return: tuple of (result field, results, {True: positions of the yes path, False: positions of the no path})
+        """
         result_field = self._result_field if self._result_field in node_output else next(iter(node_output))
         results = node_output[result_field]
-
         decision_field = self._decision_field
-        is_yes_edge = edge[1] == 'yes'
 
         if isinstance(results, pd.DataFrame):
-            data = results[results[decision_field] == is_yes_edge]
-        else:
-            data = [item for item in results if item[decision_field] == is_yes_edge]
+            decisions = results[decision_field]
+            if decisions.dtype == bool:
+                yes = decisions.to_numpy()
+                no = ~yes
+            else:
+                yes = (decisions == True).to_numpy()
+                no = (decisions == False).to_numpy()
+
+            return result_field, results, {True: np.flatnonzero(yes), False: np.flatnonzero(no)}
+
+        if isinstance(results, np.ndarray) and results.dtype.names:
+            # numpy structured array
+            decisions = results[decision_field]
+            return result_field, results, {
+                True: np.flatnonzero(decisions == True),
+                False: np.flatnonzero(decisions == False),
+            }
+
+        if type(results).__module__.startswith('pyarrow') and hasattr(results, 'filter'):
+            # pyarrow Table or RecordBatch, nulls go to neither path
+            import pyarrow.compute as pc
+
+            decisions = results.column(decision_field)
+            return result_field, results, {
+                True: self._mask_positions(pc.equal(decisions, True)),
+                False: self._mask_positions(pc.equal(decisions, False)),
+            }
 
+        partitions = {True: [], False: []}
+        for position, item in enumerate(results):
+            decision = item[decision_field]
+            if decision == True:
+                partitions[True].append(position)
+            elif decision == False:
+                partitions[False].append(position)
+
+        return result_field, results, {key: np.array(positions, dtype=np.intp) for key, positions in partitions.items()}
+
+    @staticmethod
+    def _mask_positions(mask) -> np.ndarray:
+        """positions of the true values of a pyarrow boolean mask, nulls being false"""
+        import pyarrow.compute as pc
+
+        return np.flatnonzero(pc.fill_null(mask, False).to_numpy(zero_copy_only=False))
+
+    @staticmethod
+    def _take(results: Any, positions: Optional[np.ndarray]) -> Any:
+        """gets the rows of the results at the given positions, DataFrames keeping their index"""
+        if positions is None:
+            return None
+
+        if isinstance(results, (pd.DataFrame, pd.Series)) or type(results).__module__.startswith('pyarrow'):
+            return results.take(positions)
+
+        if isinstance(results, np.ndarray):
+            return results[positions]
+
+        return [results[position] for position in positions]
+
+    @staticmethod
+    def _to_edge_data(result_field: str, data: Any) -> Optional[Dict]:
         return {result_field: data} if data is not None and len(data) > 0 else None
 
     def _validate_output(self, node_output) -> bool:
@@ -349,9 +557,204 @@ class Decision(Action):
                 'your_key': [{ 'prediction': True/False, ...}]
             }
         """
-        if not isinstance(node_output, dict) or (
+        if not isinstance(node_output, Mapping) or (
                 (self._result_field not in node_output) and len(node_output.keys()) != 1):
             raise GraphException(
                 f'output of {type(self._containable)} must be a dict containing "results" field or only one key')
 
         return True
+
+
+class Switch(Decision):
+    """
+    H1st multi-way conditional node. Each item of the results is routed to the branch whose edge label equals the
+    item's value of the decision_field, in a single grouping pass over the results. The branch added with the label
+    None, if any, receives the items matching no other branch.
+
+    .. code-block:: python
+        :caption: Graph routing equipments to a model per equipment class
+
+        import h1st.core as h1
+
+        class MyGraph(h1.Graph)
+            def __init__(self):
+                pump, fan, other = self.start()
+                    .add(h1.Switch(EquipmentClassifier(), decision_field='equipment_class'))
+                    .add(cases={
+                        'pump': PumpModel(),
+                        'fan': FanModel(),
+                        None: GenericModel(),
+                    })
+
+                self.end()
+    """
+
+    __slots__ = ()
+
+    def to_dot_node(self, visitor):
+        """Constructs and returns the graphviz compatible node"""
+        return visitor.render_dot_switch_node(self)
+
+    @staticmethod
+    def _branch_key(label: Any) -> Any:
+        """the partition of an edge is the one of its label"""
+        return label
+
+    def _partition(self, node_output) -> Tuple[str, Any, Dict[Any, np.ndarray]]:
+        """
+        Groups the results by the decision field in a single pass
+
+        :return: tuple of (result field, results, {edge label: positions of the results of the branch})
+        """
+        result_field = self._result_field if self._result_field in node_output else next(iter(node_output))
+        results = node_output[result_field]
+        decision_field = self._decision_field
+        labels = [label for _, label in self.edges]
+        has_default = None in labels
+
+        if isinstance(results, pd.DataFrame):
+            groups = results.groupby(decision_field, sort=False, dropna=False).indices
+            partitions = {label: groups[label] for label in labels if label in groups}
+
+            if has_default:
+                others = [positions for label, positions in groups.items() if label not in partitions]
+                partitions[None] = np.sort(np.concatenate(others)) if others else np.empty(0, dtype=np.intp)
+
+            return result_field, results, partitions
+
+        if isinstance(results, np.ndarray) and results.dtype.names:
+            # numpy structured array
+            values, groups = np.unique(results[decision_field], return_inverse=True)
+            codes = {value: code for code, value in enumerate(values.tolist())}
+            partitions = {label: np.flatnonzero(groups == codes[label]) for label in labels if label in codes}
+
+            if has_default:
+                routed = [codes[label] for label in partitions]
+                partitions[None] = np.flatnonzero(~np.isin(groups, routed))
+
+            return result_field, results, partitions
+
+        if type(results).__module__.startswith('pyarrow') and hasattr(results, 'filter'):
+            # pyarrow Table or RecordBatch, one vectorized comparison per branch
+            import pyarrow as pa
+            import pyarrow.compute as pc
+
+            decisions = results.column(decision_field)
+            routed = [label for label in labels if label is not None]
+            partitions = {label: self._mask_positions(pc.equal(decisions, label)) for label in routed}
+
+            if has_default:
+                is_routed = pc.fill_null(pc.is_in(decisions, value_set=pa.array(routed)), False)
+                partitions[None] = self._mask_positions(pc.invert(is_routed))
+
+            return result_field, results, partitions
+
+        routed = set(labels)
+        partitions = {label: [] for label in labels}
+        for position, item in enumerate(results):
+            decision = item[decision_field]
+            if decision in routed and decision is not None:
+                partitions[decision].append(position)
+            elif has_default:
+                partitions[None].append(position)
+
+        return result_field, results, {
+            label: np.array(positions, dtype=np.intp) for label, positions in partitions.items()
+        }
+
+
+class Merge(Node):
+    """
+    H1st join node recombining the branches of a Decision or Switch node. The node is added once and then connected
+    from each of the branches it joins. It runs after all of them and concatenates their values of the key, the rows
+    being put back in the order of the results of the Decision node in one pass, without sorting.
+
+    .. code-block:: python
+        :caption: Graph merging the predictions of the yes and no branches
+
+        import h1st.core as h1
+
+        class MyGraph(h1.Graph)
+            def __init__(self):
+                yes, no = self.start()
+                    .add(h1.Decision(Model1(), result_field='results'))
+                    .add(yes=Model2(), no=Model3())
+
+                merge = yes.add(h1.Merge(key='predictions'))
+                no.add(merge)
+
+                self.end()
+
+    The rows are put back in order when each branch returns one row per row it received, and all the branches come
+    from the same Decision node. Otherwise the values are concatenated in the order of the branches.
+    """
+
+    __slots__ = ('_key',)
+
+    def __init__(self, key: str = 'results', id: str = None):
+        """
+        :param key: the key of the branches' values to merge
+        :param id: the node's id
+        """
+        super().__init__(None, id)
+        self._key = key
+
+    def call(self, command: Optional[str], inputs: Dict[str, Any]) -> Dict:
+        """Outputs the merged value"""
+        return {self._key: inputs[self._key]} if self._key in inputs else {}
+
+    @property
+    def consumes(self) -> Optional[FrozenSet[str]]:
+        return frozenset([self._key])
+
+    @property
+    def produces(self) -> Optional[FrozenSet[str]]:
+        return frozenset([self._key])
+
+    def to_dot_node(self, visitor):
+        """Constructs and returns the graphviz compatible node"""
+        return visitor.render_dot_merge_node(self)
+
+    def _join(self, branches: List[Tuple[Mapping, Optional[Tuple[int, np.ndarray]]]]) -> Optional[Dict]:
+        """merges the values of the key of the branches into one"""
+        parts = [(scope[self._key], origin) for scope, origin in branches if self._key in scope]
+        if not parts:
+            return None
+
+        values = [value for value, _ in parts]
+        merged = self._concat(values)
+
+        origins = [origin for _, origin in parts]
+        if any(origin is None or origin[0] != origins[0][0] for origin in origins) or \
+                any(len(value) != len(origin[1]) for value, origin in zip(values, origins)):
+            return {self._key: merged}
+
+        positions = np.concatenate([origin[1] for origin in origins])
+        if (positions[1:] > positions[:-1]).all():
+            return {self._key: merged}
+
+        # rank of each row in the decision node's results, by scattering the rows to their positions
+        ranks = np.full(positions.max() + 1, -1, dtype=np.intp)
+        ranks[positions] = np.arange(len(positions))
+
+        return {self._key: Decision._take(merged, ranks[ranks >= 0])}
+
+    def _concat(self, values: List[Any]) -> Any:
+        if all(isinstance(value, (pd.DataFrame, pd.Series)) for value in values):
+            return pd.concat(values)
+
+        if all(isinstance(value, np.ndarray) for value in values):
+            return np.concatenate(values)
+
+        if all(type(value).__module__.startswith('pyarrow') for value in values):
+            import pyarrow as pa
+
+            return pa.concat_tables([
+                value if isinstance(value, pa.Table) else pa.Table.from_batches([value]) for value in values
+            ])
+
+        if all(isinstance(value, list) for value in values):
+            return [item for value in values for item in value]
+
+        raise GraphException(f'Merge cannot concatenate the values of "{self._key}" of types '
+                             f'{sorted({type(value).__name__ for value in values})}')
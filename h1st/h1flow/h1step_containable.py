@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Any, Dict, Optional, Sequence
 from h1st.exceptions.exception import GraphException
 from h1st.trust.trustable import Trustable
 
@@ -26,6 +26,38 @@ class NodeContainable(Trustable):
                     .end()
     """
 
+    # whether the functions of the class are vectorized, i.e. also work when each input is a pandas Series holding
+    # one value per item of a batch. See Graph.execute(..., batch=True)
+    vectorized = False
+
+    # keys of the inputs the functions of the class read, None if they may read any key. Inputs no downstream node
+    # reads are released during the execution of a graph, see Graph.end(outputs=...)
+    consumes: Optional[Sequence[str]] = None
+
+    # keys of the outputs the functions of the class return, None if unknown
+    produces: Optional[Sequence[str]] = None
+
+    # options of the cache of the outputs of the class's nodes, None if not cached. See cache.cached
+    cache_options: Optional[Dict[str, Any]] = None
+
+    # version of the code of the class, to change when code it depends on outside the class changes so that the
+    # checkpoints of its nodes are recomputed. See checkpoint.CheckpointStore
+    checkpoint_version: Optional[str] = None
+
+    # kind of resource the functions of the class use: 'cpu', 'io', 'gil_free' or 'inline', and maximum number of
+    # concurrent invocations of the functions of a node, None if unlimited. See scheduling.ResourceAwareExecutor
+    resource: Optional[str] = None
+    max_concurrency: Optional[int] = None
+
+    # whether executing the functions of the class on chunks of the rows of their inputs and concatenating the
+    # outputs gives the same result as executing them on all the rows, False e.g. for windowed aggregations.
+    # See Graph.execute(..., partition=True)
+    row_separable = True
+
+    # whether the nodes of the class may be skipped when the deadline of an execution does not allow them to
+    # complete in time, see deadline.Deadline
+    optional = False
+
     def __init__(self):
         self._node = None
 
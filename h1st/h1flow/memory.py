@@ -0,0 +1,234 @@
+import sys
+import threading
+import tracemalloc
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from h1st.h1flow.tracing import Span, Trace, Tracer
+
+# resets the peak of the traced allocations, Python 3.9+
+_reset_peak = getattr(tracemalloc, 'reset_peak', None)
+
+
+def sizeof(value: Any, sample: int = 10000) -> int:
+    """
+    Estimates the memory held by a value, in bytes. The deep memory usage of the object columns of a DataFrame or
+    Series larger than "sample" rows is extrapolated from its first rows.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        if len(value) <= sample:
+            return int(np.sum(value.memory_usage(deep=True)))
+
+        shallow = int(np.sum(value.memory_usage(deep=False)))
+        head = value.iloc[:sample]
+        extra = int(np.sum(head.memory_usage(deep=True))) - int(np.sum(head.memory_usage(deep=False)))
+
+        return shallow + extra * len(value) // sample
+
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+
+    if type(value).__module__.startswith('pyarrow') and hasattr(value, 'nbytes'):
+        return value.nbytes
+
+    return sys.getsizeof(value)
+
+
+class MemorySpan(Span):
+    """Span of a node with the memory it allocated"""
+
+    __slots__ = ('allocated', 'peak', 'output_sizes')
+
+    columns = Span.columns + ('allocated_bytes', 'peak_bytes', 'output_bytes')
+
+    def __init__(self, step: 'ExecutionStep'):
+        super().__init__(step)
+        # bytes still allocated once the node is done, and peak of the allocations during the node's execution
+        self.allocated: Optional[int] = None
+        self.peak: Optional[int] = None
+        # key of the node's output => estimated size of the value
+        self.output_sizes: Dict[str, int] = {}
+
+    def to_record(self) -> Dict[str, Any]:
+        record = super().to_record()
+        record['allocated_bytes'] = self.allocated
+        record['peak_bytes'] = self.peak
+        record['output_bytes'] = sum(self.output_sizes.values())
+
+        return record
+
+    def to_args(self) -> Dict[str, Any]:
+        args = super().to_args()
+        args['allocated_bytes'] = self.allocated
+        args['peak_bytes'] = self.peak
+        args['output_bytes'] = self.output_sizes
+
+        return args
+
+
+class MemoryTrace(Trace):
+    """Trace measuring the allocations of each node with tracemalloc"""
+
+    __slots__ = ('sample',)
+
+    span_class = MemorySpan
+
+    def __init__(self, tracer: 'MemoryProfiler', plan: 'ExecutionPlan', command: str):
+        super().__init__(tracer, plan, command)
+        # see MemoryProfiler, kept by the trace as the tracer is not sent to worker processes
+        self.sample = tracer.sample
+
+    def execute_step(self, step: 'ExecutionStep', call: Optional[Callable], inputs: Mapping) -> Tuple[Mapping, Dict]:
+        # in a worker process (e.g. with a ProcessPoolExecutor), only the step is traced
+        local = not tracemalloc.is_tracing()
+        if local:
+            tracemalloc.start()
+
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            if _reset_peak:
+                _reset_peak()
+
+            inputs, output = super().execute_step(step, call, inputs)
+
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if local:
+                tracemalloc.stop()
+
+        span = self.spans[step.index]
+        span.allocated = current - before
+        span.peak = max(peak - before, 0) if _reset_peak else None
+        if output:
+            span.output_sizes = {key: sizeof(value, self.sample) for key, value in output.items()}
+
+        return inputs, output
+
+    def finish(self, error: Optional[BaseException] = None):
+        super().finish(error)
+        self.tracer._release()
+
+
+class MemoryProfiler(Tracer):
+    """
+    Tracer also recording the memory of each node: the bytes it allocated and kept, the peak of its allocations
+    (with tracemalloc, which is only running while a profiled execution is in progress) and the size of the values of
+    its output (with DataFrame.memory_usage(deep=True)). The size of the values of the graph's output shows which
+    keys hold the most memory.
+
+    Allocations are process wide: the measures of nodes executed concurrently (with an executor) overlap, and the
+    nodes of asynchronous executions are not measured. The nodes executed in worker processes are measured there.
+
+    .. code-block:: python
+        :caption: Finding the node causing an out of memory error
+
+        from h1st.h1flow.memory import MemoryProfiler
+
+        profiler = MemoryProfiler()
+        g.execute('predict', data, trace=profiler)
+
+        profiler.report().sort_values('peak_bytes', ascending=False)
+        profiler.state_report()
+        g.visualize(annotations=profiler.annotations())
+    """
+
+    trace_class = MemoryTrace
+
+    def __init__(self, sample_rate: float = 1.0, max_traces: Optional[int] = 1000, sample: int = 10000):
+        """
+        :param sample_rate: fraction of the executions to profile
+        :param max_traces: number of most recent traces to keep, all of them if None
+        :param sample: number of rows used to estimate the deep memory usage of larger DataFrames
+        """
+        super().__init__(sample_rate, max_traces)
+        self.sample = sample
+
+        self._lock = threading.Lock()
+        self._running = 0
+        self._started = False
+
+    def __getstate__(self):
+        # sent to worker processes along with the traces of the steps they execute, the lock is not
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_running'] = 0
+        state['_started'] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def start(self, plan: 'ExecutionPlan', command: str) -> Optional[Trace]:
+        trace = super().start(plan, command)
+        if trace is not None:
+            with self._lock:
+                if not self._running and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started = True
+                self._running += 1
+
+        return trace
+
+    def report(self) -> pd.DataFrame:
+        """
+        Gets the memory of each node over all the profiled executions
+
+        :return: DataFrame indexed by node_id with columns node_type, executions, allocated_bytes (mean),
+            peak_bytes (max), output_bytes (max)
+        """
+        spans = self.to_dataframe()
+
+        return spans.groupby('node_id', sort=False).agg(
+            node_type=('node_type', 'first'),
+            executions=('trace', 'count'),
+            allocated_bytes=('allocated_bytes', 'mean'),
+            peak_bytes=('peak_bytes', 'max'),
+            output_bytes=('output_bytes', 'max'),
+        )
+
+    def state_report(self) -> pd.DataFrame:
+        """
+        Gets the keys of the graph's output (the state accumulated from the outputs of the nodes) holding the most
+        memory, a key being held by the last node which output it
+
+        :return: DataFrame with columns trace, key, node_id, bytes, sorted by decreasing bytes
+        """
+        rows = []
+        for number, trace in enumerate(list(self.traces)):
+            state = {}
+            for span in trace.spans:
+                if span is not None:
+                    for key, size in span.output_sizes.items():
+                        state[key] = (span.node_id, size)
+
+            rows.extend({'trace': number, 'key': key, 'node_id': node_id, 'bytes': size}
+                        for key, (node_id, size) in state.items())
+
+        report = pd.DataFrame(rows, columns=['trace', 'key', 'node_id', 'bytes'])
+        return report.sort_values('bytes', ascending=False, ignore_index=True)
+
+    def annotations(self) -> Dict[str, str]:
+        """Peak memory of each profiled node, to overlay on the graph's visualization"""
+        return {
+            node_id: f'peak {_format_bytes(peak)}'
+            for node_id, peak in self.report()['peak_bytes'].items() if not pd.isna(peak)
+        }
+
+    def _release(self):
+        with self._lock:
+            self._running -= 1
+            if not self._running and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+
+    return f'{size:.1f} TB'
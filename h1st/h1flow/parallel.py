@@ -0,0 +1,85 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import cloudpickle
+
+from h1st.exceptions.exception import GraphException
+
+# the graph loaded once by each worker process of a pool created by create_process_pool()
+_worker_graph = None
+
+
+def create_process_pool(graph: 'Graph',
+                        max_workers: Optional[int] = None,
+                        loader: Optional[Callable[[], 'Graph']] = None
+                        ) -> ProcessPoolExecutor:
+    """
+    Creates a process pool whose workers load the graph once when they start, so that executing a list input
+    only sends the items to the workers and not the graph and its models.
+
+    :param graph: the graph to execute in the workers, pickled (with cloudpickle) once per worker
+    :param max_workers: number of worker processes, the number of CPUs by default
+    :param loader: a picklable function returning the graph, called once in each worker instead of unpickling the
+        graph, e.g. to load the models from the ModelRepository by version
+    """
+    payload = None if loader else cloudpickle.dumps(graph)
+
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_load_graph, initargs=(payload, loader))
+
+
+def execute_in_processes(graph: 'Graph',
+                         command: str,
+                         data: List[Dict],
+                         workers,
+                         loader: Optional[Callable[[], 'Graph']] = None,
+                         batch: bool = False,
+                         outputs: Optional[Iterable[str]] = None
+                         ) -> List[Dict]:
+    """
+    Shards a list input across worker processes, preserving the order of the outputs
+
+    :param graph: the graph to execute
+    :param command: the command to execute
+    :param data: list of input dictionaries
+    :param workers: number of worker processes, or a pool created by create_process_pool()
+    :param loader: see create_process_pool()
+    :param batch: whether each worker executes its items in batch mode
+    :param outputs: the keys of the output to compute, all of them if None
+    """
+    outputs = list(outputs) if outputs is not None else None
+
+    if isinstance(workers, ProcessPoolExecutor):
+        max_workers = getattr(workers, '_max_workers', os.cpu_count() or 1)
+        return _map_chunks(workers, command, data, batch, outputs, max_workers)
+
+    workers = min(workers or os.cpu_count() or 1, len(data)) or 1
+    with create_process_pool(graph, workers, loader) as pool:
+        return _map_chunks(pool, command, data, batch, outputs, workers)
+
+
+def _map_chunks(pool: ProcessPoolExecutor, command: str, data: List[Dict], batch: bool,
+                outputs: Optional[List[str]], workers: int) -> List[Dict]:
+    # a few chunks per worker to balance the load without paying the round trip for every item
+    size = max(1, math.ceil(len(data) / (workers * 4)))
+    chunks = [data[i:i + size] for i in range(0, len(data), size)]
+
+    results = []
+    for chunk_results in pool.map(_execute_chunk, [command] * len(chunks), chunks, [batch] * len(chunks),
+                                  [outputs] * len(chunks)):
+        results.extend(chunk_results)
+
+    return results
+
+
+def _load_graph(payload: Optional[bytes], loader: Optional[Callable[[], 'Graph']]):
+    global _worker_graph
+    _worker_graph = loader() if loader else cloudpickle.loads(payload)
+
+
+def _execute_chunk(command: str, chunk: List[Dict], batch: bool, outputs: Optional[List[str]]) -> List[Dict]:
+    if _worker_graph is None:
+        raise GraphException('the process pool must be created by Graph.process_pool()')
+
+    return _worker_graph.execute(command, chunk, batch=batch, outputs=outputs)
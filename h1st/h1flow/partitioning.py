@@ -0,0 +1,153 @@
+import math
+import os
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from h1st.h1flow.batch import is_row_aligned
+from h1st.h1flow.parallel import _execute_chunk, create_process_pool
+
+# smallest number of rows of a chunk, below which the overhead of a chunk outweighs its parallelism
+MIN_CHUNK_ROWS = 1000
+# duration of a chunk the chunk size adapts to: long enough to amortize the overhead, short enough to balance
+# the load between the workers
+TARGET_CHUNK_SECONDS = 0.5
+# weight of the last chunk in the estimated number of rows processed per second
+_RATE_WEIGHT = 0.5
+
+
+def is_partitionable(graph: 'Graph', data: Dict, outputs: Optional[Iterable[str]] = None) -> bool:
+    """
+    Whether a single input can be partitioned by rows: it holds a DataFrame with rows and all the nodes to execute
+    are row separable (NodeContainable.row_separable). A transform function of the end node's output (e.g. an
+    aggregation) applies to the whole output, not to each chunk, so such a graph is not partitioned either.
+    """
+    df = next((value for value in data.values() if isinstance(value, pd.DataFrame)), None)
+    if df is None or not len(df) or graph.nodes.end.transform_output:
+        return False
+
+    plan = graph._get_plan(outputs)
+    return all(step.node.row_separable for step in plan.steps if not step.passthrough)
+
+
+def execute_partitioned(graph: 'Graph',
+                        command: str,
+                        data: Dict,
+                        executor: Optional[Executor] = None,
+                        workers: Union[int, ProcessPoolExecutor, None] = None,
+                        loader: Optional[Callable[[], 'Graph']] = None,
+                        chunk_rows: Optional[int] = None,
+                        tracer: Optional['Tracer'] = None,
+                        outputs: Optional[Iterable[str]] = None
+                        ) -> Dict:
+    """
+    Executes the graph on chunks of the rows of the input's DataFrames in parallel and reassembles the outputs.
+    See Graph.execute(..., partition=True)
+
+    :param graph: the graph to execute
+    :param command: the command to execute
+    :param data: input whose DataFrames, and Series/arrays with as many rows, are split into chunks of rows.
+        The other values are passed to every chunk
+    :param executor: executor to run the chunks in, e.g. a ThreadPoolExecutor for nodes releasing the GIL
+    :param workers: number of worker processes running the chunks if no executor is given, or a pool created by
+        Graph.process_pool(), the number of CPUs by default
+    :param loader: see Graph.process_pool()
+    :param chunk_rows: number of rows of the first chunks, the next chunks being sized from their measured duration
+    :param tracer: optional tracer recording the executions of the chunks when run by the executor
+    :param outputs: the keys of the output to compute, all of them if None
+    """
+    rows = len(next(value for value in data.values() if isinstance(value, pd.DataFrame)))
+    split = [key for key, value in data.items() if is_row_aligned(value, rows)]
+
+    if executor is not None:
+        parallelism = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+        return _execute_chunks(
+            lambda chunk: executor.submit(graph._execute_one, command, chunk, None, tracer, outputs),
+            data, split, rows, parallelism, chunk_rows)
+
+    outputs = list(outputs) if outputs is not None else None
+    if isinstance(workers, ProcessPoolExecutor):
+        parallelism = getattr(workers, '_max_workers', os.cpu_count() or 1)
+        return _execute_chunks(lambda chunk: workers.submit(_execute_chunk, command, [chunk], False, outputs),
+                               data, split, rows, parallelism, chunk_rows, unwrap=True)
+
+    parallelism = workers or os.cpu_count() or 1
+    with create_process_pool(graph, parallelism, loader) as pool:
+        return _execute_chunks(lambda chunk: pool.submit(_execute_chunk, command, [chunk], False, outputs),
+                               data, split, rows, parallelism, chunk_rows, unwrap=True)
+
+
+def concat_outputs(outputs: List[Dict]) -> Dict:
+    """
+    Reassembles the outputs of the chunks in the order of the chunks: DataFrames and Series are concatenated (so the
+    rows keep the index and order of the input), 1-D arrays too, and any other value is the one of the first chunk
+    having it. A key missing from some chunks, e.g. a Decision branch without rows in a chunk, gathers the values of
+    the other chunks.
+    """
+    keys = dict.fromkeys(key for output in outputs for key in output)
+
+    result = {}
+    for key in keys:
+        values = [output[key] for output in outputs if key in output]
+        value = values[0]
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            result[key] = pd.concat(values)
+        elif isinstance(value, np.ndarray) and value.ndim == 1:
+            result[key] = np.concatenate(values)
+        else:
+            result[key] = value
+
+    return result
+
+
+def _execute_chunks(submit: Callable, data: Dict, split: List[str], rows: int, parallelism: int,
+                    chunk_rows: Optional[int], unwrap: bool = False) -> Dict:
+    """
+    Keeps one chunk per worker in flight. The first chunks have chunk_rows rows, or a quarter of the rows per
+    worker; the next ones are sized to last TARGET_CHUNK_SECONDS from the rows processed per second so far, and
+    shrink at the end so that the workers finish at about the same time.
+    """
+    min_rows = min(chunk_rows or MIN_CHUNK_ROWS, MIN_CHUNK_ROWS)
+    size = chunk_rows or max(min_rows, math.ceil(rows / (parallelism * 4)))
+    rate = None
+
+    results = {}
+    running = {}
+    offset = 0
+    while offset < rows or running:
+        while offset < rows and len(running) < parallelism:
+            if rate is not None:
+                size = max(min_rows, int(rate * TARGET_CHUNK_SECONDS))
+            size = min(size, max(min_rows, math.ceil((rows - offset) / parallelism)))
+
+            chunk = {key: _slice(value, offset, offset + size) if key in split else value
+                     for key, value in data.items()}
+            running[submit(chunk)] = (offset, min(size, rows - offset), time.perf_counter())
+            offset += size
+
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            start, count, submitted = running.pop(future)
+            try:
+                output = future.result()
+            except BaseException:
+                for other in running:
+                    other.cancel()
+                raise
+
+            results[start] = output[0] if unwrap else output
+
+            measured = count / max(time.perf_counter() - submitted, 1e-6)
+            rate = measured if rate is None else _RATE_WEIGHT * measured + (1 - _RATE_WEIGHT) * rate
+
+    return concat_outputs([results[start] for start in sorted(results)])
+
+
+def _slice(value, start: int, stop: int):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.iloc[start:stop]
+
+    return value[start:stop]
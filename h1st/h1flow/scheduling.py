@@ -0,0 +1,204 @@
+import copy
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+import cloudpickle
+
+from h1st.h1flow.h1step import Node
+from h1st.h1flow.h1step_containable import NodeContainable
+
+# values of NodeContainable.resource
+CPU = 'cpu'
+IO = 'io'
+GIL_FREE = 'gil_free'
+INLINE = 'inline'
+
+# key of a node => (version, containable) unpickled by a worker process of ResourceAwareExecutor
+_worker_containables = {}
+
+
+class ResourceAwareExecutor(Executor):
+    """
+    Executor of the nodes of a graph dispatching each node to the pool matching its resource hint
+    (NodeContainable.resource, or Node.resource):
+
+    - "cpu": pure Python code holding the GIL, e.g. row by row logic. Its function is invoked in a process pool, only
+      receiving the inputs the node consumes (NodeContainable.consumes). The containable is pickled (with
+      cloudpickle) once and loaded once by each worker process: changes of its state, in the worker processes or
+      after its first execution, are not seen by the other side, so "cpu" suits prediction rather than training.
+      Nodes overriding call() (e.g. Decision) are run in the compute thread pool instead.
+    - "io": waiting on the network or the disk, run in a large thread pool
+    - "gil_free": computations releasing the GIL (NumPy, XGBoost, ...), run in a thread pool sized to the CPUs
+    - "inline": trivial nodes, run on the thread executing the graph to save the round trip to a pool
+
+    Nodes without a hint are run in the I/O thread pool, nodes which do nothing (start, end, ...) inline. A node with
+    a maximum concurrency (NodeContainable.max_concurrency) holds a slot of its own semaphore while its function
+    runs: the pool threads wait for a slot, which applies backpressure to the pools when the executor is shared by
+    concurrent executions of the graph.
+
+    .. code-block:: python
+        :caption: Mixing a slow lookup, a GIL bound rule engine and an XGBoost model
+
+        class FetchHistory(h1.NodeContainable):
+            resource = 'io'
+            max_concurrency = 8  # connections of the database
+
+        class ApplyRules(h1.NodeContainable):
+            resource = 'cpu'
+
+        class Score(h1.Model):
+            resource = 'gil_free'
+
+        with ResourceAwareExecutor() as executor:
+            results = [g.execute('predict', data, executor=executor) for data in requests]
+    """
+
+    def __init__(self, max_processes: Optional[int] = None, max_io_threads: Optional[int] = None,
+                 max_compute_threads: Optional[int] = None):
+        """
+        :param max_processes: number of worker processes for "cpu" nodes, the number of CPUs by default
+        :param max_io_threads: number of threads for "io" nodes and nodes without hint, 32 by default
+        :param max_compute_threads: number of threads for "gil_free" nodes, the number of CPUs by default
+        """
+        cpus = os.cpu_count() or 1
+        self.max_processes = max_processes or cpus
+
+        self._io = ThreadPoolExecutor(max_io_threads or 32, thread_name_prefix='h1st-io')
+        self._compute = ThreadPoolExecutor(max_compute_threads or cpus, thread_name_prefix='h1st-compute')
+        # created on first use, as starting processes is expensive
+        self._processes = None
+
+        # node => semaphore limiting its concurrency
+        self._semaphores: Dict[Node, threading.Semaphore] = {}
+        # node => (containable, key of the node, version of the containable, pickled containable) of the "cpu" nodes
+        self._payloads: Dict[Node, Tuple[NodeContainable, str, str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Submits a function to the I/O thread pool"""
+        return self._io.submit(fn, *args, **kwargs)
+
+    def submit_step(self, fn: Callable, step: 'ExecutionStep', call: Optional[Callable], *args) -> Future:
+        """Submits fn(step, call, *args), the execution of a step, to the pool of its node"""
+        resource = step.resource
+        if resource == INLINE or (resource is None and call is None):
+            future = Future()
+            try:
+                future.set_result(fn(step, call, *args))
+            except BaseException as e:
+                future.set_exception(e)
+
+            return future
+
+        return self.pool(step).submit(fn, step, call, *args)
+
+    def pool(self, step: 'ExecutionStep') -> ThreadPoolExecutor:
+        """Gets the thread pool running a step, which waits for the process pool for "cpu" nodes"""
+        if step.resource == GIL_FREE or (step.resource == CPU and not is_plain(step.node)):
+            return self._compute
+
+        return self._io
+
+    def bind(self, step: 'ExecutionStep', command: str, call: Optional[Callable]) -> Optional[Callable]:
+        """Wraps the function of a step to run it in the process pool and/or under its concurrency limit"""
+        if call is None:
+            return None
+
+        if step.resource == CPU and is_plain(step.node):
+            keys = sorted(step.consumes) if step.consumes is not None else None
+            call = partial(self._call_in_process, self._payload(step.node), command, keys)
+
+        if step.max_concurrency:
+            call = partial(_call_limited, self._semaphore(step), call)
+
+        return call
+
+    def shutdown(self, wait: bool = True, **kwargs):
+        self._io.shutdown(wait)
+        self._compute.shutdown(wait)
+        with self._lock:
+            if self._processes is not None:
+                self._processes.shutdown(wait)
+                self._processes = None
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            with self._lock:
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(self.max_processes)
+
+        return self._processes
+
+    def _call_in_process(self, payload: Tuple[str, str, bytes], command: str, keys: Optional[list],
+                         inputs: Mapping) -> Dict:
+        processes = self._process_pool()
+        if keys is not None:
+            inputs = {key: inputs[key] for key in keys if key in inputs}
+        else:
+            inputs = dict(inputs)
+
+        key, version, data = payload
+        output = processes.submit(_invoke, key, version, None, command, inputs).result()
+        if isinstance(output, _Missing):
+            # first execution of the node (or of its current containable) by this worker process
+            output = processes.submit(_invoke, key, version, data, command, inputs).result()
+
+        return output
+
+    def invalidate(self, node: Node):
+        """
+        Forgets the pickled containable of a node, so that the worker processes load it again on its next execution,
+        e.g. after its state changed. Replacing the containable of a node (see Graph.replace) invalidates it already.
+        """
+        with self._lock:
+            self._payloads.pop(node, None)
+
+    def _payload(self, node: Node) -> Tuple[str, str, bytes]:
+        containable = node._containable
+        with self._lock:
+            payload = self._payloads.get(node)
+            if payload is None or payload[0] is not containable:
+                # the workers replace the containable they loaded for the node when its version changes
+                pickled = copy.copy(containable)
+                pickled._node = None
+                key = payload[1] if payload is not None else uuid.uuid4().hex
+                payload = self._payloads[node] = (containable, key, uuid.uuid4().hex, cloudpickle.dumps(pickled))
+
+            return payload[1:]
+
+    def _semaphore(self, step: 'ExecutionStep') -> threading.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(step.node)
+            if semaphore is None:
+                semaphore = self._semaphores[step.node] = threading.Semaphore(step.max_concurrency)
+
+            return semaphore
+
+
+def is_plain(node: Node) -> bool:
+    """Whether the node only invokes the function of its containable"""
+    return node._containable is not None and type(node).call is Node.call
+
+
+def _call_limited(semaphore: threading.Semaphore, call: Callable, inputs: Mapping) -> Dict:
+    with semaphore:
+        return call(inputs)
+
+
+class _Missing:
+    """Returned by a worker process which did not load the containable yet"""
+
+
+def _invoke(key: str, version: str, payload: Optional[bytes], command: str, inputs: Dict) -> Dict:
+    loaded = _worker_containables.get(key)
+    if loaded is None or loaded[0] != version:
+        if payload is None:
+            return _Missing()
+
+        loaded = _worker_containables[key] = (version, cloudpickle.loads(payload))
+
+    return loaded[1].call(command, inputs)
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from h1st.h1flow.cache import Uncacheable, fingerprint
+
+
+class _Call:
+    """An in-flight execution, and its outcome once done"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    De-duplicates identical executions of a graph in flight at the same time: concurrent executions with the same
+    command and the same input (by content, see cache.fingerprint) share one execution, all the callers receiving its
+    result, or its exception. Each caller gets its own copy of the output dictionary, the values (e.g. DataFrames)
+    being shared. Inputs which cannot be fingerprinted are executed without de-duplication.
+
+    .. code-block:: python
+        :caption: Sharing the executions of identical requests of a traffic burst
+
+        g.singleflight = SingleFlight()
+
+        with ThreadPoolExecutor() as executor:
+            results = list(executor.map(g.predict, requests))
+
+        g.singleflight.stats()  # {'requests': 100, 'executions': 12, 'coalesced': 88, 'coalescing_rate': 0.88, ...}
+    """
+
+    def __init__(self):
+        # key => in-flight synchronous execution
+        self._calls: Dict[Hashable, _Call] = {}
+        # key => future of the in-flight asynchronous execution
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.executions = 0
+
+    def __getstate__(self):
+        # the executions in flight stay in this process
+        state = self.__dict__.copy()
+        state['_calls'] = {}
+        state['_futures'] = {}
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def key(self, command: str, data: Any, outputs: Optional[Any] = None) -> Optional[bytes]:
+        """Gets the key of an execution, None if its input cannot be fingerprinted"""
+        try:
+            return fingerprint((command, data, sorted(outputs) if outputs is not None else None))
+        except Uncacheable:
+            return None
+
+    def execute(self, key: Optional[Hashable], func: Callable[[], Dict]) -> Dict:
+        """
+        Executes func() unless an execution with the same key is in flight, in which case waits for its result
+
+        :param key: key of the execution, executed without de-duplication if None
+        :param func: the execution
+        """
+        if key is None:
+            self._count(leader=True)
+            return func()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count_locked(leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return dict(call.result)
+
+        try:
+            call.result = func()
+            # the followers copy the shared result, which the leader's caller may mutate meanwhile
+            return dict(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def aexecute(self, key: Optional[Hashable], func: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Asynchronous version of execute(), sharing the executions in flight in the running event loop"""
+        if key is None:
+            self._count(leader=True)
+            return await func()
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None or future.get_loop() is not loop
+            if leader:
+                future = loop.create_future()
+                self._futures.setdefault(key, future)
+            self._count_locked(leader)
+
+        if not leader:
+            # shielded so that a cancelled caller does not cancel the execution of the others
+            return dict(await asyncio.shield(future))
+
+        try:
+            result = await func()
+            future.set_result(result)
+            return dict(result)
+        except BaseException as e:
+            future.set_exception(e)
+            # retrieved, so that the loop does not log it when no other caller awaits the future
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Gets the number of requests, of executions, of requests which shared an execution and their rate"""
+        with self._lock:
+            coalesced = self.requests - self.executions
+            return {
+                'requests': self.requests,
+                'executions': self.executions,
+                'coalesced': coalesced,
+                'coalescing_rate': coalesced / self.requests if self.requests else None,
+                'in_flight': len(self._calls) + len(self._futures),
+            }
+
+    def _count(self, leader: bool):
+        with self._lock:
+            self._count_locked(leader)
+
+    def _count_locked(self, leader: bool):
+        self.requests += 1
+        if leader:
+            self.executions += 1
@@ -0,0 +1,71 @@
+import os
+from collections import deque
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+# marks the end of the input iterable
+_END = object()
+
+
+def execute_stream(graph: 'Graph',
+                   command: str,
+                   data: Iterable[Any],
+                   executor: Optional[Executor] = None,
+                   window: Optional[int] = None,
+                   ordered: bool = True,
+                   key: str = 'df',
+                   tracer: Optional['Tracer'] = None
+                   ) -> Iterator[Dict]:
+    """
+    Executes the graph for each item of an iterable, pulling the items lazily. See Graph.execute_stream()
+    """
+    items = (_to_input(item, key) for item in data)
+
+    if executor is None:
+        for item in items:
+            yield graph._execute_one(command, item, tracer=tracer)
+        return
+
+    window = window or 2 * (getattr(executor, '_max_workers', None) or os.cpu_count() or 1)
+    pending = deque() if ordered else set()
+    items = iter(items)
+
+    def fill():
+        while len(pending) < window:
+            item = next(items, _END)
+            if item is _END:
+                return
+
+            future = executor.submit(graph._execute_one, command, item, None, tracer)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+
+    try:
+        fill()
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+
+            for future in done:
+                output = future.result()
+                fill()
+                yield output
+    finally:
+        # the consumer stopped early or an execution failed
+        for future in pending:
+            future.cancel()
+
+
+def _to_input(item: Any, key: str) -> Dict:
+    """A DataFrame chunk becomes the input dictionary {key: chunk}"""
+    if isinstance(item, pd.DataFrame):
+        return {key: item}
+
+    return item
@@ -0,0 +1,301 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from h1st.h1flow.execution_context import ExecutionScope
+
+# the tracer used by the executions which are not given one, see set_tracer()
+_global_tracer = None
+
+
+class Span:
+    """Measures of the execution of one node. Times are in nanoseconds, from time.perf_counter_ns()"""
+
+    __slots__ = ('step', 'node_id', 'node_type', 'start', 'end', 'cpu', 'transform_input', 'call',
+                 'transform_output', 'rows_in', 'rows_out', 'branches', 'process', 'thread')
+
+    def __init__(self, step: 'ExecutionStep'):
+        self.step = step.index
+        self.node_id = step.id
+        self.node_type = type(step.node._containable or step.node).__name__
+        self.start = self.end = 0
+        self.cpu: Optional[int] = None
+        self.transform_input = self.call = self.transform_output = 0
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+        # edge label => number of rows routed to the branch, for Decision nodes
+        self.branches: Optional[Dict[Any, int]] = None
+        # the steps submitted to a process pool are executed in worker processes
+        self.process = os.getpid()
+        self.thread = threading.get_ident()
+
+    # columns of Tracer.to_dataframe(), see to_record()
+    columns = ('node_id', 'node_type', 'wall_ms', 'cpu_ms', 'transform_input_ms', 'call_ms', 'transform_output_ms',
+               'rows_in', 'rows_out', 'branches')
+
+    @property
+    def wall(self) -> int:
+        return self.end - self.start
+
+    def to_record(self) -> Dict[str, Any]:
+        """The span as a row of Tracer.to_dataframe(), with the times in milliseconds"""
+        return {
+            'node_id': self.node_id,
+            'node_type': self.node_type,
+            'wall_ms': self.wall / 1e6,
+            'cpu_ms': self.cpu / 1e6 if self.cpu is not None else None,
+            'transform_input_ms': self.transform_input / 1e6,
+            'call_ms': self.call / 1e6,
+            'transform_output_ms': self.transform_output / 1e6,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'branches': self.branches,
+        }
+
+    def to_args(self) -> Dict[str, Any]:
+        """The arguments of the span's Chrome trace event"""
+        args = {'node_type': self.node_type, 'rows_in': self.rows_in, 'rows_out': self.rows_out}
+        if self.cpu is not None:
+            args['cpu_ms'] = self.cpu / 1e6
+        if self.branches:
+            args['branches'] = {str(label): rows for label, rows in self.branches.items()}
+
+        return args
+
+
+class Trace:
+    """The spans of one sampled execution of a graph"""
+
+    __slots__ = ('tracer', 'command', 'start', 'end', 'spans', 'error')
+
+    span_class = Span
+
+    def __init__(self, tracer: 'Tracer', plan: 'ExecutionPlan', command: str):
+        self.tracer = tracer
+        self.command = command
+        self.start = time.perf_counter_ns()
+        self.end = 0
+        self.spans: List[Optional[Span]] = [None] * len(plan.steps)
+        self.error: Optional[str] = None
+
+    def __getstate__(self):
+        # a trace is sent to the worker processes executing its steps, the tracer and its traces stay in this process
+        return {name: getattr(self, name) for cls in type(self).__mro__ for name in getattr(cls, '__slots__', ())
+                if name != 'tracer'}
+
+    def __setstate__(self, state):
+        self.tracer = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def execute_step(self, step: 'ExecutionStep', call: Optional[Callable], inputs: Mapping) -> Tuple[Mapping, Dict]:
+        """Same as execution_plan.execute_step() while recording the span of the step"""
+        span = self.span_class(step)
+        span.rows_in = count_rows(input_values(step, inputs))
+        cpu = time.thread_time_ns()
+        span.start = time.perf_counter_ns()
+
+        if step.transform_input:
+            inputs = step.transform_input(inputs)
+            span.transform_input = time.perf_counter_ns() - span.start
+
+        started = time.perf_counter_ns()
+        output = call(inputs) if call else {}
+        span.call = time.perf_counter_ns() - started
+
+        if step.transform_output:
+            started = time.perf_counter_ns()
+            output = step.transform_output(ExecutionScope.of(inputs).child(output))
+            span.transform_output = time.perf_counter_ns() - started
+
+        if step.validate:
+            step.validate(output)
+
+        span.end = time.perf_counter_ns()
+        span.cpu = time.thread_time_ns() - cpu
+        span.rows_out = count_rows(output.values()) if output else None
+        self.spans[step.index] = span
+
+        return inputs, output
+
+    def route(self, step: 'ExecutionStep', routes: Iterable[Tuple[Optional[Mapping], Optional[np.ndarray]]]):
+        """Records the number of rows routed to each branch of a Decision node"""
+        span = self.spans[step.index]
+        if span is None:
+            return
+
+        branches = {
+            label: len(positions)
+            for (_, label), (_, positions) in zip(step.children, routes) if positions is not None
+        }
+        if branches:
+            span.branches = branches
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.end = time.perf_counter_ns()
+        if error is not None:
+            self.error = f'{type(error).__name__}: {error}'
+
+        self.tracer.traces.append(self)
+
+
+class Tracer:
+    """
+    Records the execution of the nodes of graphs: wall and CPU time, time spent in transform_input/transform_output,
+    number of input/output rows and number of rows routed to each branch of the Decision nodes. The traces can be
+    exported as Chrome trace JSON, to be opened in Perfetto (ui.perfetto.dev) or chrome://tracing.
+
+    Only a sample of the executions are traced, the other ones running without any instrumentation, so a tracer with
+    a low sample rate can be left on in production.
+
+    .. code-block:: python
+        :caption: Tracing 1% of the executions of all graphs
+
+        from h1st.h1flow.tracing import Tracer, set_tracer
+
+        tracer = Tracer(sample_rate=0.01)
+        set_tracer(tracer)
+        ...
+        tracer.export('graph.trace.json')
+    """
+
+    trace_class = Trace
+
+    def __init__(self, sample_rate: float = 1.0, max_traces: Optional[int] = 1000):
+        """
+        :param sample_rate: fraction of the executions to trace
+        :param max_traces: number of most recent traces to keep, all of them if None
+        """
+        self.sample_rate = sample_rate
+        self.traces = deque(maxlen=max_traces)
+
+    def start(self, plan: 'ExecutionPlan', command: str) -> Optional[Trace]:
+        """Starts the trace of an execution, or returns None if the execution is not sampled"""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+
+        return self.trace_class(self, plan, command)
+
+    def clear(self):
+        self.traces.clear()
+
+    def to_chrome_trace(self) -> Dict:
+        """
+        Converts the traces to the Chrome trace event format: one complete event per execution and per node, with
+        nested events for transform_input/transform_output
+
+        :return: the JSON object format, i.e. {'traceEvents': [...], 'displayTimeUnit': 'ms'}
+        """
+        pid = os.getpid()
+        events = []
+
+        for trace in list(self.traces):
+            executed = [span for span in trace.spans if span is not None]
+            events.append({
+                'name': f'execute {trace.command}', 'cat': 'graph', 'ph': 'X',
+                'ts': trace.start / 1000, 'dur': (trace.end - trace.start) / 1000,
+                'pid': pid, 'tid': executed[0].thread if executed else threading.get_ident(),
+                'args': {'error': trace.error} if trace.error else {},
+            })
+
+            for span in executed:
+                events.append({
+                    'name': span.node_id, 'cat': 'node', 'ph': 'X',
+                    'ts': span.start / 1000, 'dur': span.wall / 1000,
+                    'pid': span.process, 'tid': span.thread, 'args': span.to_args(),
+                })
+
+                if span.transform_input:
+                    events.append({
+                        'name': 'transform_input', 'cat': 'transform', 'ph': 'X',
+                        'ts': span.start / 1000, 'dur': span.transform_input / 1000, 'pid': span.process,
+                        'tid': span.thread,
+                    })
+
+                if span.transform_output:
+                    events.append({
+                        'name': 'transform_output', 'cat': 'transform', 'ph': 'X',
+                        'ts': (span.end - span.transform_output) / 1000, 'dur': span.transform_output / 1000,
+                        'pid': span.process, 'tid': span.thread,
+                    })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: str):
+        """Writes the traces to a Chrome trace JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Gets one row per traced node execution, with the times in milliseconds
+
+        :return: DataFrame with columns trace, node_id, node_type, wall_ms, cpu_ms, transform_input_ms, call_ms,
+            transform_output_ms, rows_in, rows_out, branches
+        """
+        rows = []
+        for number, trace in enumerate(list(self.traces)):
+            for span in trace.spans:
+                if span is not None:
+                    rows.append({'trace': number, **span.to_record()})
+
+        return pd.DataFrame(rows, columns=['trace', *self.trace_class.span_class.columns])
+
+    def annotations(self) -> Dict[str, str]:
+        """
+        Mean wall time of each traced node, to overlay on the graph's visualization. The node of an inlined graph
+        (see Graph.inline) is annotated with the total wall time of the graph's nodes.
+
+        .. code-block:: python
+
+            g.visualize(annotations=tracer.annotations())
+        """
+        spans = self.to_dataframe()
+        wall = spans.groupby('node_id', sort=False)['wall_ms'].mean()
+        annotations = {node_id: f'{ms:.2f} ms' for node_id, ms in wall.items()}
+
+        inlined = spans[spans['node_id'].str.contains('.', regex=False)]
+        if not inlined.empty:
+            graph_node_id = inlined['node_id'].str.split('.', n=1).str[0]
+            totals = inlined.groupby(['trace', graph_node_id], sort=False)['wall_ms'].sum()
+            for node_id, ms in totals.groupby(level=1, sort=False).mean().items():
+                annotations[node_id] = f'{ms:.2f} ms'
+
+        return annotations
+
+
+def set_tracer(tracer: Optional[Tracer]):
+    """Sets the tracer of all executions not given a tracer explicitly, None to disable it"""
+    global _global_tracer
+    _global_tracer = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _global_tracer
+
+
+def input_values(step: 'ExecutionStep', inputs: Mapping) -> Iterable[Any]:
+    """The values of the inputs the step reads"""
+    if step.consumes is None:
+        return inputs.values()
+
+    return (inputs[key] for key in step.consumes if key in inputs)
+
+
+def count_rows(values: Iterable[Any]) -> Optional[int]:
+    """The number of rows of the largest collection (DataFrame, Series, array, list, Arrow table) among values"""
+    rows = None
+    for value in values:
+        if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray, list)) or \
+                (type(value).__module__.startswith('pyarrow') and hasattr(value, 'num_rows')):
+            size = len(value) if getattr(value, 'ndim', 1) else 1
+            rows = size if rows is None else max(rows, size)
+
+    return rows
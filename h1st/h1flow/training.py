@@ -0,0 +1,162 @@
+import copy
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from functools import partial
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+import cloudpickle
+import pandas as pd
+import pyarrow as pa
+
+from h1st.h1flow.scheduling import ResourceAwareExecutor, is_plain
+from h1st.model.model import Model
+from h1st.model.repository.model_repository import ModelRepository
+
+# the frames memory-mapped by a worker process of ParallelTrainer, by path of their Arrow file
+_worker_frames: Dict[str, Any] = {}
+
+
+class ParallelTrainer(ResourceAwareExecutor):
+    """
+    Executor training the Model nodes of a graph in worker processes, to pass to Graph.execute('train', ...).
+    Training nodes which do not depend on each other, e.g. several models trained on the same data, are trained
+    at the same time, and the other nodes are executed as by ResourceAwareExecutor.
+
+    The DataFrames and Series of the inputs of the models are written once to Arrow IPC files which the workers
+    memory-map, so the training frame is shared through the page cache rather than pickled to every worker. Each
+    model is pickled (with cloudpickle) to the worker training it, persisted to the ModelRepository by the worker as
+    soon as it is trained, and its trained state is copied back into the graph's model.
+
+    .. code-block:: python
+        :caption: Training the models of a graph on 4 processes
+
+        with ParallelTrainer(ModelRepository('/data/models'), max_processes=4) as trainer:
+            g.execute('train', {'df': df}, executor=trainer)
+
+        trainer.versions  # {'ChurnModel': '01GB...', 'UpsellModel': '01GB...'}
+    """
+
+    def __init__(self, repository: Optional[ModelRepository] = None, max_processes: Optional[int] = None,
+                 command: str = 'train', **kwargs):
+        """
+        :param repository: the repository persisting the trained models, the models are not persisted if None
+        :param max_processes: number of worker processes, the number of CPUs by default
+        :param command: the training command, the nodes executing another command are executed as by
+            ResourceAwareExecutor
+        :param kwargs: the other arguments of ResourceAwareExecutor
+        """
+        super().__init__(max_processes, **kwargs)
+        self.repository = repository
+        self.command = command
+
+        # step id => version of the model persisted by its last training
+        self.versions: Dict[str, str] = {}
+
+        # directory of the Arrow files of the shared frames, created on first use
+        self._directory: Optional[str] = None
+        # id of a frame => (the frame, (path of its Arrow file, whether it is a Series, name of the Series))
+        self._frames: Dict[int, Tuple[Any, Tuple[str, bool, Any]]] = {}
+        self._frames_lock = threading.Lock()
+
+    def bind(self, step: 'ExecutionStep', command: str, call: Optional[Callable]) -> Optional[Callable]:
+        """Wraps the training function of the Model nodes to train them in the process pool"""
+        if call is None or command != self.command or not is_plain(step.node) \
+                or not isinstance(step.node._containable, Model):
+            return super().bind(step, command, call)
+
+        keys = sorted(step.consumes) if step.consumes is not None else None
+        return partial(self._train_in_process, step, command, keys)
+
+    def shutdown(self, wait: bool = True, **kwargs):
+        super().shutdown(wait, **kwargs)
+        with self._frames_lock:
+            self._frames = {}
+            if self._directory is not None:
+                shutil.rmtree(self._directory, ignore_errors=True)
+                self._directory = None
+
+    def _train_in_process(self, step: 'ExecutionStep', command: str, keys: Optional[list], inputs: Mapping) -> Dict:
+        if keys is not None:
+            inputs = {key: inputs[key] for key in keys if key in inputs}
+        else:
+            inputs = dict(inputs)
+
+        # the frames are sent as the paths of their Arrow files
+        frames = {}
+        for key, value in list(inputs.items()):
+            if isinstance(value, (pd.DataFrame, pd.Series)):
+                shared = self._share(value)
+                if shared is not None:
+                    frames[key] = shared
+                    del inputs[key]
+
+        model = step.node._containable
+        payload = copy.copy(model)
+        payload._node = None
+
+        output, state, version = self._process_pool().submit(
+            _train, cloudpickle.dumps(payload), command, inputs, frames, self.repository).result()
+
+        vars(model).update(state)
+        if version is not None:
+            self.versions[step.id] = version
+
+        return output
+
+    def _share(self, value) -> Optional[Tuple[str, bool, Any]]:
+        """
+        Writes a frame to an Arrow file once
+
+        :return: tuple of (path of the file, whether the frame is a Series, name of the Series), None if Arrow does
+            not support the frame
+        """
+        with self._frames_lock:
+            shared = self._frames.get(id(value))
+            if shared is not None:
+                return shared[1]
+
+            if self._directory is None:
+                self._directory = tempfile.mkdtemp(prefix='h1st-train-')
+
+            series = isinstance(value, pd.Series)
+            frame = value.to_frame(name='values') if series else value
+            path = os.path.join(self._directory, f'{uuid.uuid4().hex}.arrow')
+            try:
+                table = pa.Table.from_pandas(frame)
+                with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            except (pa.ArrowException, TypeError, ValueError):
+                # e.g. mixed object columns, pickled instead
+                return None
+
+            # the frame is kept so that its id is not reused by another frame
+            shared = (path, series, value.name if series else None)
+            self._frames[id(value)] = (value, shared)
+            return shared
+
+
+def _read_frame(path: str, series: bool, name: Any):
+    """Memory-maps the Arrow file of a frame, once per worker process"""
+    frame = _worker_frames.get(path)
+    if frame is None:
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        frame = _worker_frames[path] = table.to_pandas(split_blocks=True)
+
+    # each model gets its own frame object over the shared data
+    return frame.iloc[:, 0].rename(name) if series else frame.copy(deep=False)
+
+
+def _train(payload: bytes, command: str, inputs: Dict, frames: Dict[str, Tuple[str, bool, Any]],
+           repository: Optional[ModelRepository]) -> Tuple[Dict, Dict, Optional[str]]:
+    """Trains a model in a worker process and persists it, returning its output, its state and its version"""
+    model = cloudpickle.loads(payload)
+    for key, shared in frames.items():
+        inputs[key] = _read_frame(*shared)
+
+    output = model.call(command, inputs)
+    version = repository.persist(model) if repository is not None else None
+
+    return output, {name: value for name, value in vars(model).items() if name != '_node'}, version
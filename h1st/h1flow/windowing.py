@@ -0,0 +1,358 @@
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from h1st.exceptions.exception import GraphException
+from h1st.h1flow.h1step_containable import NodeContainable
+
+AGGREGATIONS = ('count', 'sum', 'mean', 'min', 'max')
+
+
+class Window(NodeContainable):
+    """
+    Node aggregating a time series over tumbling, sliding or session windows, for the DataFrame chunks of
+    Graph.execute_stream(). The aggregates of the windows still open at the end of a chunk are kept and completed
+    by the next chunks, so each chunk costs O(its rows) whatever the size of the windows, and the output of a chunk
+    holds the windows it closed, one row per window.
+
+    - tumbling windows (size): consecutive windows [start, start + size)
+    - sliding windows (size, slide): windows [start, start + size) starting every "slide", size being a multiple
+      of slide. The rows are aggregated per pane of "slide" width and the windows combine the sums and counts of
+      their panes incrementally, and their minimums and maximums with monotonic deques
+    - session windows (gap): windows of consecutive rows less than "gap" apart, ending "gap" after their last row
+
+    The chunks must be executed one after another in the order of the time, i.e. Graph.execute_stream() without
+    executor, with the rows of each chunk in the order of the time. The rows arriving after their window is closed
+    are aggregated in the oldest open window.
+
+    .. code-block:: python
+        :caption: Counting the events per 5 minutes every minute
+
+        g = Graph()
+        g.start().add(Window(['bytes'], size='5min', slide='1min', time='timestamp')).add(DetectAnomalies())
+        g.end()
+
+        for output in g.execute_stream('predict', chunks):
+            alert(output)
+
+        g.nodes.Window.containable.flush()  # the windows still open at the end of the stream
+    """
+
+    row_separable = False
+
+    def __init__(self, columns: Sequence[str], size: Any = None, slide: Any = None, gap: Any = None,
+                 time: Optional[str] = None, aggregations: Sequence[str] = AGGREGATIONS,
+                 key: str = 'df', output: str = 'windows'):
+        """
+        :param columns: the numeric columns to aggregate
+        :param size: the size of tumbling and sliding windows, a number or, for datetime times, a Timedelta or a
+            string such as '5min'
+        :param slide: the interval between the starts of sliding windows, "size" for tumbling windows
+        :param gap: the maximum interval between the rows of a session window
+        :param time: the column of the time of the rows, the index if None
+        :param aggregations: the aggregations of the columns among 'count', 'sum', 'mean', 'min' and 'max', the
+            output has a column "<column>_<aggregation>" per column and aggregation
+        :param key: the input key of the chunks
+        :param output: the output key of the DataFrame of the closed windows
+        """
+        super().__init__()
+        if (size is None) == (gap is None):
+            raise GraphException('Window needs either a size (tumbling and sliding windows) or a gap (session windows)')
+        if size is None and slide is not None:
+            raise GraphException('session windows do not slide')
+
+        unknown = [name for name in aggregations if name not in AGGREGATIONS]
+        if unknown:
+            raise GraphException(f'unknown aggregations {unknown}, must be among {list(AGGREGATIONS)}')
+
+        self.columns = list(columns)
+        self.size = size
+        self.slide = slide if slide is not None else size
+        self.gap = gap
+        self.time = time
+        self.aggregations = list(aggregations)
+        self.key = key
+        self.output = output
+
+        self.consumes = [key]
+        self.produces = [output]
+
+        self.reset()
+
+    def reset(self):
+        """Forgets the open windows, to aggregate another stream"""
+        # tz of datetime times, None for numeric times, set by the first chunk
+        self._tz: Any = None
+        self._datetime: Optional[bool] = None
+        # the size, slide and gap in the unit of the times
+        self._size = self._slide = self._gap = None
+
+        # tumbling and sliding windows: the open pane (id, sums, counts, minimums, maximums) and the aggregates of
+        # the last closed panes
+        self._pane: Optional[Tuple] = None
+        self._panes = _Panes(len(self.columns), 1)
+
+        # session windows: the open session (first time, last time, sums, counts, minimums, maximums)
+        self._session: Optional[Tuple] = None
+
+    def predict(self, inputs: Dict) -> Dict:
+        return {self.output: self.update(inputs[self.key])}
+
+    def update(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Aggregates the next chunk of the stream and returns the windows it closed"""
+        times = self._times(chunk)
+        values = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        if self.gap is not None:
+            return self._to_frame(self._update_sessions(times, values))
+
+        return self._to_frame(self._update_panes(times, values))
+
+    def flush(self) -> pd.DataFrame:
+        """Closes and returns the open windows, at the end of the stream"""
+        windows = []
+        if self.gap is not None:
+            if self._session is not None:
+                windows.append(self._session_window(self._session))
+                self._session = None
+        elif self._pane is not None:
+            pane_id = self._pane[0]
+            windows.extend(self._close_pane(self._pane))
+            # the next windows still holding the last panes
+            for next_id in range(pane_id + 1, pane_id + self._panes.length):
+                windows.extend(self._panes.advance(next_id, self._slide))
+            self._pane = None
+            self._panes = _Panes(len(self.columns), self._panes.length)
+
+        return self._to_frame(windows)
+
+    def _times(self, chunk: pd.DataFrame) -> np.ndarray:
+        """The times of the rows as numbers, nanoseconds for datetimes"""
+        times = chunk.index if self.time is None else chunk[self.time]
+
+        if self._datetime is None:
+            self._datetime = pd.api.types.is_datetime64_any_dtype(times)
+            self._tz = getattr(times.dt if isinstance(times, pd.Series) else times, 'tz', None) \
+                if self._datetime else None
+            self._size, self._slide, self._gap = (self._to_number(value) for value in (self.size, self.slide, self.gap))
+
+            if self._size is not None:
+                if self._size <= 0 or self._slide <= 0 or self._size % self._slide:
+                    raise GraphException(f'the size of the windows {self.size} must be a positive multiple of '
+                                         f'their slide {self.slide}')
+                self._panes = _Panes(len(self.columns), int(self._size // self._slide))
+
+        if self._datetime:
+            times = pd.DatetimeIndex(times)
+            if times.tz is not None:
+                times = times.tz_convert(None)
+            return times.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+        return np.asarray(times)
+
+    def _to_number(self, value: Any) -> Any:
+        if value is None or not self._datetime:
+            return value
+
+        return pd.Timedelta(value).value
+
+    def _to_time(self, values: List) -> Any:
+        if not self._datetime:
+            return values
+
+        times = pd.to_datetime(np.asarray(values, dtype=np.int64), utc=self._tz is not None)
+        return times.tz_convert(self._tz) if self._tz is not None else times
+
+    def _update_panes(self, times: np.ndarray, values: np.ndarray) -> List[Tuple]:
+        if not len(times):
+            return []
+
+        pane_ids = np.floor_divide(times, self._slide).astype(np.int64)
+        if self._pane is not None:
+            # late rows
+            pane_ids = np.maximum(pane_ids, self._pane[0])
+
+        ids, sums, counts, minimums, maximums = _aggregate(pane_ids, values)
+
+        if self._pane is not None:
+            if ids[0] == self._pane[0]:
+                sums[0] += self._pane[1]
+                counts[0] += self._pane[2]
+                minimums[0] = np.fmin(minimums[0], self._pane[3])
+                maximums[0] = np.fmax(maximums[0], self._pane[4])
+                pending = []
+            else:
+                pending = [self._pane]
+        else:
+            pending = []
+
+        pending.extend(zip(ids[:-1], sums[:-1], counts[:-1], minimums[:-1], maximums[:-1]))
+        self._pane = (ids[-1], sums[-1], counts[-1], minimums[-1], maximums[-1])
+
+        windows = []
+        for pane in pending:
+            windows.extend(self._close_pane(pane))
+
+        return windows
+
+    def _close_pane(self, pane: Tuple) -> List[Tuple]:
+        """Adds a closed pane to the sliding windows and returns the windows ending up to it"""
+        windows = []
+
+        # the windows between two panes still holding the previous panes
+        last_id = self._panes.last_id
+        if last_id is not None:
+            for next_id in range(last_id + 1, min(pane[0], last_id + self._panes.length)):
+                windows.extend(self._panes.advance(next_id, self._slide))
+
+        windows.extend(self._panes.push(*pane, self._slide))
+        return windows
+
+    def _update_sessions(self, times: np.ndarray, values: np.ndarray) -> List[Tuple]:
+        if not len(times):
+            return []
+
+        if self._session is not None:
+            # late rows
+            times = np.maximum(times, self._session[1])
+
+        starts = np.empty(len(times), dtype=bool)
+        starts[0] = self._session is None or times[0] - self._session[1] >= self._gap
+        np.greater_equal(np.diff(times), self._gap, out=starts[1:])
+        session_ids = np.cumsum(starts)
+
+        ids, sums, counts, minimums, maximums = _aggregate(session_ids, values)
+        boundaries = np.flatnonzero(np.diff(session_ids, prepend=-1))
+        firsts = times[boundaries]
+        lasts = np.append(times[boundaries[1:] - 1], times[-1])
+
+        windows = []
+        if self._session is not None:
+            if starts[0]:
+                windows.append(self._session_window(self._session))
+            else:
+                firsts[0] = self._session[0]
+                sums[0] += self._session[2]
+                counts[0] += self._session[3]
+                minimums[0] = np.fmin(minimums[0], self._session[4])
+                maximums[0] = np.fmax(maximums[0], self._session[5])
+
+        windows.extend(self._session_window(session) for session in
+                       zip(firsts[:-1], lasts[:-1], sums[:-1], counts[:-1], minimums[:-1], maximums[:-1]))
+        self._session = (firsts[-1], lasts[-1], sums[-1], counts[-1], minimums[-1], maximums[-1])
+
+        return windows
+
+    def _session_window(self, session: Tuple) -> Tuple:
+        first, last, sums, counts, minimums, maximums = session
+        return first, last + self._gap, sums, counts, minimums, maximums
+
+    def _to_frame(self, windows: List[Tuple]) -> pd.DataFrame:
+        """The DataFrame of windows (start, end, sums, counts, minimums, maximums)"""
+        n = len(self.columns)
+        if windows:
+            starts, ends, sums, counts, minimums, maximums = zip(*windows)
+            sums, counts, minimums, maximums = (np.vstack(values) for values in (sums, counts, minimums, maximums))
+        else:
+            starts = ends = []
+            sums = minimums = maximums = np.empty((0, n))
+            counts = np.empty((0, n), dtype=np.int64)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            aggregates = {
+                'count': counts,
+                'sum': sums,
+                'mean': np.where(counts > 0, sums / np.maximum(counts, 1), np.nan),
+                'min': minimums,
+                'max': maximums,
+            }
+
+        frame = {'window_start': self._to_time(list(starts)), 'window_end': self._to_time(list(ends))}
+        for i, column in enumerate(self.columns):
+            for name in self.aggregations:
+                frame[f'{column}_{name}'] = aggregates[name][:, i]
+
+        return pd.DataFrame(frame)
+
+
+class _Panes:
+    """
+    Aggregates of the last panes of the sliding windows: running sums and counts, and monotonic deques of the
+    minimums and maximums so that the minimum and maximum of a window are the heads of the deques
+    """
+
+    def __init__(self, columns: int, length: int):
+        # number of panes per window
+        self.length = length
+        self.last_id: Optional[int] = None
+
+        self._panes = deque()
+        self._sums = np.zeros(columns)
+        self._counts = np.zeros(columns, dtype=np.int64)
+        # per column, deque of (pane id, value) of increasing minimums and decreasing maximums
+        self._minimums = [deque() for _ in range(columns)]
+        self._maximums = [deque() for _ in range(columns)]
+
+    def push(self, pane_id: int, sums: np.ndarray, counts: np.ndarray, minimums: np.ndarray, maximums: np.ndarray,
+             slide: Any) -> List[Tuple]:
+        """Adds a closed pane and returns the window ending with it"""
+        self._expire(pane_id)
+
+        self._panes.append((pane_id, sums, counts))
+        self._sums += sums
+        self._counts += counts
+
+        for values, minimum in zip(self._minimums, minimums):
+            if minimum == minimum:
+                while values and values[-1][1] >= minimum:
+                    values.pop()
+                values.append((pane_id, minimum))
+
+        for values, maximum in zip(self._maximums, maximums):
+            if maximum == maximum:
+                while values and values[-1][1] <= maximum:
+                    values.pop()
+                values.append((pane_id, maximum))
+
+        self.last_id = pane_id
+        return [self._window(pane_id, slide)]
+
+    def advance(self, pane_id: int, slide: Any) -> List[Tuple]:
+        """Skips an empty pane and returns the window ending with it if it holds rows"""
+        self._expire(pane_id)
+        self.last_id = pane_id
+        return [self._window(pane_id, slide)] if self._panes else []
+
+    def _expire(self, pane_id: int):
+        """Removes the panes out of the window ending with the given pane"""
+        oldest = pane_id - self.length
+        while self._panes and self._panes[0][0] <= oldest:
+            _, sums, counts = self._panes.popleft()
+            self._sums -= sums
+            self._counts -= counts
+
+        for values in self._minimums + self._maximums:
+            while values and values[0][0] <= oldest:
+                values.popleft()
+
+        if not self._panes:
+            # no rounding errors accumulating across empty windows
+            self._sums[:] = 0
+
+    def _window(self, pane_id: int, slide: Any) -> Tuple:
+        end = (pane_id + 1) * slide
+        return (end - self.length * slide, end, self._sums.copy(), self._counts.copy(),
+                np.array([values[0][1] if values else np.nan for values in self._minimums]),
+                np.array([values[0][1] if values else np.nan for values in self._maximums]))
+
+
+def _aggregate(group_ids: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """The sums, counts, minimums and maximums of the values per group, the groups being sorted"""
+    grouped = pd.DataFrame(values).groupby(group_ids, sort=True)
+    sums = grouped.sum()
+
+    # writable copies, the open window being merged into the first group of the next chunk
+    return (sums.index.to_numpy(), np.array(sums, dtype=np.float64), np.array(grouped.count(), dtype=np.int64),
+            np.array(grouped.min(), dtype=np.float64), np.array(grouped.max(), dtype=np.float64))
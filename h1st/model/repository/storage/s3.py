@@ -92,6 +92,17 @@ class S3Storage(Storage):
         except FileNotFoundError:
             pass
 
+    def delete_namespace(self, namespace: str) -> NoReturn:
+        """
+        Delete all the objects of a namespace
+        """
+        if not namespace:
+            return
+
+        key = self._to_key(namespace)
+        if self.fs.exists(key):
+            self.fs.rm(key, recursive=True)
+
     def _to_key(self, key):
         """
         Convert a key to s3 object key with bucket and prefix
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable, Decision
+
+
+class Split(NodeContainable):
+    def predict(self, inputs):
+        return {'results': [{'value': value, 'prediction': value > 0} for value in inputs['values']]}
+
+
+class AsyncExecutionTestCase(IsolatedAsyncioTestCase):
+    async def test_async_branches_run_concurrently(self):
+        started = []
+        both_started = asyncio.Event()
+
+        class Lookup(NodeContainable):
+            def __init__(self, key):
+                super().__init__()
+                self.key = key
+
+            async def predict(self, inputs):
+                started.append(self.key)
+                if len(started) == 2:
+                    both_started.set()
+
+                # would time out if the branches were awaited one after another
+                await asyncio.wait_for(both_started.wait(), timeout=5)
+                return {self.key: sum(item['value'] for item in inputs['results'])}
+
+        g = Graph()
+        g.start().add(Decision(Split())).add(yes=Lookup('positive'), no=Lookup('negative'))
+        g.end()
+
+        result = await g.apredict({'values': [1, -2, 3]})
+        self.assertEqual((result['positive'], result['negative']), (4, -2))
+
+    async def test_sync_nodes_run_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+
+        class Blocking(NodeContainable):
+            def predict(self, inputs):
+                return {'on_loop': threading.get_ident() == loop_thread}
+
+        g = Graph()
+        g.start().add(Blocking())
+        g.end()
+
+        self.assertEqual(await g.aexecute('predict', {}), {'on_loop': False})
+
+    async def test_list_input_and_nested_graph(self):
+        class Double(NodeContainable):
+            async def apredict(self, inputs):
+                return {'value': inputs['value'] * 2}
+
+            def predict(self, inputs):
+                raise AssertionError('the coroutine function must be preferred')
+
+        inner = Graph()
+        inner.start().add(Double())
+        inner.end()
+
+        g = Graph()
+        g.start().add(inner).add(Double())
+        g.end()
+
+        result = await g.aexecute('predict', [{'value': 1}, {'value': 2}])
+        self.assertEqual(result, [{'value': 4}, {'value': 8}])
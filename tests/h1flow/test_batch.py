@@ -0,0 +1,76 @@
+import pandas as pd
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable, Decision
+
+
+class Score(NodeContainable):
+    vectorized = True
+
+    def predict(self, inputs):
+        score = inputs['x'] * 2
+        return {'results': pd.DataFrame({'score': score, 'prediction': score > 5})}
+
+
+class High(NodeContainable):
+    vectorized = True
+
+    def predict(self, inputs):
+        return {'label': 'high', 'adjusted': inputs['results']['score'] + inputs['offset']}
+
+
+class Low(NodeContainable):
+    vectorized = True
+
+    def predict(self, inputs):
+        return {'label': 'low', 'adjusted': inputs['results']['score'] - inputs['offset']}
+
+
+class BatchExecutionTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+        calls = self.calls
+
+        class CountedScore(Score):
+            def predict(self, inputs):
+                calls.append(len(inputs['x']))
+                return super().predict(inputs)
+
+        self.graph = Graph()
+        self.graph.start().add(Decision(CountedScore())).add(yes=High(), no=Low())
+        self.graph.end()
+
+    def test_batch_routes_rows_and_preserves_order(self):
+        data = [
+            {'x': 1, 'offset': 10},
+            {'x': 5, 'offset': 10},
+            {'x': 3, 'offset': 1, 'id': 'other keys'},
+            {'x': 2, 'offset': 1},
+            {'x': 4, 'offset': 0},
+        ]
+
+        result = self.graph.execute('predict', data, batch=True)
+
+        self.assertEqual([item['label'] for item in result], ['low', 'high', 'high', 'low', 'high'])
+        self.assertEqual([item['adjusted'] for item in result], [-8, 20, 7, 3, 8])
+        self.assertEqual(result[0]['results'], {'score': 2, 'prediction': False})
+
+        # one execution per group of dictionaries having the same keys
+        self.assertEqual(sorted(self.calls), [1, 4])
+
+    def test_end_transform_output_applied_per_item(self):
+        self.graph.nodes.end.transform_output = lambda output: {'adjusted': output['adjusted']}
+
+        result = self.graph.execute('predict', [{'x': 1, 'offset': 0}, {'x': 4, 'offset': 0}], batch=True)
+        self.assertEqual(result, [{'adjusted': 2}, {'adjusted': 8}])
+
+    def test_fallback_for_non_vectorized_graph(self):
+        class Add(NodeContainable):
+            def predict(self, inputs):
+                return {'y': inputs['x'] + 1}
+
+        g = Graph()
+        g.start().add(Add())
+        g.end()
+
+        self.assertEqual(g.execute('predict', [{'x': 1}, {'x': 2}], batch=True), [{'y': 2}, {'y': 3}])
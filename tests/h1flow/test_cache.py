@@ -0,0 +1,119 @@
+import asyncio
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from unittest import TestCase
+from h1st.h1flow.cache import NodeCache, cached, fingerprint
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+
+
+@cached(maxsize=2)
+class BuildFeatures(NodeContainable):
+    consumes = ['df']
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def predict(self, inputs):
+        self.calls += 1
+        return {'features': inputs['df']['x'] * 2}
+
+    async def apredict(self, inputs):
+        return self.predict(inputs)
+
+
+class Score(NodeContainable):
+    def predict(self, inputs):
+        return {'score': int(inputs['features'].sum())}
+
+
+class NodeCacheTestCase(TestCase):
+    def setUp(self):
+        self.features = BuildFeatures()
+        self.graph = Graph()
+        self.graph.start().add(self.features).add(Score())
+        self.graph.end()
+
+    def test_hit(self):
+        result = self.graph.predict({'df': pd.DataFrame({'x': [1, 2, 3]})})
+        self.assertEqual(result['score'], 12)
+
+        # equal content, other objects and unrelated inputs
+        result = self.graph.predict({'df': pd.DataFrame({'x': [1, 2, 3]}), 'request_id': 2})
+        self.assertEqual(result['score'], 12)
+        self.assertEqual(self.features.calls, 1)
+
+        self.graph.predict({'df': pd.DataFrame({'x': [1, 2, 4]})})
+        self.assertEqual(self.features.calls, 2)
+
+        stats = self.graph.cache_stats()
+        self.assertEqual(list(stats.index), ['BuildFeatures'])
+        self.assertEqual((stats.loc['BuildFeatures', 'hits'], stats.loc['BuildFeatures', 'misses']), (1, 2))
+
+    def test_async(self):
+        data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+        asyncio.run(self.graph.apredict(data))
+        asyncio.run(self.graph.apredict(data))
+
+        self.assertEqual(self.features.calls, 1)
+
+    def test_disabled(self):
+        self.graph.nodes.BuildFeatures.cache = None
+        data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+        self.graph.predict(data)
+        self.graph.predict(data)
+
+        self.assertEqual(self.features.calls, 2)
+        self.assertTrue(self.graph.cache_stats().empty)
+
+    def test_lru_eviction(self):
+        cache = NodeCache(maxsize=2)
+        cache.put('a', {'v': 1})
+        cache.put('b', {'v': 2})
+        cache.get('a')
+        cache.put('c', {'v': 3})
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'v': 1})
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl(self):
+        cache = NodeCache(ttl=0.01)
+        cache.put('a', {'v': 1})
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_max_bytes(self):
+        cache = NodeCache(maxsize=None, max_bytes=12_000)
+        cache.put('a', {'v': np.zeros(1000)})
+        cache.put('b', {'v': np.zeros(1000)})
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['bytes'], 8000)
+
+    def test_fingerprint(self):
+        a = np.arange(10)
+        self.assertEqual(fingerprint({'a': a, 'b': [1, 'x']}), fingerprint({'b': [1, 'x'], 'a': a.copy()}))
+        self.assertNotEqual(fingerprint(a), fingerprint(a.astype('int32')))
+        self.assertNotEqual(fingerprint(pd.DataFrame({'x': [1]})), fingerprint(pd.DataFrame({'y': [1]})))
+        self.assertNotEqual(fingerprint(1), fingerprint('1'))
+
+    def test_pickle(self):
+        cache = pickle.loads(pickle.dumps(self.graph.nodes.BuildFeatures.cache))
+
+        self.assertEqual(cache.maxsize, 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_list_column(self):
+        df = pd.DataFrame({'x': [1, 2], 'tags': [['a'], ['b', 'c']]})
+        self.assertEqual(fingerprint(df), fingerprint(df.copy()))
+        self.assertNotEqual(fingerprint(df), fingerprint(df.assign(tags=[['a'], ['b']])))
+
+        self.assertEqual(self.graph.predict({'df': df})['score'], 6)
+        self.assertEqual(self.graph.predict({'df': df.copy()})['score'], 6)
+        self.assertEqual(self.features.calls, 1)
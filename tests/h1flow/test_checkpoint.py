@@ -0,0 +1,139 @@
+import tempfile
+import pandas as pd
+from unittest import TestCase
+from h1st.h1flow.checkpoint import CheckpointStore
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+from h1st.model.repository.storage.local import LocalStorage
+
+# names of the executed containables, kept out of their state which the checkpoints restore
+executed = []
+
+
+class Prepare(NodeContainable):
+    consumes = ['df']
+
+    def train(self, inputs):
+        executed.append('Prepare')
+        df = inputs['df']
+        return {'prepared': df.assign(y=df['x'] * 2), 'mean': df['x'].mean(), 'x': df['x']}
+
+
+class Fit(NodeContainable):
+    consumes = ['prepared']
+
+    def __init__(self, scale: float = 1.0):
+        super().__init__()
+        self.scale = scale
+        self.coef = None
+        self.fail = False
+
+    def train(self, inputs):
+        executed.append('Fit')
+        if self.fail:
+            raise RuntimeError('out of memory')
+
+        self.coef = float(inputs['prepared']['y'].sum()) * self.scale
+        return {'coef': self.coef}
+
+
+class CheckpointTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = CheckpointStore(LocalStorage(self.directory.name), namespace='test')
+        executed.clear()
+
+    def _create_graph(self, scale: float = 1.0):
+        self.prepare, self.fit = Prepare(), Fit(scale)
+        g = Graph()
+        g.start().add(self.prepare).add(self.fit)
+        g.end()
+        g.checkpoints = self.store
+        executed.clear()
+        return g
+
+    def test_resume(self):
+        data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+
+        g = self._create_graph()
+        self.fit.fail = True
+        with self.assertRaises(RuntimeError):
+            g.execute('train', data)
+
+        g = self._create_graph()
+        result = g.execute('train', data)
+
+        self.assertEqual(executed, ['Fit'])
+        pd.testing.assert_frame_equal(result['prepared'], pd.DataFrame({'x': [1, 2, 3], 'y': [2, 4, 6]}))
+        pd.testing.assert_series_equal(result['x'], data['df']['x'])
+        self.assertEqual((result['mean'], result['coef']), (2.0, 12.0))
+
+    def test_state_restored(self):
+        data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+        self._create_graph().execute('train', data)
+
+        g = self._create_graph()
+        g.execute('train', data)
+
+        self.assertEqual(executed, [])
+        self.assertEqual(self.fit.coef, 12.0)
+        self.assertEqual(self.store.loaded, 2)
+
+    def test_changed_inputs(self):
+        self._create_graph().execute('train', {'df': pd.DataFrame({'x': [1, 2, 3]})})
+
+        g = self._create_graph()
+        g.execute('train', {'df': pd.DataFrame({'x': [1, 2, 4]})})
+
+        self.assertEqual(executed, ['Prepare', 'Fit'])
+
+    def test_changed_version(self):
+        data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+        self._create_graph().execute('train', data)
+
+        g = self._create_graph()
+        self.fit.checkpoint_version = '2'
+        g.execute('train', data)
+
+        self.assertEqual(executed, ['Fit'])
+
+    def test_changed_configuration(self):
+        data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+        self._create_graph().execute('train', data)
+
+        g = self._create_graph(scale=2.0)
+        result = g.execute('train', data)
+
+        self.assertEqual(executed, ['Fit'])
+        self.assertEqual(result['coef'], 24.0)
+        self.assertEqual(self.fit.scale, 2.0)
+
+    def test_commands(self):
+        Prepare.predict = Prepare.train
+        Fit.predict = Fit.train
+        self.addCleanup(lambda: (delattr(Prepare, 'predict'), delattr(Fit, 'predict')))
+        data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+
+        self._create_graph().execute('predict', data)
+        self._create_graph().execute('predict', data)
+
+        self.assertEqual(executed, ['Prepare', 'Fit'])
+        self.assertEqual(self.store.saved, 0)
+
+    def test_list_column(self):
+        data = {'df': pd.DataFrame({'x': [1, 2, 3], 'tags': [['a'], [], ['b', 'c']]})}
+        self._create_graph().execute('train', data)
+
+        g = self._create_graph()
+        g.execute('train', data)
+
+        self.assertEqual(executed, [])
+
+    def test_clear(self):
+        self._create_graph().execute('train', {'df': pd.DataFrame({'x': [1, 2, 3]})})
+        self.store.clear()
+
+        g = self._create_graph()
+        g.execute('train', {'df': pd.DataFrame({'x': [1, 2, 3]})})
+        self.assertEqual(executed, ['Prepare', 'Fit'])
@@ -0,0 +1,93 @@
+import time
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import Action, GraphException, NodeContainable
+
+
+class Asset(NodeContainable):
+    def __init__(self, asset: int = 0):
+        super().__init__()
+        self.asset = asset
+
+    def predict(self, inputs):
+        return {f'asset{self.asset}': inputs['x'] + self.asset}
+
+
+class Score(NodeContainable):
+    def __init__(self, asset: int = 0):
+        super().__init__()
+        self.asset = asset
+
+    def predict(self, inputs):
+        return {f'score{self.asset}': inputs[f'asset{self.asset}'] * 10}
+
+
+class ConstructionTestCase(TestCase):
+    def test_generated_ids(self):
+        g = Graph()
+        g.start()
+        g.add(Asset())
+        g.add(Asset(), id='Asset3')
+        g.add(Asset())
+        g.add(Asset())
+
+        self.assertEqual(list(vars(g.nodes)), ['start', 'Asset', 'Asset3', 'Asset2', 'Asset4'])
+
+    def test_add_many(self):
+        g = Graph()
+        g.start()
+        last_nodes = g.add_many([Asset(i), Score(i)] for i in range(1, 4))
+        g.end()
+
+        self.assertEqual([node.id for node in last_nodes], ['Score', 'Score2', 'Score3'])
+        self.assertEqual([node.id for node, _ in g.nodes.start.edges], ['Asset', 'Asset2', 'Asset3'])
+        self.assertEqual(g.predict({'x': 1}), {'asset1': 2, 'score1': 20, 'asset2': 3, 'score2': 30,
+                                               'asset3': 4, 'score3': 40})
+
+    def test_add_many_single_branch(self):
+        g = Graph()
+        g.start()
+        g.add_many([Asset(1)])
+        g.add(Score(1))
+        g.end()
+
+        self.assertEqual(g.predict({'x': 1})['score1'], 20)
+
+    def test_add_many_duplicated_id(self):
+        g = Graph()
+        g.start().add(Asset(), id='a')
+
+        with self.assertRaises(GraphException):
+            g.add_many([Action(Asset(), id='a')])
+
+    def test_end_connects_leaves(self):
+        g = Graph()
+        g.start()
+        g.add_many([Asset(1), Asset(2)])
+        g._last_added_node = g.nodes.Asset
+        g.add(Score(1))
+        g.end()
+
+        self.assertEqual([node.id for node, _ in g.nodes.Asset2.edges], ['end'])
+        self.assertEqual([node.id for node, _ in g.nodes.Score.edges], ['end'])
+        self.assertEqual([node.id for node, _ in g.nodes.Asset.edges], ['Score'])
+
+    def test_large_graph(self):
+        g = Graph()
+        g.start()
+        g.add_many([Asset(), Score()] for _ in range(10_000))
+        g.end()
+
+        self.assertEqual(len(g.compile().steps), 20_002)
+        self.assertTrue(hasattr(g.nodes, 'Asset10000') and hasattr(g.nodes, 'Score10000'))
+
+    def test_large_graph_build_time(self):
+        started = time.perf_counter()
+        g = Graph()
+        g.start()
+        g.add_many([Asset(), Score()] for _ in range(25_000))
+        g.end()
+
+        # about a second even on a slow machine, while a build quadratic in the number of nodes takes minutes
+        self.assertLess(time.perf_counter() - started, 20)
+        self.assertEqual(len(g.compile().steps), 50_002)
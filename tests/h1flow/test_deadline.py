@@ -0,0 +1,110 @@
+import asyncio
+import time
+from unittest import TestCase
+from h1st.exceptions.exception import GraphException
+from h1st.h1flow.deadline import Deadline
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+
+
+class Slow(NodeContainable):
+    def __init__(self, key, seconds):
+        super().__init__()
+        self.key = key
+        self.seconds = seconds
+
+    def predict(self, inputs):
+        time.sleep(self.seconds)
+        return {self.key: 'slow'}
+
+
+class Enrichment(Slow):
+    optional = True
+
+
+class ColdStart(Slow):
+    optional = True
+
+    def __init__(self, key):
+        super().__init__(key, 0.2)
+        self.calls = 0
+
+    def predict(self, inputs):
+        self.calls += 1
+        output = super().predict(inputs)
+        self.seconds = 0.001
+        return output
+
+
+class Rules(NodeContainable):
+    def predict(self, inputs):
+        return {'score': 'rules'}
+
+
+class DeadlineTestCase(TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        self.graph.start().add(Enrichment('enrichment', 0.05)).add(Slow('score', 0.05))
+        self.graph.end()
+        self.graph.nodes.Slow.fallback = Rules()
+
+    def test_within_budget(self):
+        deadline = Deadline(1)
+        result = self.graph.execute('predict', {}, deadline=deadline)
+
+        self.assertEqual(result, {'enrichment': 'slow', 'score': 'slow'})
+        self.assertEqual(deadline.degraded, {})
+
+    def test_expired(self):
+        deadline = Deadline(0)
+        result = self.graph.execute('predict', {}, deadline=deadline)
+
+        self.assertEqual(result, {'score': 'rules'})
+        self.assertEqual(deadline.degraded, {'Enrichment': 'skipped', 'Slow': 'fallback'})
+
+    def test_estimated_duration(self):
+        self.graph.execute('predict', {}, deadline=1)
+
+        # the enrichment fits in the budget but the score is then expected to exceed it
+        deadline = Deadline(0.08)
+        result = self.graph.execute('predict', {}, deadline=deadline)
+
+        self.assertEqual(result, {'enrichment': 'slow', 'score': 'rules'})
+        self.assertEqual(deadline.degraded, {'Slow': 'fallback'})
+
+    def test_recovery_after_slow_call(self):
+        cold = ColdStart('enrichment')
+        g = Graph()
+        g.start().add(cold)
+        g.end()
+        g.execute('predict', {}, deadline=1)
+
+        results = [g.execute('predict', {}, deadline=0.05) for _ in range(20)]
+
+        self.assertEqual(results[0], {})
+        self.assertEqual(results[-1], {'enrichment': 'slow'})
+        self.assertGreater(cold.calls, 2)
+
+    def test_fallback_recovery_after_slow_call(self):
+        g = Graph()
+        g.start().add(Slow('score', 0.2))
+        g.end()
+        g.nodes.Slow.fallback = Rules()
+        g.execute('predict', {}, deadline=1)
+        g.nodes.Slow._containable.seconds = 0.001
+
+        results = [g.execute('predict', {}, deadline=0.05) for _ in range(20)]
+
+        self.assertEqual(results[0], {'score': 'rules'})
+        self.assertEqual(results[-1], {'score': 'slow'})
+
+    def test_async(self):
+        deadline = Deadline(0)
+        result = asyncio.run(self.graph.aexecute('predict', {}, deadline=deadline))
+
+        self.assertEqual(result, {'score': 'rules'})
+        self.assertEqual(deadline.degraded, {'Enrichment': 'skipped', 'Slow': 'fallback'})
+
+    def test_fallback_requires_containable_call(self):
+        with self.assertRaises(GraphException):
+            self.graph.nodes.start.fallback = Rules()
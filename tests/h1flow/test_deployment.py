@@ -0,0 +1,122 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+from h1st.exceptions.exception import ModelException
+from h1st.h1flow.cache import NodeCache
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.scheduling import ResourceAwareExecutor
+from h1st.model.model import Model
+from h1st.model.repository.model_repository import ModelRepository
+
+
+class ScaleModel(Model):
+    def __init__(self, factor: float = 1.0):
+        super().__init__()
+        self.stats = {'factor': factor}
+        self.started = threading.Event()
+        self.release = None
+        self.warmups = 0
+
+    def predict(self, inputs):
+        if inputs.get('warmup'):
+            self.warmups += 1
+        if self.release is not None:
+            self.started.set()
+            self.release.wait()
+
+        return {'y': inputs['x'] * self.stats['factor']}
+
+
+class ProcessScaleModel(Model):
+    resource = 'cpu'
+
+    def __init__(self, factor: float = 1.0):
+        super().__init__()
+        self.stats = {'factor': factor}
+
+    def predict(self, inputs):
+        return {'y': inputs['x'] * self.stats['factor'], 'pid': os.getpid()}
+
+
+class DeploymentTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.repository = ModelRepository(self.directory.name)
+        self.v2 = self.repository.persist(ScaleModel(2.0))
+        self.v3 = self.repository.persist(ScaleModel(3.0))
+
+        self.model = ScaleModel()
+        self.graph = Graph()
+        self.graph.start().add(self.model, id='scale')
+        self.graph.end()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hot_swap(self):
+        version = self.graph.hot_swap('scale', self.repository, self.v2, sample={'x': 1, 'warmup': True}).result()
+
+        self.assertEqual(version, self.v2)
+        self.assertEqual(self.graph.predict({'x': 2})['y'], 4.0)
+        swapped = self.graph.nodes.scale._containable
+        self.assertEqual(swapped.warmups, 1)
+        self.assertIs(swapped._node, self.graph.nodes.scale)
+        self.assertEqual(self.model.stats, {'factor': 1.0})
+
+        self.assertEqual(self.graph.hot_swap('scale', self.repository).result(), self.v3)
+        self.assertEqual(self.graph.predict({'x': 2})['y'], 6.0)
+
+    def test_in_flight_execution(self):
+        release = self.model.release = threading.Event()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.graph.predict({'x': 2})))
+        thread.start()
+        self.model.started.wait()
+
+        swapped = self.graph.hot_swap('scale', self.repository, self.v2).result()
+        release.set()
+        thread.join()
+
+        self.assertEqual(swapped, self.v2)
+        self.assertEqual(results, [{'y': 2.0}])
+
+    def test_failed_load(self):
+        future = self.graph.hot_swap('scale', self.repository, 'unknown')
+
+        with self.assertRaises(ModelException):
+            future.result()
+        self.assertIs(self.graph.nodes.scale._containable, self.model)
+
+    def test_replace(self):
+        self.graph.nodes.scale.cache = NodeCache()
+        self.assertEqual(self.graph.predict({'x': 2})['y'], 2.0)
+        self.graph.execute('predict', {'x': 2}, outputs=['y'])
+        cache = self.graph.nodes.scale.cache
+
+        previous = self.graph.replace('scale', ScaleModel(5.0), ['predict'])
+
+        self.assertIs(previous, self.model)
+        self.assertIsNot(self.graph.nodes.scale.cache, cache)
+        self.assertEqual(len(self.graph.nodes.scale.cache), 0)
+        self.assertEqual(len(self.graph._plan._pruned), 1)
+        self.assertIn('predict', self.graph._plan._calls)
+        self.assertEqual(self.graph.predict({'x': 2})['y'], 10.0)
+
+    def test_hot_swap_in_worker_processes(self):
+        version = self.repository.persist(ProcessScaleModel(4.0))
+        graph = Graph()
+        graph.start().add(ProcessScaleModel(), id='scale')
+        graph.end()
+
+        with ResourceAwareExecutor(max_processes=1) as executor:
+            output = graph.execute('predict', {'x': 2}, executor=executor)
+            self.assertEqual(output['y'], 2.0)
+            self.assertNotEqual(output['pid'], os.getpid())
+
+            # the worker processes load the new model instead of the one they already loaded for the node
+            self.assertEqual(graph.hot_swap('scale', self.repository, version).result(), version)
+            self.assertEqual(graph.execute('predict', {'x': 2}, executor=executor)['y'], 8.0)
+
+            graph.replace('scale', ProcessScaleModel(5.0))
+            self.assertEqual(graph.execute('predict', {'x': 2}, executor=executor)['y'], 10.0)
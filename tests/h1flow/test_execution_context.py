@@ -0,0 +1,97 @@
+import pandas as pd
+from unittest import TestCase
+from h1st.h1flow.execution_context import ExecutionScope
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import Decision, NodeContainable
+
+
+class ExecutionScopeTestCase(TestCase):
+    def test_layers_shadow_without_copying(self):
+        df = pd.DataFrame({'x': [1, 2]})
+        base = {'a': 1, 'df': df}
+        scope = ExecutionScope({}, base).child({'a': 2})
+
+        self.assertEqual(scope['a'], 2)
+        self.assertIs(scope['df'], df)
+        self.assertIs(scope.maps[-1], base)
+
+    def test_child_skips_empty_layers(self):
+        base = {'a': 1}
+        scope = ExecutionScope.of(base).child({}).child({'b': 2}).child({})
+
+        self.assertEqual(scope.maps, [{}, {'b': 2}, base])
+
+    def test_writes_stay_in_top_layer(self):
+        base = {'a': 1}
+        scope = ExecutionScope.of(base)
+        scope['a'] = 10
+        scope['b'] = 20
+
+        self.assertEqual(base, {'a': 1})
+        self.assertEqual(dict(scope), {'a': 10, 'b': 20})
+
+
+class GraphScopeTestCase(TestCase):
+    def test_node_writes_do_not_leak(self):
+        class Writer(NodeContainable):
+            def predict(self, inputs):
+                inputs['leaked'] = True
+                return {'written': True}
+
+        class Reader(NodeContainable):
+            def predict(self, inputs):
+                return {'seen': 'leaked' in inputs, 'written_seen': inputs['written']}
+
+        g = Graph()
+        g.start().add(Writer()).add(Reader())
+        g.end()
+
+        data = {'x': 1}
+        result = g.predict(data)
+
+        self.assertEqual(data, {'x': 1})
+        self.assertEqual(result, {'written': True, 'seen': True, 'written_seen': True})
+
+    def test_later_outputs_shadow_earlier_ones(self):
+        class Output(NodeContainable):
+            def __init__(self, value):
+                super().__init__()
+                self.value = value
+
+            def predict(self, inputs):
+                return {'key': self.value, 'previous': inputs.get('key')}
+
+        g = Graph()
+        g.start().add(Output(1)).add(Output(2))
+        g.end()
+
+        self.assertEqual(g.predict({}), {'key': 2, 'previous': 1})
+
+    def test_plain_plan_branches(self):
+        class Writer(NodeContainable):
+            def predict(self, inputs):
+                inputs['leaked'] = True
+                return {'written': True}
+
+        class Reader(NodeContainable):
+            def predict(self, inputs):
+                return {'seen': 'leaked' in inputs}
+
+        class Classify(NodeContainable):
+            def predict(self, inputs):
+                return {'results': [{'prediction': True}]}
+
+        g = Graph()
+        g.start()
+        g.add_many([Writer(), Reader()])
+        g.end()
+
+        self.assertTrue(g.compile().plain)
+        self.assertEqual(g.predict({'x': 1}), {'written': True, 'seen': False})
+
+        g = Graph()
+        g.start().add(Decision(Classify())).add(yes=Reader(), no=Writer())
+        g.end()
+
+        self.assertFalse(g.compile().plain)
+        self.assertEqual(g.predict({'x': 1}), {'results': [{'prediction': True}], 'seen': False})
@@ -0,0 +1,117 @@
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable, Decision
+from h1st.model.model import Model
+
+
+class Increment(NodeContainable):
+    def predict(self, inputs):
+        return {'value': inputs['value'] + 1}
+
+
+class ExecutionPlanTestCase(TestCase):
+    def test_deep_graph_exceeding_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+
+        g = Graph()
+        node = g.start()
+        for _ in range(depth):
+            node = node.add(Increment())
+        g.end()
+
+        result = g.predict({'value': 0})
+        self.assertEqual(result['value'], depth)
+
+    def test_plan_order_and_join(self):
+        class MyModel(Model):
+            def predict(self, inputs):
+                return {'results': [{'prediction': True}, {'prediction': False}]}
+
+        g = Graph()
+        yes, no = g.start().add(Decision(MyModel(), id='decision')).add(yes=Increment(), no=Increment())
+        yes.add(Increment(), id='yes_leaf')
+        g.end()
+
+        plan = g.compile()
+        self.assertEqual(
+            [step.id for step in plan.steps],
+            ['start', 'decision', 'Increment', 'yes_leaf', 'Increment2', 'end'])
+
+        end = plan.steps[-1]
+        self.assertTrue(end.is_join)
+        self.assertEqual([plan.steps[parent].id for parent, _ in end.parents], ['yes_leaf', 'Increment2'])
+
+    def test_commands_are_resolved_once(self):
+        g = Graph()
+        g.start().add(Increment())
+        g.end()
+
+        plan = g.compile()
+        self.assertIs(plan.bind('predict'), plan.bind('predict'))
+        self.assertEqual(g.predict({'value': 1}), {'value': 2})
+
+    def test_plan_rebuilt_after_setting_transform(self):
+        g = Graph()
+        g.start().add(Increment(), id='inc')
+        g.end()
+
+        self.assertEqual(g.predict({'value': 1}), {'value': 2})
+
+        g.nodes.inc.transform_input = lambda inputs: {'value': inputs['value'] * 10}
+        self.assertEqual(g.predict({'value': 1}), {'value': 11})
+
+
+class Split(NodeContainable):
+    def predict(self, inputs):
+        return {'results': [{'value': value, 'prediction': value % 2 == 0} for value in inputs['values']]}
+
+
+class SumValues(NodeContainable):
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def predict(self, inputs):
+        return {self.key: sum(item['value'] for item in inputs['results'])}
+
+
+class ConcurrentExecutionTestCase(TestCase):
+    def _create_graph(self, yes, no):
+        g = Graph()
+        g.start().add(Decision(Split())).add(yes=yes, no=no)
+        g.end()
+        return g
+
+    def test_branches_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        class Branch(NodeContainable):
+            def __init__(self, key):
+                super().__init__()
+                self.key = key
+
+            def predict(self, inputs):
+                # both branches must be running at the same time to pass the barrier
+                barrier.wait()
+                return {self.key: len(inputs['results']), 'last': self.key}
+
+        g = self._create_graph(Branch('yes'), Branch('no'))
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            result = g.execute('predict', {'values': [1, 2, 3]}, executor=executor)
+
+        # outputs are merged in plan order, so 'last' comes from the no branch whichever branch finishes first
+        self.assertEqual(result, {'results': result['results'], 'yes': 1, 'no': 2, 'last': 'no'})
+
+    def test_process_pool_executor(self):
+        g = self._create_graph(SumValues('even'), SumValues('odd'))
+        data = {'values': list(range(10))}
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            result = g.execute('predict', data, executor=executor)
+
+        self.assertEqual(result, g.predict(data))
+        self.assertEqual((result['even'], result['odd']), (20, 25))
@@ -0,0 +1,168 @@
+import asyncio
+from unittest import TestCase
+import pandas as pd
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import Decision, NodeContainable
+from h1st.h1flow.tracing import Tracer
+
+
+class Double(NodeContainable):
+    def predict(self, inputs):
+        return {'value': inputs['value'] * 2}
+
+
+class Classify(NodeContainable):
+    def predict(self, inputs):
+        return {'results': [{'id': i, 'prediction': i % 2 == 0} for i in inputs['ids']]}
+
+
+class Count(NodeContainable):
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def predict(self, inputs):
+        return {self.key: len(inputs['results'])}
+
+
+class Ids(NodeContainable):
+    consumes = ['results']
+
+    def predict(self, inputs):
+        return {'seen': sorted(result['id'] for result in inputs['results'])}
+
+
+def doubling_graph() -> Graph:
+    g = Graph()
+    g.start().add(Double()).add(Double())
+    g.end()
+    return g
+
+
+class InliningTestCase(TestCase):
+    def test_flat_plan(self):
+        g = Graph()
+        g.start().add(doubling_graph(), id='inner').add(Double())
+        g.end()
+
+        steps = g.compile().steps
+        self.assertEqual([step.id for step in steps],
+                         ['start', 'inner.start', 'inner.Double', 'inner.Double2', 'inner.end', 'Double', 'end'])
+        self.assertEqual(g.predict({'value': 1}), {'value': 8})
+
+    def test_nested_levels(self):
+        middle = Graph()
+        middle.start().add(doubling_graph(), id='inner')
+        middle.end()
+
+        g = Graph()
+        g.start().add(middle, id='middle').add(Double())
+        g.end()
+
+        self.assertIn('middle.inner.Double2', [step.id for step in g.compile().steps])
+        self.assertEqual(g.predict({'value': 1}), {'value': 8})
+
+    def test_graph_added_twice(self):
+        inner = doubling_graph()
+        g = Graph()
+        g.start().add(inner, id='first').add(inner, id='second')
+        g.end()
+
+        self.assertEqual(len(g.compile().steps), 10)
+        self.assertEqual(g.predict({'value': 1}), {'value': 16})
+
+    def test_branches(self):
+        inner = Graph()
+        inner.start().add(Decision(Classify(), result_field='results')).add(yes=Count('yes'), no=Count('no'))
+        inner.end()
+
+        g = Graph()
+        g.start().add(inner, id='inner')
+        g.end()
+
+        self.assertEqual(g.predict({'ids': [1, 2, 3]}), inner.predict({'ids': [1, 2, 3]}))
+        self.assertEqual(g.predict({'ids': [1, 2, 3]})['yes'], 1)
+
+    def test_decision_downstream(self):
+        inner = Graph()
+        inner.start().add(Decision(Classify(), result_field='results'))
+        inner.end()
+
+        middle = Graph()
+        middle.start().add(inner, id='inner')
+        middle.end()
+
+        for child in (inner, middle):
+            g = Graph()
+            g.start().add(child, id='child').add(Ids())
+            g.end()
+
+            # the downstream node sees the output of the graph, not only the rows reaching its end node
+            self.assertIn('child.end', [step.id for step in g.compile().steps])
+            self.assertEqual(g.predict({'ids': [1, 2]})['seen'], [1, 2])
+            self.assertEqual(g.execute('predict', {'ids': [1, 2]}, outputs=['seen']), {'seen': [1, 2]})
+            self.assertEqual(asyncio.run(g.apredict({'ids': [1, 2]}))['seen'], [1, 2])
+
+            inner.inline = False
+            self.assertEqual(g.predict({'ids': [1, 2]})['seen'], [1, 2])
+            inner.inline = True
+
+    def test_not_inlined(self):
+        inner = doubling_graph()
+        inner.nodes.end.transform_output = lambda output: {'doubled': output['value']}
+
+        g = Graph()
+        g.start().add(inner, id='inner')
+        g.end()
+
+        self.assertEqual([step.id for step in g.compile().steps], ['start', 'inner', 'end'])
+        self.assertEqual(g.predict({'value': 1}), {'doubled': 4})
+
+    def test_subclass_with_methods(self):
+        class TrainedGraph(Graph):
+            def __init__(self):
+                super().__init__()
+                self.start().add(Double())
+                self.end()
+
+            def train(self, inputs):
+                return {'trained': True}
+
+        class PlainGraph(Graph):
+            def __init__(self):
+                super().__init__()
+                self.start().add(Double())
+                self.end()
+
+        g = Graph()
+        g.start().add(TrainedGraph(), id='trained').add(PlainGraph(), id='plain')
+        g.end()
+
+        self.assertEqual([step.id for step in g.compile().steps],
+                         ['start', 'trained', 'plain.start', 'plain.Double', 'plain.end', 'end'])
+        self.assertEqual(g.predict({'value': 1}), {'value': 4})
+
+        g = Graph()
+        g.start().add(TrainedGraph(), id='trained')
+        g.end()
+        self.assertEqual(g.execute('train', {'value': 1}), {'trained': True})
+
+    def test_inlined_graph_changed(self):
+        inner = doubling_graph()
+        g = Graph()
+        g.start().add(inner, id='inner')
+        g.end()
+        self.assertEqual(g.predict({'value': 1}), {'value': 4})
+
+        inner.nodes.Double2.transform_output = lambda inputs: {'value': inputs['value'] + 1}
+        self.assertEqual(g.predict({'value': 1}), {'value': 5})
+
+    def test_tracing(self):
+        tracer = Tracer()
+        g = Graph()
+        g.start().add(doubling_graph(), id='inner')
+        g.end()
+        g.execute('predict', {'value': pd.Series([1, 2])}, trace=tracer)
+
+        self.assertIn('inner.Double', list(tracer.to_dataframe()['node_id']))
+        self.assertIn('inner', tracer.annotations())
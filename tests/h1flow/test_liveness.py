@@ -0,0 +1,122 @@
+import gc
+import weakref
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable, Decision
+
+
+class Features:
+    """Stands for a large feature frame, weakly referenceable"""
+
+    def __init__(self, values):
+        self.values = values
+
+
+class BuildFeatures(NodeContainable):
+    consumes = ['df']
+
+    def __init__(self):
+        super().__init__()
+        self.ref = None
+
+    def predict(self, inputs):
+        features = Features(inputs['df']['x'] * 2)
+        self.ref = weakref.ref(features)
+        return {'features': features}
+
+
+class Score(NodeContainable):
+    consumes = ['features']
+
+    def predict(self, inputs):
+        return {'risk_score': inputs['features'].values.sum()}
+
+
+class Report(NodeContainable):
+    consumes = ['risk_score']
+
+    def __init__(self, features):
+        super().__init__()
+        self.features = features
+        self.features_alive = None
+
+    def predict(self, inputs):
+        gc.collect()
+        self.features_alive = self.features.ref() is not None
+        return {'report': f'risk={inputs["risk_score"]}'}
+
+
+class LivenessTestCase(TestCase):
+    def _create_graph(self, outputs=None):
+        self.features = BuildFeatures()
+        self.report = Report(self.features)
+
+        g = Graph()
+        g.start().add(self.features).add(Score()).add(self.report)
+        g.end(outputs=outputs)
+        return g
+
+    def test_intermediate_output_released(self):
+        g = self._create_graph(outputs=['risk_score', 'report'])
+        data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+
+        result = g.predict(data)
+
+        self.assertEqual(result, {'risk_score': 12, 'report': 'risk=12'})
+        self.assertFalse(self.report.features_alive)
+        # the caller's input is left untouched
+        self.assertIn('df', data)
+
+    def test_outputs_kept_without_output_keys(self):
+        g = self._create_graph()
+        result = g.predict({'df': pd.DataFrame({'x': [1, 2, 3]})})
+
+        self.assertEqual(set(result), {'features', 'risk_score', 'report'})
+        self.assertTrue(self.report.features_alive)
+
+    def test_overridden_output(self):
+        class Step(NodeContainable):
+            consumes = ['df']
+
+            def __init__(self, value):
+                super().__init__()
+                self.value = value
+
+            def predict(self, inputs):
+                return {'df': inputs['df'] + self.value}
+
+        g = Graph()
+        g.start().add(Step(1)).add(Step(10))
+        g.end()
+
+        self.assertEqual(g.predict({'df': 0}), {'df': 11})
+
+    def test_decision_branches(self):
+        class Classifier(NodeContainable):
+            consumes = ['df']
+
+            def predict(self, inputs):
+                df = inputs['df']
+                return {'results': df.assign(prediction=df['x'] > 1)}
+
+        class Total(NodeContainable):
+            consumes = ['results']
+
+            def __init__(self, key):
+                super().__init__()
+                self.key = key
+
+            def predict(self, inputs):
+                return {self.key: int(inputs['results']['x'].sum())}
+
+        g = Graph()
+        g.start().add(Decision(Classifier())).add(yes=Total('yes'), no=Total('no'))
+        g.end(outputs=['yes', 'no'])
+
+        data = {'df': pd.DataFrame({'x': [0, 1, 2, 3]})}
+        self.assertEqual(g.predict(data), {'yes': 5, 'no': 1})
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(g.execute('predict', data, executor=executor), {'yes': 5, 'no': 1})
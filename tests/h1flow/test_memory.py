@@ -0,0 +1,66 @@
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+from h1st.h1flow.memory import MemoryProfiler, sizeof
+
+
+class Allocate(NodeContainable):
+    def predict(self, inputs):
+        temporary = np.ones(1_000_000)  # 8 MB freed before returning
+        return {'big': pd.DataFrame({'x': np.arange(100_000, dtype='int64')}), 'total': float(temporary.sum())}
+
+
+class Small(NodeContainable):
+    def predict(self, inputs):
+        return {'small': [1, 2, 3]}
+
+
+class MemoryProfilerTestCase(TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        self.graph.start().add(Allocate()).add(Small())
+        self.graph.end()
+
+    def test_report(self):
+        profiler = MemoryProfiler()
+        self.graph.execute('predict', {}, trace=profiler)
+
+        report = profiler.report()
+        self.assertGreaterEqual(report.loc['Allocate', 'peak_bytes'], 8_000_000)
+        self.assertGreaterEqual(report.loc['Allocate', 'output_bytes'], 800_000)
+        self.assertLess(report.loc['Small', 'output_bytes'], 1000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_process_pool(self):
+        profiler = MemoryProfiler()
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.graph.execute('predict', {}, executor=executor, trace=profiler)
+
+        report = profiler.report()
+        self.assertGreaterEqual(report.loc['Allocate', 'peak_bytes'], 8_000_000)
+        self.assertGreaterEqual(report.loc['Allocate', 'output_bytes'], 800_000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_state_report(self):
+        profiler = MemoryProfiler()
+        self.graph.execute('predict', {}, trace=profiler)
+
+        state = profiler.state_report()
+        self.assertEqual(state.loc[0, 'key'], 'big')
+        self.assertEqual(state.loc[0, 'node_id'], 'Allocate')
+        self.assertEqual(set(state['key']), {'big', 'total', 'small'})
+
+    def test_visualization_overlay(self):
+        profiler = MemoryProfiler()
+        self.graph.execute('predict', {}, trace=profiler)
+
+        dot = self.graph.visualize(annotations=profiler.annotations()).to_dot().source
+        self.assertIn('peak', dot)
+
+    def test_sizeof_sampled(self):
+        df = pd.DataFrame({'s': ['abc'] * 50_000})
+        self.assertAlmostEqual(sizeof(df, sample=1000), sizeof(df), delta=sizeof(df) * 0.01)
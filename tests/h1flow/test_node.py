@@ -1,8 +1,10 @@
+import numpy as np
+import pytest
 import pandas as pd
 from unittest import TestCase
 from h1st.exceptions.exception import GraphException
 from h1st.h1flow.h1flow import Graph
-from h1st.h1flow.h1step import NodeContainable, Decision
+from h1st.h1flow.h1step import NodeContainable, Decision, Switch, Merge
 from h1st.model.model import Model
 
 
@@ -390,3 +392,174 @@ class ModelNodeTestCase(TestCase):
         g = MyGraph()
         result = g.predict({})
         self.assertEqual(result, {})
+
+
+class DecisionPartitionTestCase(TestCase):
+    def _create_graph(self, results):
+        class MyModel(Model):
+            def predict(self, inputs):
+                return {'results': results}
+
+        class YesAction(NodeContainable):
+            def call(self, command, inputs):
+                return {'yes': inputs['results']}
+
+        class NoAction(NodeContainable):
+            def call(self, command, inputs):
+                return {'no': inputs['results']}
+
+        g = Graph()
+        g.start().add(Decision(MyModel(), id='decision')).add(yes=YesAction(), no=NoAction())
+        g.end()
+        return g
+
+    def test_results_scanned_once(self):
+        class ScannedList(list):
+            scans = 0
+
+            def __iter__(self):
+                ScannedList.scans += 1
+                return super().__iter__()
+
+        results = ScannedList([{'x': 1, 'prediction': True}, {'x': 2, 'prediction': False}])
+        result = self._create_graph(results).predict({})
+
+        self.assertEqual(ScannedList.scans, 1)
+        self.assertEqual(result['yes'], [{'x': 1, 'prediction': True}])
+        self.assertEqual(result['no'], [{'x': 2, 'prediction': False}])
+
+    def test_numpy_structured_array(self):
+        results = np.array([(1, True), (2, False), (3, True)], dtype=[('x', 'i8'), ('prediction', '?')])
+        result = self._create_graph(results).predict({})
+
+        self.assertEqual(result['yes']['x'].tolist(), [1, 3])
+        self.assertEqual(result['no']['x'].tolist(), [2])
+
+    def test_pyarrow_table(self):
+        pa = pytest.importorskip('pyarrow')
+
+        results = pa.table({'x': [1, 2, 3], 'prediction': [False, False, True]})
+        result = self._create_graph(results).predict({})
+
+        self.assertEqual(result['yes'].column('x').to_pylist(), [3])
+        self.assertEqual(result['no'].column('x').to_pylist(), [1, 2])
+
+
+class SwitchNodeTestCase(TestCase):
+    def _create_graph(self, results, default=True):
+        class Classifier(Model):
+            def predict(self, inputs):
+                return {'results': results}
+
+        class Count(NodeContainable):
+            def __init__(self, key):
+                super().__init__()
+                self.key = key
+
+            def call(self, command, inputs):
+                return {self.key: [item['id'] for item in inputs['results'].to_dict('records')]
+                        if isinstance(inputs['results'], pd.DataFrame)
+                        else [item['id'] for item in inputs['results']]}
+
+        cases = {'pump': Count('pumps'), 'fan': Count('fans')}
+        if default:
+            cases[None] = Count('others')
+
+        g = Graph()
+        g.start().add(Switch(Classifier(), id='switch', decision_field='kind')).add(cases=cases)
+        g.end()
+        return g
+
+    def test_switch_dataframe(self):
+        results = pd.DataFrame({'id': [1, 2, 3, 4, 5], 'kind': ['fan', 'pump', 'valve', 'fan', 'motor']})
+        result = self._create_graph(results).predict({})
+
+        self.assertEqual(result['pumps'], [2])
+        self.assertEqual(result['fans'], [1, 4])
+        self.assertEqual(result['others'], [3, 5])
+
+    def test_switch_list_without_default(self):
+        results = [{'id': 1, 'kind': 'pump'}, {'id': 2, 'kind': 'valve'}]
+        result = self._create_graph(results, default=False).predict({})
+
+        self.assertEqual(result, {'results': results, 'pumps': [1]})
+
+    def test_cases_require_switch(self):
+        g = Graph()
+        node = g.start().add(DummyAction())
+        self.assertRaises(GraphException, lambda: node.add(cases={'a': DummyAction()}))
+
+    def test_visualization(self):
+        g = self._create_graph([])
+        dot = g.visualize().to_dot().source
+
+        self.assertIn('hexagon', dot)
+        self.assertIn('label=pump', dot)
+
+
+class MergeNodeTestCase(TestCase):
+    def _create_graph(self, results, node=Decision):
+        class Classifier(Model):
+            def predict(self, inputs):
+                return {'results': results}
+
+        class Score(NodeContainable):
+            def __init__(self, factor):
+                super().__init__()
+                self.factor = factor
+
+            def call(self, command, inputs):
+                results = inputs['results']
+                if isinstance(results, pd.DataFrame):
+                    return {'predictions': pd.DataFrame({'score': results['x'] * self.factor}, index=results.index)}
+
+                return {'predictions': [item['x'] * self.factor for item in results]}
+
+        g = Graph()
+        decision = g.start().add(node(Classifier(), id='decision'))
+        if node is Switch:
+            branches = decision.add(cases={'a': Score(10), 'b': Score(100), None: Score(1)})
+        else:
+            branches = decision.add(yes=Score(10), no=Score(100))
+
+        merge = branches[0].add(Merge(key='predictions'))
+        for branch in branches[1:]:
+            branch.add(merge)
+
+        g.end()
+        return g
+
+    def test_merge_dataframe_in_original_order(self):
+        results = pd.DataFrame({'x': [1, 2, 3, 4], 'prediction': [True, False, False, True]}, index=[7, 5, 9, 1])
+        result = self._create_graph(results).predict({})
+
+        self.assertEqual(result['predictions'].index.tolist(), [7, 5, 9, 1])
+        self.assertEqual(result['predictions']['score'].tolist(), [10, 200, 300, 40])
+
+    def test_merge_switch_list(self):
+        results = [{'x': 1, 'prediction': 'b'}, {'x': 2, 'prediction': 'c'}, {'x': 3, 'prediction': 'a'}]
+        result = self._create_graph(results, Switch).predict({})
+
+        self.assertEqual(result['predictions'], [100, 2, 30])
+
+    def test_merge_single_branch(self):
+        results = pd.DataFrame({'x': [1, 2], 'prediction': [False, False]})
+        result = self._create_graph(results).predict({})
+
+        self.assertEqual(result['predictions']['score'].tolist(), [100, 200])
+
+    def test_merge_concurrently(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        results = pd.DataFrame({'x': range(6), 'prediction': [True, False] * 3})
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            result = self._create_graph(results).execute('predict', {}, executor=executor)
+
+        self.assertEqual(result['predictions']['score'].tolist(), [0, 100, 20, 300, 40, 500])
+
+    def test_merge_is_connected_once_to_end(self):
+        g = self._create_graph([])
+        merge = g.nodes.Merge
+
+        self.assertEqual([node.id for node, _ in merge.edges], ['end'])
+        self.assertEqual(len([step for step in g.compile().steps if step.node is merge]), 1)
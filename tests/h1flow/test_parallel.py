@@ -0,0 +1,42 @@
+import os
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+
+
+class Square(NodeContainable):
+    def __init__(self):
+        super().__init__()
+        self.loaded_by = os.getpid()
+
+    def predict(self, inputs):
+        return {'y': inputs['x'] ** 2, 'loaded_by': self.loaded_by, 'pid': os.getpid()}
+
+
+def create_graph():
+    g = Graph()
+    g.start().add(Square())
+    g.end()
+    return g
+
+
+class ProcessPoolExecutionTestCase(TestCase):
+    def test_order_is_preserved(self):
+        data = [{'x': i} for i in range(50)]
+        result = create_graph().execute('predict', data, workers=2)
+
+        self.assertEqual([item['y'] for item in result], [i ** 2 for i in range(50)])
+        self.assertNotIn(os.getpid(), {item['pid'] for item in result})
+
+    def test_pool_reused_with_loader(self):
+        g = create_graph()
+
+        with g.process_pool(max_workers=2, loader=create_graph) as pool:
+            first = g.execute('predict', [{'x': i} for i in range(10)], workers=pool)
+            second = g.execute('predict', [{'x': i} for i in range(10)], workers=pool)
+
+        self.assertEqual([item['y'] for item in first], [item['y'] for item in second])
+
+        # the graph was loaded once by each worker, by the worker itself
+        for item in first + second:
+            self.assertEqual(item['loaded_by'], item['pid'])
@@ -0,0 +1,122 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import Decision, NodeContainable
+from h1st.h1flow.partitioning import concat_outputs
+
+
+class Features(NodeContainable):
+    def predict(self, inputs):
+        df = inputs['df']
+        return {
+            'features': df.assign(y=df['x'] * 2),
+            'flags': (df['x'] % 2).to_numpy(),
+            'threshold': inputs['threshold'],
+            'worker': (os.getpid(), threading.get_ident()),
+        }
+
+
+class Total(NodeContainable):
+    row_separable = False
+
+    def predict(self, inputs):
+        return {'total': int(inputs['features']['y'].sum())}
+
+
+class Classify(NodeContainable):
+    def predict(self, inputs):
+        df = inputs['df']
+        return {'results': df.assign(prediction=df['x'] >= 5000)}
+
+
+class Branch(NodeContainable):
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def predict(self, inputs):
+        return {self.key: inputs['results']['x']}
+
+
+class PartitioningTestCase(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({'x': np.arange(10_000)}, index=np.arange(10_000)[::-1])
+        self.graph = Graph()
+        self.graph.start().add(Features())
+        self.graph.end()
+
+    def test_threads(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            result = self.graph.execute('predict', {'df': self.df, 'threshold': 3}, executor=executor, partition=500)
+
+        pd.testing.assert_frame_equal(result['features'], self.df.assign(y=self.df['x'] * 2))
+        np.testing.assert_array_equal(result['flags'], self.df['x'].to_numpy() % 2)
+        self.assertEqual(result['threshold'], 3)
+
+    def test_processes(self):
+        result = self.graph.execute('predict', {'df': self.df, 'threshold': 3}, workers=2, partition=1000)
+
+        pd.testing.assert_frame_equal(result['features'], self.df.assign(y=self.df['x'] * 2))
+        self.assertNotEqual(result['worker'][0], os.getpid())
+
+    def test_not_row_separable(self):
+        self.graph = Graph()
+        self.graph.start().add(Features()).add(Total())
+        self.graph.end()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            result = self.graph.execute('predict', {'df': self.df, 'threshold': 3}, executor=executor, partition=500)
+
+        self.assertEqual(result['total'], int(self.df['x'].sum() * 2))
+        self.assertEqual(result['worker'], (os.getpid(), threading.get_ident()))
+
+    def test_empty_frame(self):
+        df = self.df.iloc[:0]
+        expected = self.graph.predict({'df': df, 'threshold': 3})
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            result = self.graph.execute('predict', {'df': df, 'threshold': 3}, executor=executor, partition=500)
+
+        self.assertEqual(sorted(result), sorted(expected))
+        pd.testing.assert_frame_equal(result['features'], expected['features'])
+
+    def test_end_transform_output(self):
+        self.graph.nodes.end.transform_output = lambda output: {'total': int(output['features']['y'].sum())}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            result = self.graph.execute('predict', {'df': self.df, 'threshold': 3}, executor=executor, partition=500)
+
+        self.assertEqual(result, {'total': int(self.df['x'].sum() * 2)})
+
+    def test_empty_branch_in_first_chunk(self):
+        self.graph = Graph()
+        self.graph.start().add(Decision(Classify())).add(yes=Branch('yes'), no=Branch('no'))
+        self.graph.end()
+        expected = self.graph.predict({'df': self.df})
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            result = self.graph.execute('predict', {'df': self.df}, executor=executor, partition=1000)
+
+        self.assertEqual(sorted(result), ['no', 'results', 'yes'])
+        pd.testing.assert_frame_equal(result['results'], expected['results'])
+        for key in ('yes', 'no'):
+            pd.testing.assert_series_equal(result[key].sort_index(), expected[key].sort_index())
+
+    def test_concat_outputs(self):
+        outputs = [
+            {'s': pd.Series([1, 2], index=[0, 1]), 'a': np.array([1]), 'v': 'x'},
+            {'s': pd.Series([3], index=[2]), 'a': np.array([2, 3]), 'v': 'x'},
+        ]
+        result = concat_outputs(outputs)
+
+        pd.testing.assert_series_equal(result['s'], pd.Series([1, 2, 3]))
+        np.testing.assert_array_equal(result['a'], [1, 2, 3])
+        self.assertEqual(result['v'], 'x')
+
+        result = concat_outputs([{'v': 'x'}, {'s': pd.Series([1]), 'v': 'y'}, {'s': pd.Series([2], index=[1])}])
+        pd.testing.assert_series_equal(result['s'], pd.Series([1, 2]))
+        self.assertEqual(result['v'], 'x')
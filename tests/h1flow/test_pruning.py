@@ -0,0 +1,131 @@
+import pandas as pd
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import GraphException, NodeContainable, Decision
+
+
+class Counted(NodeContainable):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+
+class BuildFeatures(Counted):
+    consumes = ['df']
+    produces = ['features']
+
+    def predict(self, inputs):
+        self.calls += 1
+        return {'features': inputs['df']['x'] * 2}
+
+
+class Explain(Counted):
+    consumes = ['features']
+    produces = ['explanation']
+
+    def predict(self, inputs):
+        self.calls += 1
+        return {'explanation': 'expensive'}
+
+
+class Score(Counted):
+    consumes = ['features']
+    produces = ['risk_score']
+
+    def predict(self, inputs):
+        self.calls += 1
+        return {'risk_score': int(inputs['features'].sum())}
+
+
+class Dashboard(Counted):
+    consumes = ['explanation', 'risk_score']
+    produces = ['dashboard']
+
+    def predict(self, inputs):
+        self.calls += 1
+        return {'dashboard': f'{inputs["explanation"]}: {inputs["risk_score"]}'}
+
+
+class PruningTestCase(TestCase):
+    def setUp(self):
+        self.features, self.explain, self.score, self.dashboard = BuildFeatures(), Explain(), Score(), Dashboard()
+
+        self.graph = Graph()
+        self.graph.start().add(self.features).add(self.explain).add(self.score).add(self.dashboard)
+        self.graph.end()
+
+        self.data = {'df': pd.DataFrame({'x': [1, 2, 3]})}
+
+    def _calls(self):
+        return [node.calls for node in (self.features, self.explain, self.score, self.dashboard)]
+
+    def test_fast_path(self):
+        result = self.graph.execute('predict', self.data, outputs=['risk_score'])
+
+        self.assertEqual(result, {'risk_score': 12})
+        self.assertEqual(self._calls(), [1, 0, 1, 0])
+
+    def test_all_needed(self):
+        result = self.graph.execute('predict', self.data, outputs=['dashboard'])
+
+        self.assertEqual(result, {'dashboard': 'expensive: 12'})
+        self.assertEqual(self._calls(), [1, 1, 1, 1])
+
+    def test_without_outputs(self):
+        result = self.graph.predict(self.data)
+
+        self.assertEqual(set(result), {'features', 'explanation', 'risk_score', 'dashboard'})
+
+    def test_unknown_keys(self):
+        with self.assertRaises(GraphException) as raised:
+            self.graph.execute('predict', self.data, outputs=['risk_score', 'unknown', 'other'])
+
+        self.assertIn("['other', 'unknown']", str(raised.exception))
+        self.assertEqual(self._calls(), [0, 0, 0, 0])
+
+    def test_pruned_plan_cached(self):
+        plan = self.graph.compile()
+        self.assertIs(plan.prune(['risk_score']), plan.prune(['risk_score']))
+
+    def test_undeclared_node_executed(self):
+        class Audit(Counted):
+            def predict(self, inputs):
+                self.calls += 1
+                return {}
+
+        audit = Audit()
+        g = Graph()
+        g.start().add(BuildFeatures()).add(audit)
+        g.end()
+
+        g.execute('predict', self.data, outputs=['features'])
+        self.assertEqual(audit.calls, 1)
+
+    def test_decision_branch_skipped(self):
+        class Classifier(NodeContainable):
+            consumes = ['df']
+            produces = ['results']
+
+            def predict(self, inputs):
+                df = inputs['df']
+                return {'results': df.assign(prediction=df['x'] > 1)}
+
+        class Total(Counted):
+            consumes = ['results']
+
+            def __init__(self, key):
+                super().__init__()
+                self.key = key
+                self.produces = [key]
+
+            def predict(self, inputs):
+                self.calls += 1
+                return {self.key: int(inputs['results']['x'].sum())}
+
+        yes, no = Total('yes'), Total('no')
+        g = Graph()
+        g.start().add(Decision(Classifier())).add(yes=yes, no=no)
+        g.end()
+
+        self.assertEqual(g.execute('predict', self.data, outputs=['yes']), {'yes': 5})
+        self.assertEqual((yes.calls, no.calls), (1, 0))
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from h1st.exceptions.exception import GraphException
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+from h1st.h1flow.scheduling import ResourceAwareExecutor
+
+
+class Where(NodeContainable):
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def predict(self, inputs):
+        return {self.key: (os.getpid(), threading.current_thread().name)}
+
+
+class Rules(Where):
+    resource = 'cpu'
+    consumes = []
+
+
+class Fetch(Where):
+    resource = 'io'
+
+
+class Score(Where):
+    resource = 'gil_free'
+
+
+class Format(Where):
+    resource = 'inline'
+
+
+class Limited(NodeContainable):
+    resource = 'io'
+    max_concurrency = 1
+
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def predict(self, inputs):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+
+        return {}
+
+
+class ResourceAwareExecutorTestCase(TestCase):
+    def test_dispatch(self):
+        g = Graph()
+        g.start()
+        g.add(Rules('rules'))
+        g.add(Fetch('fetch'))
+        g.add(Score('score'))
+        g.add(Format('format'))
+        g.end()
+
+        with ResourceAwareExecutor(max_processes=1) as executor:
+            # twice, the second time the worker process already loaded the containable
+            for _ in range(2):
+                result = g.execute('predict', {}, executor=executor)
+
+                self.assertNotEqual(result['rules'][0], os.getpid())
+                self.assertTrue(result['fetch'][1].startswith('h1st-io'))
+                self.assertTrue(result['score'][1].startswith('h1st-compute'))
+                self.assertEqual(result['format'][1], threading.current_thread().name)
+
+    def test_max_concurrency(self):
+        limited = Limited()
+        g = Graph()
+        g.start().add(limited)
+        g.end()
+
+        with ResourceAwareExecutor() as executor, ThreadPoolExecutor(max_workers=4) as callers:
+            list(callers.map(lambda _: g.execute('predict', {}, executor=executor), range(8)))
+
+        self.assertEqual(limited.max_running, 1)
+
+    def test_unknown_resource(self):
+        g = Graph()
+        g.start().add(Fetch('fetch'))
+        g.end()
+
+        with self.assertRaises(GraphException):
+            g.nodes.Fetch.resource = 'gpu'
+
+    def test_invalidate(self):
+        g = Graph()
+        g.start().add(Rules('rules'))
+        g.end()
+
+        with ResourceAwareExecutor(max_processes=1) as executor:
+            g.execute('predict', {}, executor=executor)
+
+            g.nodes.Rules._containable.key = 'changed'
+            self.assertIn('rules', g.execute('predict', {}, executor=executor))
+
+            executor.invalidate(g.nodes.Rules)
+            self.assertIn('changed', g.execute('predict', {}, executor=executor))
@@ -0,0 +1,97 @@
+import asyncio
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+from h1st.h1flow.singleflight import SingleFlight
+
+
+class Blocking(NodeContainable):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def predict(self, inputs):
+        self.calls += 1
+        self.release.wait(5)
+        if inputs['x'] < 0:
+            raise ValueError('negative')
+
+        return {'y': inputs['x'] * 2}
+
+    async def apredict(self, inputs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {'y': inputs['x'] * 2}
+
+
+class SingleFlightTestCase(TestCase):
+    def setUp(self):
+        self.node = Blocking()
+        self.graph = Graph()
+        self.graph.start().add(self.node)
+        self.graph.end()
+        self.graph.singleflight = SingleFlight()
+
+    def _execute_concurrently(self, items):
+        with ThreadPoolExecutor(max_workers=len(items)) as executor:
+            futures = [executor.submit(self.graph.predict, item) for item in items]
+            # let all the requests start before the first execution completes
+            while self.graph.singleflight.stats()['requests'] < len(items):
+                pass
+            self.node.release.set()
+
+            return [future.exception() or future.result() for future in futures]
+
+    def test_coalesced(self):
+        results = self._execute_concurrently([{'x': 1}] * 4 + [{'x': 2}] * 2)
+
+        self.assertEqual(results, [{'y': 2}] * 4 + [{'y': 4}] * 2)
+        self.assertEqual(self.node.calls, 2)
+        self.assertEqual(self.graph.singleflight.stats(), {
+            'requests': 6, 'executions': 2, 'coalesced': 4, 'coalescing_rate': 4 / 6, 'in_flight': 0,
+        })
+
+        # each caller has its own output dictionary
+        results[0]['z'] = 0
+        self.assertNotIn('z', results[1])
+
+    def test_leader_gets_a_copy(self):
+        shared = {'y': 2}
+        result = SingleFlight().execute(b'key', lambda: shared)
+        self.assertEqual(result, shared)
+        self.assertIsNot(result, shared)
+
+        result = asyncio.run(SingleFlight().aexecute(b'key', lambda: asyncio.sleep(0, shared)))
+        self.assertEqual(result, shared)
+        self.assertIsNot(result, shared)
+
+    def test_error_shared(self):
+        results = self._execute_concurrently([{'x': -1}] * 3)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(self.node.calls, 1)
+
+    def test_async(self):
+        async def run():
+            return await asyncio.gather(*[self.graph.apredict({'x': 1}) for _ in range(5)])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, [{'y': 2}] * 5)
+        self.assertEqual(self.node.calls, 1)
+        self.assertEqual(self.graph.singleflight.stats()['coalesced'], 4)
+
+    def test_sequential_not_coalesced(self):
+        self.node.release.set()
+        self.graph.predict({'x': 1})
+        self.graph.predict({'x': 1})
+
+        self.assertEqual(self.node.calls, 2)
+
+    def test_pickle(self):
+        singleflight = pickle.loads(pickle.dumps(self.graph.singleflight))
+        self.assertEqual(singleflight.stats()['in_flight'], 0)
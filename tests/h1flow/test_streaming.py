@@ -0,0 +1,48 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+
+
+class RowCount(NodeContainable):
+    def predict(self, inputs):
+        return {'rows': len(inputs['df'])}
+
+
+class StreamingExecutionTestCase(TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        self.graph.start().add(RowCount())
+        self.graph.end()
+
+        self.pulled = 0
+
+    def _chunks(self, count):
+        for i in range(count):
+            self.pulled += 1
+            yield pd.DataFrame({'x': range(i + 1)})
+
+    def test_items_are_pulled_lazily(self):
+        stream = self.graph.execute_stream('predict', self._chunks(100))
+
+        self.assertEqual(next(stream), {'rows': 1})
+        self.assertEqual(self.pulled, 1)
+
+    def test_bounded_window_with_executor(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stream = self.graph.execute_stream('predict', self._chunks(100), executor=executor, window=3)
+
+            self.assertEqual(next(stream), {'rows': 1})
+            self.assertLessEqual(self.pulled, 4)
+
+            outputs = [output['rows'] for output in stream]
+
+        self.assertEqual(outputs, list(range(2, 101)))
+
+    def test_unordered_outputs(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            stream = self.graph.execute_stream('predict', self._chunks(20), executor=executor, ordered=False)
+            outputs = [output['rows'] for output in stream]
+
+        self.assertEqual(sorted(outputs), list(range(1, 21)))
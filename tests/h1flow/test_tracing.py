@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from unittest import TestCase
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable, Decision
+from h1st.h1flow.tracing import Tracer, set_tracer
+
+
+class Classifier(NodeContainable):
+    def predict(self, inputs):
+        df = inputs['df']
+        return {'results': df.assign(prediction=df['x'] > 1)}
+
+
+class Score(NodeContainable):
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def predict(self, inputs):
+        return {self.key: inputs['results']['x'] * 2}
+
+
+class TracingTestCase(TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        self.graph.start().add(Decision(Classifier(), id='classifier')).add(yes=Score('yes'), no=Score('no'))
+        self.graph.end()
+
+        self.data = {'df': pd.DataFrame({'x': [0, 1, 2, 3, 4]})}
+
+    def tearDown(self):
+        set_tracer(None)
+
+    def test_trace_records_spans(self):
+        self.graph.execute('predict', self.data, trace=True)
+
+        spans = self.graph.tracer.to_dataframe().set_index('node_id')
+        self.assertEqual(set(spans.index), {'start', 'classifier', 'Score', 'Score2', 'end'})
+        self.assertEqual(spans.loc['classifier', 'rows_in'], 5)
+        self.assertEqual(spans.loc['classifier', 'branches'], {'yes': 3, 'no': 2})
+        self.assertEqual(spans.loc['Score', 'rows_out'], 3)
+        self.assertTrue((spans['wall_ms'] >= spans['call_ms']).all())
+
+    def test_chrome_trace_export(self):
+        self.graph.execute('predict', self.data, trace=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.trace.json')
+            self.graph.tracer.export(path)
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+
+        self.assertEqual(events[0]['name'], 'execute predict')
+        nodes = [event for event in events if event['cat'] == 'node']
+        self.assertEqual(len(nodes), 5)
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in nodes))
+
+    def test_process_pool_spans(self):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            self.graph.execute('predict', self.data, executor=executor, trace=True)
+
+        spans = self.graph.tracer.to_dataframe().set_index('node_id')
+        self.assertEqual(set(spans.index), {'start', 'classifier', 'Score', 'Score2', 'end'})
+        self.assertEqual(spans.loc['Score', 'rows_out'], 3)
+
+        processes = {event['pid'] for event in self.graph.tracer.to_chrome_trace()['traceEvents']
+                     if event['cat'] == 'node'}
+        self.assertTrue(processes - {os.getpid()})
+
+    def test_pickled_trace(self):
+        for _ in range(20):
+            self.graph.execute('predict', self.data, trace=True)
+        trace = self.graph.tracer.traces[-1]
+
+        copy = pickle.loads(pickle.dumps(trace))
+
+        self.assertIsNone(copy.tracer)
+        self.assertEqual([span.node_id for span in copy.spans], [span.node_id for span in trace.spans])
+        self.assertLess(len(pickle.dumps(trace)), len(pickle.dumps(self.graph.tracer)) / 10)
+
+    def test_sampling(self):
+        tracer = Tracer(sample_rate=0)
+        for _ in range(10):
+            self.graph.execute('predict', self.data, trace=tracer)
+
+        self.assertEqual(len(tracer.traces), 0)
+
+    def test_global_tracer(self):
+        tracer = Tracer(max_traces=2)
+        set_tracer(tracer)
+
+        for _ in range(3):
+            self.graph.execute('predict', self.data)
+        self.graph.execute('predict', self.data, trace=False)
+
+        self.assertEqual(len(tracer.traces), 2)
+
+    def test_async_trace(self):
+        tracer = Tracer()
+        asyncio.run(self.graph.aexecute('predict', self.data, trace=tracer))
+
+        spans = tracer.to_dataframe()
+        self.assertEqual(len(spans), 5)
+        self.assertTrue(spans['cpu_ms'].isna().all())
+
+    def test_failed_execution_is_traced(self):
+        class Failing(NodeContainable):
+            def predict(self, inputs):
+                raise ValueError('boom')
+
+        g = Graph()
+        g.start().add(Failing())
+        g.end()
+
+        self.assertRaises(ValueError, lambda: g.execute('predict', {}, trace=True))
+        self.assertEqual(g.tracer.traces[0].error, 'ValueError: boom')
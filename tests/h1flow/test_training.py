@@ -0,0 +1,66 @@
+import os
+import tempfile
+from unittest import TestCase
+import pandas as pd
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import NodeContainable
+from h1st.h1flow.training import ParallelTrainer
+from h1st.model.model import Model
+from h1st.model.repository.model_repository import ModelRepository
+
+
+class Prepare(NodeContainable):
+    def train(self, inputs):
+        return {'y': inputs['df']['x'] * 2}
+
+
+class MeanModel(Model):
+    def __init__(self, key):
+        super().__init__()
+        self.key = key
+
+    def train(self, inputs):
+        self.stats = {'mean': float(inputs[self.key].to_numpy().mean()), 'pid': os.getpid()}
+        return {f'{self.key}_trained': True}
+
+
+class ParallelTrainerTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.repository = ModelRepository(self.directory.name)
+
+        self.x_model = MeanModel('df')
+        self.y_model = MeanModel('y')
+
+        self.graph = Graph()
+        self.graph.start().add(Prepare())
+        self.graph.add_many([self.x_model, self.y_model])
+        self.graph.end()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_train(self):
+        data = {'df': pd.DataFrame({'x': [1.0, 2.0, 3.0]})}
+        with ParallelTrainer(self.repository, max_processes=2) as trainer:
+            result = self.graph.execute('train', data, executor=trainer)
+
+        self.assertTrue(result['df_trained'] and result['y_trained'])
+        self.assertEqual(self.y_model.stats['mean'], 4.0)
+        self.assertNotEqual(self.y_model.stats['pid'], os.getpid())
+        self.assertEqual(set(trainer.versions), {'MeanModel', 'MeanModel2'})
+
+        loaded = MeanModel('y')
+        self.repository.load(loaded, trainer.versions['MeanModel2'])
+        self.assertEqual(loaded.stats['mean'], 4.0)
+
+    def test_shared_frames(self):
+        data = {'df': pd.DataFrame({'x': [1.0, 2.0, 3.0]})}
+        with ParallelTrainer(max_processes=2) as trainer:
+            self.graph.execute('train', data, executor=trainer)
+
+            # the frame of both models and the Series of the second one
+            self.assertEqual(len(os.listdir(trainer._directory)), 2)
+
+        self.assertEqual(self.x_model.stats['mean'], 2.0)
+        self.assertEqual(trainer.versions, {})
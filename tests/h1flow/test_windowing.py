@@ -0,0 +1,110 @@
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from h1st.h1flow.h1flow import Graph
+from h1st.h1flow.h1step import GraphException
+from h1st.h1flow.windowing import Window
+
+
+def events(n: int = 200, seed: int = 0) -> pd.DataFrame:
+    random = np.random.default_rng(seed)
+    times = np.cumsum(random.integers(0, 4, n))
+    values = random.normal(size=n)
+    values[random.integers(0, n, 10)] = np.nan
+    return pd.DataFrame({'t': times, 'x': values, 'y': random.integers(0, 100, n).astype(float)})
+
+
+def chunks(df: pd.DataFrame, size: int):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+
+def stream(window: Window, df: pd.DataFrame, size: int) -> pd.DataFrame:
+    outputs = [window.update(chunk) for chunk in chunks(df, size)]
+    return pd.concat(outputs + [window.flush()], ignore_index=True)
+
+
+def expected_windows(df: pd.DataFrame, starts, size) -> pd.DataFrame:
+    rows = []
+    for start in starts:
+        rows_in = df[(df['t'] >= start) & (df['t'] < start + size)]
+        if len(rows_in):
+            row = {'window_start': start, 'window_end': start + size}
+            for column in ('x', 'y'):
+                values = rows_in[column]
+                row.update({f'{column}_count': values.count(), f'{column}_sum': values.sum(),
+                            f'{column}_mean': values.mean(), f'{column}_min': values.min(),
+                            f'{column}_max': values.max()})
+            rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+class WindowTestCase(TestCase):
+    def assertFramesEqual(self, actual: pd.DataFrame, expected: pd.DataFrame):
+        pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected, check_dtype=False)
+
+    def test_tumbling(self):
+        df = events()
+        expected = expected_windows(df, range(0, df['t'].max() + 1, 10), 10)
+
+        for size in (1, 7, 50, 200):
+            self.assertFramesEqual(stream(Window(['x', 'y'], size=10, time='t'), df, size), expected)
+
+    def test_sliding(self):
+        df = events()
+        expected = expected_windows(df, range(-20, df['t'].max() + 1, 5), 25)
+
+        for size in (1, 13, 200):
+            self.assertFramesEqual(stream(Window(['x', 'y'], size=25, slide=5, time='t'), df, size), expected)
+
+    def test_sliding_gaps(self):
+        df = pd.DataFrame({'t': [0, 1, 30, 31, 100], 'x': [1.0, 5.0, 2.0, 3.0, 4.0], 'y': 1.0})
+        expected = expected_windows(df, range(-6, 101, 2), 8)
+
+        self.assertFramesEqual(stream(Window(['x', 'y'], size=8, slide=2, time='t'), df, 2), expected)
+
+    def test_session(self):
+        df = events()
+        sessions = (df['t'].diff() >= 3).cumsum()
+        grouped = df.groupby(sessions)
+        expected = pd.DataFrame({'window_start': grouped['t'].min().to_numpy(),
+                                 'window_end': grouped['t'].max().to_numpy() + 3})
+        for column in ('x', 'y'):
+            for name in ('count', 'sum', 'mean', 'min', 'max'):
+                expected[f'{column}_{name}'] = grouped[column].agg(name).to_numpy()
+
+        for size in (1, 9, 200):
+            self.assertFramesEqual(stream(Window(['x', 'y'], gap=3, time='t'), df, size), expected)
+
+    def test_datetime_index(self):
+        index = pd.date_range('2022-01-01', periods=10, freq='1min', tz='UTC')
+        df = pd.DataFrame({'bytes': np.arange(10.0)}, index=index)
+
+        window = Window(['bytes'], size='5min', slide='1min', aggregations=['sum'])
+        output = stream(window, df, 3)
+
+        self.assertEqual(output['window_start'].iloc[0], pd.Timestamp('2021-12-31 23:56', tz='UTC'))
+        self.assertEqual(list(output['bytes_sum']), list(pd.Series(np.arange(10.0)).rolling(5, min_periods=1).sum())
+                         + [30.0, 24.0, 17.0, 9.0])
+
+    def test_execute_stream(self):
+        df = events()
+        window = Window(['x', 'y'], size=10, time='t')
+        g = Graph()
+        g.start().add(window)
+        g.end()
+
+        outputs = [output['windows'] for output in g.execute_stream('predict', chunks(df, 16))]
+        self.assertIs(g.nodes.Window.containable, window)
+        windows = pd.concat(outputs + [g.nodes.Window.containable.flush()])
+
+        self.assertFramesEqual(windows, expected_windows(df, range(0, df['t'].max() + 1, 10), 10))
+        self.assertFalse(g.nodes.Window.row_separable)
+
+    def test_invalid(self):
+        with self.assertRaises(GraphException):
+            Window(['x'], size=10, gap=3)
+        with self.assertRaises(GraphException):
+            Window(['x'], size=10, aggregations=['median'])
+        with self.assertRaises(GraphException):
+            Window(['x'], size=10, slide=3, time='t').update(pd.DataFrame({'t': [1], 'x': [1.0]}))